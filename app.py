@@ -1,6 +1,10 @@
 import streamlit as st
+from utils.preload import start_preload
 
 def main():
+    # Warm SDV, torch and friends in the background while the user picks a page
+    start_preload()
+    
     # Set page config
     st.set_page_config(
         page_title="My Streamlit App",
@@ -19,7 +23,7 @@ def main():
     Select different pages from the sidebar to explore various features:
     
     - 📊 **Data Analysis**: Explore and visualize data
-    - 🤖 **ML Models**: Try out machine learning models
+    - ⚡ **Engine Benchmark**: Compare synthesizer engines on fit time, sampling speed and quality
     - ℹ️ **About**: Learn more about the project
     - 📁 **File Manager**: View and manage uploaded files
     - 🔄 **Synthetic Data**: Generate synthetic data from uploaded files
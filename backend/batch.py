@@ -0,0 +1,297 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import yaml
+from utils.storage import UPLOAD_DIR, cache_path
+
+# Settings every dataset starts from; the spec's defaults and each dataset override them
+DEFAULTS = {
+    "engine": "ctgan",
+    "parameters": {
+        "epochs": 300,
+        "batch_size": 500,
+        "log_frequency": True,
+        "generator_dim": [128, 128, 128],
+        "discriminator_dim": [128, 128, 128],
+        "embedding_dim": 128
+    },
+    "train": True,
+    "num_rows": 1000,
+    "batch_rows": 10000,
+    "evaluate": True
+}
+
+SPEC_EXAMPLE = """
+example spec (paths are relative to the upload directory):
+
+  defaults:
+    parameters: {epochs: 100}
+    num_rows: 10000
+  datasets:
+    - name: payments
+      data: payment.csv
+      metadata: metadata_payment.json
+    - name: products
+      data: product.csv
+      metadata: metadata_product.json
+      engine: gaussian_copula
+    - name: orders
+      data: orders.csv
+      metadata: metadata_orders.json
+      model: model_orders_nightly.pkl
+      output: synthetic_orders_nightly.csv
+      parameters: {epochs: 300, batch_size: 1000}
+      performance:
+        intra_op_threads: 4
+        adaptive_batch_size: true
+        early_stopping: {patience: 20, min_delta: 0.05, min_epochs: 50}
+      evaluate: false
+"""
+
+def load_spec(spec_path):
+    """
+    Load a batch spec from YAML or JSON and resolve every dataset's settings
+    """
+    with open(spec_path, 'r') as f:
+        spec = json.load(f) if spec_path.endswith('.json') else yaml.safe_load(f)
+    # An empty YAML file loads as None
+    if not isinstance(spec, dict):
+        raise ValueError(f"Batch spec {spec_path} must be a mapping with a 'datasets' list")
+
+    defaults = {**DEFAULTS, **(spec.get('defaults') or {})}
+    defaults['parameters'] = {**DEFAULTS['parameters'], **(spec.get('defaults') or {}).get('parameters', {})}
+
+    datasets = []
+    for entry in spec.get('datasets') or []:
+        if 'data' not in entry or 'metadata' not in entry:
+            raise ValueError(f"Dataset {entry.get('name', entry)} needs both 'data' and 'metadata'")
+        name = entry.get('name') or os.path.splitext(os.path.basename(entry['data']))[0]
+        dataset = {**defaults, **entry, 'name': name}
+        dataset['parameters'] = {**defaults['parameters'], **entry.get('parameters', {})}
+        dataset.setdefault('model', f"model_{dataset['engine']}_{name}.pkl")
+        dataset.setdefault('output', f"synthetic_{name}.csv")
+        datasets.append(dataset)
+
+    names = [dataset['name'] for dataset in datasets]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Dataset names must be unique: {', '.join(duplicates)}")
+    return datasets
+
+def _log(name, message):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {name}: {message}", flush=True)
+
+def train_dataset(dataset):
+    """
+    Train and save a model of the dataset's engine as the Modeling page's training jobs do
+    """
+    from backend.training import build_metadata, train_synthesizer, training_summary, transformer_key
+    from utils.loaders import load_frame, load_json
+    from utils.model_registry import write_manifest
+
+    data_path = os.path.join(UPLOAD_DIR, dataset['data'])
+    metadata_path = os.path.join(UPLOAD_DIR, dataset['metadata'])
+    data = load_frame(data_path, metadata_path)
+    metadata = build_metadata(data, load_json(metadata_path))
+
+    # train_synthesizer drops parameters the engine does not take, e.g. CTGAN's layer sizes for a copula
+    parameters = dataset['parameters']
+
+    epochs = parameters['epochs']
+    def report_epoch(epoch, generator_loss, discriminator_loss, seconds, samples_per_second):
+        if (epoch + 1) % max(1, epochs // 10) == 0 or epoch + 1 == epochs:
+            _log(
+                dataset['name'],
+                f"epoch {epoch + 1}/{epochs} G={generator_loss:.3f} D={discriminator_loss:.3f} "
+                f"{seconds:.2f}s ({samples_per_second or 0:.0f} rows/s)"
+            )
+
+    performance = dataset.get('performance') or {}
+    engine = dataset['engine']
+    cache_key = transformer_key(data_path, metadata, engine, parameters) if performance.get('cache_transformer', True) else None
+    synthesizer = train_synthesizer(
+        data, metadata, parameters, on_epoch=report_epoch, performance=performance, transformer_key=cache_key,
+        engine=engine
+    )
+
+    model_path = os.path.join(UPLOAD_DIR, dataset['model'])
+    synthesizer.save(model_path)
+    write_manifest(
+        model_path,
+        data_path=data_path,
+        metadata_path=metadata_path,
+        synthesizer=type(synthesizer).__name__,
+        engine=engine,
+        parameters=synthesizer.get_parameters(),
+        batch=dataset['name'],
+        performance=dataset.get('performance'),
+        **training_summary(synthesizer)
+    )
+    return model_path
+
+def sample_dataset(dataset, model_path):
+    """
+    Stream synthetic rows to the output file as the Sampling page does
+    """
+    from backend.sampling import sample_to_file
+    from utils.custom_logic import apply_custom_logic, model_custom_logic
+    from utils.model_registry import load_model
+
+    custom_logic = model_custom_logic(model_path)
+    output_path = os.path.join(UPLOAD_DIR, dataset['output'])
+    stats, _ = sample_to_file(
+        load_model(model_path),
+        dataset['num_rows'],
+        output_path,
+        batch_size=dataset['batch_rows'],
+        transform=(lambda batch: apply_custom_logic(batch, custom_logic)) if custom_logic else None
+    )
+    return output_path
+
+def evaluate_dataset(dataset, output_path):
+    """
+    Score the synthetic rows against the original data as the Evaluation page does
+    """
+    from sdv.evaluation.single_table import evaluate_quality
+    from utils.loaders import load_frame, load_json
+    from utils.metadata_compiler import compile_metadata
+
+    metadata_path = os.path.join(UPLOAD_DIR, dataset['metadata'])
+    original_df = load_frame(os.path.join(UPLOAD_DIR, dataset['data']), metadata_path)
+    synthetic_df = load_frame(output_path, metadata_path)
+    metadata = compile_metadata(original_df, load_json(metadata_path), use_primary_key=True)
+
+    report = evaluate_quality(
+        real_data=original_df,
+        synthetic_data=synthetic_df,
+        metadata=metadata,
+        verbose=False
+    )
+    properties = report.get_properties()
+    return {
+        "score": float(report.get_score()),
+        "properties": {row['Property']: float(row['Score']) for _, row in properties.iterrows()}
+    }
+
+def run_dataset(dataset, working_dir=None):
+    """
+    Run one dataset through training, sampling and evaluation.
+    Failures are reported in the result instead of raised, so one bad
+    dataset never stops the rest of the batch.
+    """
+    if working_dir:
+        os.chdir(working_dir)
+
+    result = {"name": dataset['name'], "status": "completed", "timings": {}}
+    start = time.perf_counter()
+    try:
+        model_path = os.path.join(UPLOAD_DIR, dataset['model'])
+        if dataset['train']:
+            _log(dataset['name'], "training")
+            step = time.perf_counter()
+            train_dataset(dataset)
+            result['timings']['train'] = time.perf_counter() - step
+        elif not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model {dataset['model']} does not exist and training is off")
+        result['model'] = dataset['model']
+
+        if dataset['num_rows']:
+            _log(dataset['name'], f"sampling {dataset['num_rows']} rows")
+            step = time.perf_counter()
+            output_path = sample_dataset(dataset, model_path)
+            result['timings']['sample'] = time.perf_counter() - step
+            result['output'] = dataset['output']
+
+            if dataset['evaluate']:
+                _log(dataset['name'], "evaluating")
+                step = time.perf_counter()
+                result['quality'] = evaluate_dataset(dataset, output_path)
+                result['timings']['evaluate'] = time.perf_counter() - step
+    except Exception:
+        result['status'] = "failed"
+        result['error'] = traceback.format_exc()
+        _log(dataset['name'], f"failed\n{result['error']}")
+
+    result['seconds'] = time.perf_counter() - start
+    if result['status'] == "completed":
+        score = result.get('quality', {}).get('score')
+        _log(dataset['name'], f"done in {result['seconds']:.1f}s" + (f", quality {score:.3f}" if score is not None else ""))
+    return result
+
+def run_batch(datasets, workers=1):
+    """
+    Run every dataset, in parallel worker processes when ``workers`` > 1.
+    Returns the results in spec order.
+    """
+    if workers <= 1 or len(datasets) <= 1:
+        return [run_dataset(dataset) for dataset in datasets]
+
+    # Split the cores between workers unless a dataset pins its own torch threads
+    threads = max(1, (os.cpu_count() or 1) // min(workers, len(datasets)))
+    datasets = [
+        {**dataset, 'performance': {'intra_op_threads': threads, **(dataset.get('performance') or {})}}
+        for dataset in datasets
+    ]
+
+    # Spawned workers start from a clean interpreter instead of forking this one
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(datasets)),
+        mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        futures = {
+            pool.submit(run_dataset, dataset, os.getcwd()): index
+            for index, dataset in enumerate(datasets)
+        }
+        results = [None] * len(datasets)
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+def write_summary(spec_path, results, seconds):
+    """
+    Save a batch run's results next to the other derived artifacts
+    """
+    stem = os.path.splitext(os.path.basename(spec_path))[0]
+    path = cache_path("batch", f"{stem}-{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump({"spec": spec_path, "seconds": seconds, "datasets": results}, f, indent=4)
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.batch",
+        description="Train, sample and evaluate synthesizer models for every dataset in a spec file, without Streamlit.",
+        epilog=SPEC_EXAMPLE,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("spec", help="YAML or JSON batch spec")
+    parser.add_argument("--workers", type=int, default=1, help="datasets processed in parallel (default: 1)")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="run only these datasets")
+    args = parser.parse_args(argv)
+
+    datasets = load_spec(args.spec)
+    if args.only:
+        unknown = set(args.only) - {dataset['name'] for dataset in datasets}
+        if unknown:
+            parser.error(f"unknown datasets: {', '.join(sorted(unknown))}")
+        datasets = [dataset for dataset in datasets if dataset['name'] in args.only]
+
+    start = time.perf_counter()
+    results = run_batch(datasets, workers=args.workers)
+    seconds = time.perf_counter() - start
+    summary_path = write_summary(args.spec, results, seconds)
+
+    failed = [result['name'] for result in results if result['status'] != "completed"]
+    print(f"{len(results) - len(failed)}/{len(results)} datasets completed in {seconds:.1f}s; summary: {summary_path}")
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import inspect
+import json
+import os
+import time
+from datetime import datetime
+from utils.storage import cache_path
+
+# Synthesizers that share the train, save and sample flow. "gan" engines train
+# CTGAN underneath, so they report epochs, stop early and reuse fitted data
+# transformers; "epochs" engines train a network for a number of epochs.
+ENGINES = {
+    'ctgan': {'label': 'CTGAN', 'class': 'CTGANSynthesizer', 'epochs': True, 'gan': True},
+    'copula_gan': {'label': 'CopulaGAN', 'class': 'CopulaGANSynthesizer', 'epochs': True, 'gan': True},
+    'tvae': {'label': 'TVAE', 'class': 'TVAESynthesizer', 'epochs': True, 'gan': False},
+    'gaussian_copula': {'label': 'Gaussian Copula', 'class': 'GaussianCopulaSynthesizer', 'epochs': False, 'gan': False}
+}
+
+DEFAULT_ENGINE = 'ctgan'
+
+def engine_class(engine):
+    """
+    The SDV synthesizer class behind an engine, imported on first use
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'; choose one of {', '.join(ENGINES)}")
+    import sdv.single_table
+    return getattr(sdv.single_table, ENGINES[engine]['class'])
+
+def engine_parameters(engine, parameters):
+    """
+    Keep only the parameters an engine's synthesizer accepts, with layer
+    sizes as tuples, so one parameter set can be offered to every engine
+    """
+    accepted = inspect.signature(engine_class(engine).__init__).parameters
+    return {
+        name: tuple(value) if isinstance(value, list) else value
+        for name, value in parameters.items()
+        if name in accepted and name != 'metadata'
+    }
+
+def benchmark_engines(data, metadata, evaluation_metadata, engines, parameters, num_rows=None, on_engine=None):
+    """
+    Fit every engine on the same data, then time sampling and score quality.
+    ``on_engine(result, done, total)`` is called as each engine finishes;
+    a failing engine is reported in its result and does not stop the rest.
+    """
+    from sdv.evaluation.single_table import evaluate_quality
+    from backend.training import train_synthesizer
+
+    num_rows = num_rows or len(data)
+    results = []
+    for engine in engines:
+        result = {'engine': engine, 'label': ENGINES[engine]['label'], 'status': 'completed'}
+        try:
+            start = time.perf_counter()
+            synthesizer = train_synthesizer(data, metadata, parameters, engine=engine)
+            result['fit_seconds'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            synthetic = synthesizer.sample(num_rows=num_rows)
+            sample_seconds = time.perf_counter() - start
+            result['sample_rows_per_second'] = len(synthetic) / sample_seconds if sample_seconds > 0 else None
+
+            report = evaluate_quality(
+                real_data=data,
+                synthetic_data=synthetic,
+                metadata=evaluation_metadata,
+                verbose=False
+            )
+            result['score'] = float(report.get_score())
+        except Exception as e:
+            result['status'] = 'failed'
+            result['error'] = str(e)
+        results.append(result)
+        if on_engine is not None:
+            on_engine(result, len(results), len(engines))
+    return results
+
+def record_benchmark(data_file, parameters, results, job_id=None):
+    """
+    Append a benchmark run to the history kept with the other benchmarks.
+    A background job appends one entry per engine, tagged with its id.
+    """
+    path = cache_path("benchmarks", "engines.jsonl")
+    entry = {
+        "recorded_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "data_file": data_file,
+        "parameters": parameters,
+        "engines": results
+    }
+    if job_id is not None:
+        entry["job_id"] = job_id
+    with open(path, 'a') as f:
+        f.write(json.dumps(entry, default=str) + "\n")
+    return path
+
+def benchmark_results(job_id):
+    """
+    Engine results a benchmark job has recorded so far, in the order they finished
+    """
+    path = cache_path("benchmarks", "engines.jsonl")
+    if not os.path.exists(path):
+        return []
+    results = []
+    with open(path, 'r') as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry.get("job_id") == job_id:
+                results.extend(entry["engines"])
+    return results
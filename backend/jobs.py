@@ -0,0 +1,419 @@
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+import traceback
+from datetime import datetime
+from utils.storage import UPLOAD_DIR, cache_path
+
+# Maximum number of training worker processes started by the app
+MAX_WORKERS = int(os.environ.get("SDV_APP_TRAIN_WORKERS", "2"))
+
+# Worker processes started by this server process
+_workers = []
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def _connect():
+    """
+    Open the job database, creating its tables on first use
+    """
+    connection = sqlite3.connect(cache_path("jobs.sqlite"), timeout=30, isolation_level=None)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            status TEXT NOT NULL,
+            data_file TEXT NOT NULL,
+            metadata_file TEXT NOT NULL,
+            model_file TEXT NOT NULL,
+            parameters TEXT NOT NULL,
+            created_at TEXT,
+            started_at TEXT,
+            finished_at TEXT,
+            worker_pid INTEGER,
+            error TEXT,
+            worker_host TEXT,
+            kind TEXT,
+            progress TEXT
+        )
+    """)
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS job_epochs (
+            job_id INTEGER NOT NULL,
+            epoch INTEGER NOT NULL,
+            generator_loss REAL,
+            discriminator_loss REAL,
+            recorded_at TEXT,
+            seconds REAL,
+            samples_per_second REAL,
+            PRIMARY KEY (job_id, epoch)
+        )
+    """)
+    # Databases created before worker hosts were recorded lack the column
+    job_columns = {row['name'] for row in connection.execute("PRAGMA table_info(jobs)")}
+    if 'worker_host' not in job_columns:
+        connection.execute("ALTER TABLE jobs ADD COLUMN worker_host TEXT")
+    # ...and before benchmarks shared the queue; their jobs all train models
+    if 'kind' not in job_columns:
+        connection.execute("ALTER TABLE jobs ADD COLUMN kind TEXT")
+    # ...and before jobs without epochs reported their progress
+    if 'progress' not in job_columns:
+        connection.execute("ALTER TABLE jobs ADD COLUMN progress TEXT")
+    # Databases created before throughput was recorded lack its columns
+    epoch_columns = {row['name'] for row in connection.execute("PRAGMA table_info(job_epochs)")}
+    for column in ('seconds', 'samples_per_second'):
+        if column not in epoch_columns:
+            connection.execute(f"ALTER TABLE job_epochs ADD COLUMN {column} REAL")
+    return connection
+
+def submit_job(data_file, metadata_file, model_file, parameters, kind='train'):
+    """
+    Queue a training job and make sure a worker will pick it up
+    """
+    connection = _connect()
+    try:
+        cursor = connection.execute(
+            "INSERT INTO jobs (status, data_file, metadata_file, model_file, parameters, created_at, kind) "
+            "VALUES ('queued', ?, ?, ?, ?, ?, ?)",
+            (data_file, metadata_file, model_file, json.dumps(parameters), _now(), kind)
+        )
+        job_id = cursor.lastrowid
+    finally:
+        connection.close()
+
+    ensure_workers()
+    return job_id
+
+def submit_benchmark(data_file, metadata_file, engines, parameters, num_rows=None):
+    """
+    Queue an engine benchmark; it runs on the training workers and saves no model
+    """
+    return submit_job(
+        data_file, metadata_file, "",
+        {"engines": engines, "parameters": parameters, "num_rows": num_rows},
+        kind='benchmark'
+    )
+
+def submit_multi_table(metadata_file, model_file, workers=None):
+    """
+    Queue fitting a multi-table model; its data files are named in the metadata
+    """
+    return submit_job("", metadata_file, model_file, {"workers": workers}, kind='multi_table')
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _fail_orphaned_jobs(connection):
+    """
+    Mark running jobs whose worker process has died as failed. Only workers
+    on this host can be checked; a PID from another training host means nothing here.
+    """
+    rows = connection.execute(
+        "SELECT id, worker_pid, worker_host FROM jobs WHERE status = 'running'"
+    ).fetchall()
+    for row in rows:
+        if row['worker_host'] not in (None, socket.gethostname()):
+            continue
+        if row['worker_pid'] and not _pid_alive(row['worker_pid']):
+            connection.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, error = ? WHERE id = ?",
+                (_now(), "Worker process exited before the job finished", row['id'])
+            )
+
+def list_jobs(limit=20, kind='train'):
+    """
+    Return the most recent jobs of a kind with their latest recorded epoch
+    """
+    connection = _connect()
+    try:
+        _fail_orphaned_jobs(connection)
+        rows = connection.execute("""
+            SELECT jobs.*,
+                   (SELECT MAX(epoch) FROM job_epochs WHERE job_id = jobs.id) AS last_epoch
+            FROM jobs WHERE COALESCE(kind, 'train') = ? ORDER BY id DESC LIMIT ?
+        """, (kind, limit)).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        connection.close()
+
+def get_job(job_id):
+    connection = _connect()
+    try:
+        row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+    finally:
+        connection.close()
+
+def get_job_epochs(job_id):
+    """
+    Return the per-epoch losses recorded for a job
+    """
+    connection = _connect()
+    try:
+        rows = connection.execute(
+            "SELECT * FROM job_epochs WHERE job_id = ? ORDER BY epoch", (job_id,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        connection.close()
+
+def ensure_workers():
+    """
+    Start worker processes while jobs are queued, up to MAX_WORKERS
+    """
+    global _workers
+    _workers = [worker for worker in _workers if worker.is_alive()]
+
+    connection = _connect()
+    try:
+        queued = connection.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+    finally:
+        connection.close()
+
+    # Spawned workers start from a clean interpreter instead of forking the server
+    context = multiprocessing.get_context("spawn")
+    while queued > 0 and len(_workers) < MAX_WORKERS:
+        worker = context.Process(target=run_worker, args=(os.getcwd(),), daemon=False)
+        worker.start()
+        _workers.append(worker)
+        queued -= 1
+
+def _claim_next_job(connection):
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        row = connection.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1"
+        ).fetchone()
+        if row is not None:
+            connection.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, worker_pid = ?, worker_host = ? WHERE id = ?",
+                (_now(), os.getpid(), socket.gethostname(), row['id'])
+            )
+        connection.execute("COMMIT")
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+    return dict(row) if row else None
+
+def _warm_start(warm_start, data, metadata_path, data_file):
+    """
+    Load a job's parent model and the rows it continues training on: the new
+    data alone, or every file the parent was trained on followed by the new data
+    """
+    import pickle
+    import pandas as pd
+    from utils.loaders import load_frame
+    from utils.model_registry import read_manifest
+
+    parent_path = os.path.join(UPLOAD_DIR, warm_start['parent_model'])
+    parent_manifest = read_manifest(parent_path) or {}
+    # Models trained before the full file list was recorded name only their last file
+    parent_files = parent_manifest.get('training_files') or [
+        name for name in [parent_manifest.get('data_file')] if name
+    ]
+    training_files = [data_file]
+    if warm_start.get('data') == 'combined':
+        missing = [name for name in parent_files if not os.path.exists(os.path.join(UPLOAD_DIR, name))]
+        if not parent_files or missing:
+            raise FileNotFoundError(
+                f"The training data of {warm_start['parent_model']} is not available to combine"
+                + (f": {', '.join(missing)} is missing" if missing else "")
+            )
+        # An appended file already holds the old rows
+        earlier_files = [name for name in parent_files if name != data_file]
+        data = pd.concat(
+            [load_frame(os.path.join(UPLOAD_DIR, name), metadata_path) for name in earlier_files] + [data],
+            ignore_index=True
+        )
+        training_files = earlier_files + [data_file]
+
+    # Loaded straight from disk: the hot copy other pages sample from must stay untouched
+    with open(parent_path, 'rb') as f:
+        synthesizer = pickle.load(f)
+
+    lineage = {
+        "parent_model": warm_start['parent_model'],
+        "lineage": parent_manifest.get('lineage', []) + [warm_start['parent_model']],
+        "warm_start_data": warm_start.get('data', 'new'),
+        "training_files": training_files,
+        "parent_data_file": parent_manifest.get('data_file'),
+        "parent_epochs": parent_manifest.get('total_epochs', parent_manifest.get('epochs_trained'))
+    }
+    return synthesizer, data, lineage
+
+def run_job(job, connection):
+    """
+    Train and save the model described by a claimed job, from scratch or by
+    continuing to train an existing model
+    """
+    from backend.engines import DEFAULT_ENGINE
+    from backend.training import (
+        build_metadata, continue_training, train_synthesizer, training_summary, transformer_key
+    )
+    from utils.loaders import load_frame, load_json
+    from utils.model_registry import write_manifest
+
+    data_path = os.path.join(UPLOAD_DIR, job['data_file'])
+    metadata_path = os.path.join(UPLOAD_DIR, job['metadata_file'])
+    parameters = json.loads(job['parameters'])
+    # The engine, performance and warm start settings steer training and are not synthesizer parameters
+    performance = parameters.pop('performance', None)
+    engine = parameters.pop('engine', DEFAULT_ENGINE)
+    warm_start = parameters.pop('warm_start', None)
+
+    data = load_frame(data_path, metadata_path)
+
+    def record_epoch(epoch, generator_loss, discriminator_loss, seconds, samples_per_second):
+        connection.execute(
+            "INSERT OR REPLACE INTO job_epochs "
+            "(job_id, epoch, generator_loss, discriminator_loss, recorded_at, seconds, samples_per_second) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job['id'], epoch, generator_loss, discriminator_loss, _now(), seconds, samples_per_second)
+        )
+
+    lineage = {"training_files": [job['data_file']]}
+    if warm_start:
+        synthesizer, data, lineage = _warm_start(warm_start, data, metadata_path, job['data_file'])
+        metadata = build_metadata(data, load_json(metadata_path))
+        continue_training(
+            synthesizer, data, metadata, parameters['epochs'], on_epoch=record_epoch, performance=performance
+        )
+    else:
+        metadata = build_metadata(data, load_json(metadata_path))
+        # Unless turned off, runs on the same data and metadata share one fitted data transformer
+        cache_key = (
+            transformer_key(data_path, metadata, engine, parameters) if (performance or {}).get('cache_transformer', True) else None
+        )
+        synthesizer = train_synthesizer(
+            data, metadata, parameters, on_epoch=record_epoch, performance=performance, transformer_key=cache_key,
+            engine=engine
+        )
+
+    summary = training_summary(synthesizer)
+    model_path = os.path.join(UPLOAD_DIR, job['model_file'])
+    synthesizer.save(model_path)
+    write_manifest(
+        model_path,
+        data_path=data_path,
+        metadata_path=metadata_path,
+        synthesizer=type(synthesizer).__name__,
+        engine=engine,
+        parameters=synthesizer.get_parameters(),
+        job_id=job['id'],
+        performance=performance,
+        total_epochs=(lineage.get('parent_epochs') or 0) + summary['epochs_trained'],
+        **lineage,
+        **summary
+    )
+
+def run_benchmark(job):
+    """
+    Benchmark the engines a claimed job lists, recording each engine's
+    result in the benchmark history as soon as it finishes
+    """
+    from backend.engines import benchmark_engines, record_benchmark
+    from backend.training import build_metadata
+    from utils.loaders import load_frame, load_json
+    from utils.metadata_compiler import compile_metadata
+
+    metadata_path = os.path.join(UPLOAD_DIR, job['metadata_file'])
+    data = load_frame(os.path.join(UPLOAD_DIR, job['data_file']), metadata_path)
+    saved_metadata = load_json(metadata_path)
+    benchmark = json.loads(job['parameters'])
+
+    benchmark_engines(
+        data,
+        build_metadata(data, saved_metadata),
+        compile_metadata(data, saved_metadata, use_primary_key=True),
+        benchmark['engines'],
+        benchmark['parameters'],
+        num_rows=benchmark.get('num_rows'),
+        on_engine=lambda result, done, total: record_benchmark(
+            job['data_file'], benchmark['parameters'], [result], job_id=job['id']
+        )
+    )
+
+def _record_progress(connection, job_id, progress):
+    connection.execute("UPDATE jobs SET progress = ? WHERE id = ?", (json.dumps(progress), job_id))
+
+def run_multi_table(job, connection):
+    """
+    Fit and save the multi-table model a claimed job describes, recording
+    each group of tables as it finishes
+    """
+    from backend.multi_table import fit_multi_table
+    from utils.loaders import load_json
+    from utils.model_registry import write_manifest
+
+    metadata_path = os.path.join(UPLOAD_DIR, job['metadata_file'])
+    settings = json.loads(job['parameters'])
+
+    start = time.perf_counter()
+    model, results = fit_multi_table(
+        load_json(metadata_path),
+        workers=settings.get('workers'),
+        on_group=lambda result, done, total: _record_progress(
+            connection, job['id'], {"done": done, "total": total}
+        )
+    )
+    seconds = time.perf_counter() - start
+
+    model_path = os.path.join(UPLOAD_DIR, job['model_file'])
+    model.save(model_path)
+    write_manifest(
+        model_path,
+        metadata_path=metadata_path,
+        kind='multi_table',
+        synthesizer='HMASynthesizer',
+        tables=model.tables,
+        groups=results,
+        seconds=seconds,
+        job_id=job['id']
+    )
+
+def run_worker(working_dir=None):
+    """
+    Process queued jobs one after another until the queue is empty
+    """
+    if working_dir:
+        os.chdir(working_dir)
+
+    connection = _connect()
+    try:
+        while True:
+            job = _claim_next_job(connection)
+            if job is None:
+                return
+            try:
+                if job['kind'] == 'benchmark':
+                    run_benchmark(job)
+                elif job['kind'] == 'multi_table':
+                    run_multi_table(job, connection)
+                else:
+                    run_job(job, connection)
+                connection.execute(
+                    "UPDATE jobs SET status = 'completed', finished_at = ? WHERE id = ?",
+                    (_now(), job['id'])
+                )
+            except Exception:
+                connection.execute(
+                    "UPDATE jobs SET status = 'failed', finished_at = ?, error = ? WHERE id = ?",
+                    (_now(), traceback.format_exc(), job['id'])
+                )
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    # Run a worker by hand, e.g. on a dedicated training host: python -m backend.jobs
+    run_worker()
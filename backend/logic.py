@@ -1,11 +1,15 @@
 from sdv.io.local import CSVHandler
 from sdv.metadata import Metadata
-from sdv.constraints import ScalarRange
 from sdv.multi_table import HMASynthesizer
-from datetime import datetime
+import json
 import os
 import pandas as pd
-import streamlit as st
+import sys
+import yaml
+
+# Column typing and relationships for the tables this pipeline loads
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), 'schemas', 'payment_product.yaml')
+
 def load_csv_data(folder_name='data/'):
     """
     Load CSV files from the specified folder
@@ -57,79 +61,72 @@ def create_scalar_range_constraints():
         }
     ]
 
-def setup_metadata(data):
+def load_schema(schema_path=SCHEMA_PATH):
+    """
+    Load a declarative column schema from a YAML or JSON file
+    """
+    with open(schema_path, 'r') as f:
+        if schema_path.endswith('.json'):
+            return json.load(f)
+        return yaml.safe_load(f)
+
+def schema_metadata_dict(data, schema):
+    """
+    Build a multi-table metadata dict from the schema, detecting only the
+    columns it leaves out; fully specified tables are never scanned
+    """
+    from utils.metadata_compiler import detect_columns, schema_fingerprint
+
+    tables = {}
+    for table_name, table_data in data.items():
+        table_schema = (schema.get('tables') or {}).get(table_name) or {}
+        columns = {
+            column_name: dict(column_info)
+            for column_name, column_info in (table_schema.get('columns') or {}).items()
+            if column_name in table_data.columns
+        }
+
+        missing = [column_name for column_name in table_data.columns if str(column_name) not in columns]
+        if missing:
+            _, fingerprints = schema_fingerprint(table_data[missing])
+            columns.update(detect_columns(table_data[missing], fingerprints))
+
+        primary_key = table_schema.get('primary_key')
+        if primary_key is None and not table_schema:
+            # Tables the schema does not mention get SDV's default: the first ID column
+            primary_key = next((name for name, info in columns.items() if info['sdtype'] == 'id'), None)
+
+        tables[table_name] = {
+            'columns': {str(column_name): columns[str(column_name)] for column_name in table_data.columns}
+        }
+        if primary_key is not None:
+            tables[table_name]['primary_key'] = primary_key
+
+    return {
+        'tables': tables,
+        'relationships': [
+            relationship for relationship in schema.get('relationships') or []
+            if relationship['parent_table_name'] in tables and relationship['child_table_name'] in tables
+        ],
+        'METADATA_SPEC_VERSION': 'V1'
+    }
+
+def setup_metadata(data, schema_path=SCHEMA_PATH):
     """
-    Create and configure metadata with tables and relationships
+    Create metadata with tables and relationships from the declarative schema,
+    applied in one bulk load
     """
     try:
-        metadata = Metadata.detect_from_dataframes(data)
-        print('Auto detected data:\n')
-         # Update PAYMENT table column types
-        metadata.update_column(table_name='PAYMENT', column_name='paymentId', sdtype='id')
-        metadata.update_column(table_name='PAYMENT', column_name='invoiceId', sdtype='id')
-        metadata.update_column(table_name='PAYMENT', column_name='userId', sdtype='numerical', computer_representation='Int64')
-        metadata.update_column(table_name='PAYMENT', column_name='product_id', sdtype='id')
-        metadata.update_column(table_name='PAYMENT', column_name='paymentDate', sdtype='datetime', datetime_format='%Y-%m-%d')
-        metadata.update_column(table_name='PAYMENT', column_name='amount', sdtype='numerical', computer_representation='Float')
-        metadata.update_column(table_name='PAYMENT', column_name='status', sdtype='categorical')
-        metadata.update_column(table_name='PAYMENT', column_name='payment_method', sdtype='categorical')
-        metadata.update_column(table_name='PAYMENT', column_name='card_number', sdtype='credit_card_number')
-        metadata.update_column(table_name='PAYMENT', column_name='card_variant', sdtype='categorical')
-        metadata.update_column(table_name='PAYMENT', column_name='bank_account_number', sdtype='categorical')
-        metadata.update_column(table_name='PAYMENT', column_name='paypal_account', sdtype='email')
-        metadata.update_column(table_name='PAYMENT', column_name='firstName', sdtype='first_name')
-        metadata.update_column(table_name='PAYMENT', column_name='lastName', sdtype='last_name')
-        metadata.update_column(table_name='PAYMENT', column_name='created_at', sdtype='datetime', datetime_format='%Y-%m-%d')
-        metadata.update_column(table_name='PAYMENT', column_name='updated_at', sdtype='datetime', datetime_format='%Y-%m-%d')
-        metadata.update_column(table_name='PAYMENT', column_name='refund_reason', sdtype='categorical')
-        
-        # Update PRODUCT table column types
-        metadata.update_column(table_name='PRODUCT', column_name='product_id', sdtype='id')
-        metadata.update_column(table_name='PRODUCT', column_name='name', sdtype='categorical')
-        metadata.update_column(table_name='PRODUCT', column_name='description', sdtype='categorical')
-        metadata.update_column(table_name='PRODUCT', column_name='price', sdtype='numerical', computer_representation='Float')
-        metadata.update_column(table_name='PRODUCT', column_name='category', sdtype='categorical')
-        metadata.update_column(table_name='PRODUCT', column_name='stock_quantity', sdtype='numerical', computer_representation='Int64')
-        metadata.update_column(table_name='PRODUCT', column_name='created_at', sdtype='datetime', datetime_format='%Y-%m-%d')
-        metadata.update_column(table_name='PRODUCT', column_name='updated_at', sdtype='datetime', datetime_format='%Y-%m-%d')
-
-        print("\n---Updated metadata---\n")
-        # metadata.visualize()   
-        save_metadata(metadata) 
-        print(metadata)        
+        metadata = Metadata.load_from_dict(schema_metadata_dict(data, load_schema(schema_path)))
+        metadata.validate()
+        print(f"\n---Metadata from {schema_path}---\n")
+        save_metadata(metadata)
+        print(metadata)
         return metadata
-        
+
     except Exception as e:
         print(f"Error in metadata setup: {str(e)}")
-        print("Falling back to manual metadata configuration...")
-        
-        # Manual metadata configuration
-        metadata = Metadata()
-        
-        # Add tables to metadata
-        metadata.add_table(
-            name='PAYMENT',
-            data=data['PAYMENT'],
-            primary_key='paymentId'
-        )
-
-        metadata.add_table(
-            name='PRODUCT',
-            data=data['PRODUCT'],
-            primary_key='product_id'
-        )
-
-        # Add relationship between tables
-        metadata.add_relationship(
-            parent_table_name='PRODUCT',
-            child_table_name='PAYMENT',
-            parent_primary_key='product_id',
-            child_foreign_key='product_id'
-        )
-        
-        print("Manual metadata configuration completed.")
-        metadata.visualize()
-        return metadata
+        raise
 
 def data_validator(data):
     """
@@ -207,5 +204,8 @@ def main():
     save_metadata(metadata)
 
 if __name__ == "__main__":
+    # Run as ``python backend/logic.py``, sys.path starts at backend/; the
+    # repository root holds the utils package the schema detection needs
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     main()
 
@@ -0,0 +1,253 @@
+import contextlib
+import multiprocessing
+import os
+import pickle
+import resource
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from utils.storage import UPLOAD_DIR, cache_path
+
+# Worker processes used to fit independent groups of related tables
+MULTI_TABLE_WORKERS = int(os.environ.get("SDV_APP_MULTI_TABLE_WORKERS", str(os.cpu_count() or 1)))
+
+def table_files(metadata_content):
+    """
+    Map each table of saved multi-table metadata to its CSV file in the upload directory
+    """
+    files = metadata_content.get('table_files', {})
+    return {
+        table_name: files.get(table_name, f"{table_name.lower()}.csv")
+        for table_name in metadata_content['tables']
+    }
+
+def table_groups(metadata_content):
+    """
+    Split the tables into groups connected by relationships; each group is
+    an independent tree of parents and children that can be fitted on its own
+    """
+    parent = {table_name: table_name for table_name in metadata_content['tables']}
+
+    def find(table_name):
+        while parent[table_name] != table_name:
+            parent[table_name] = parent[parent[table_name]]
+            table_name = parent[table_name]
+        return table_name
+
+    for relationship in metadata_content.get('relationships', []):
+        parent[find(relationship['child_table_name'])] = find(relationship['parent_table_name'])
+
+    groups = {}
+    for table_name in metadata_content['tables']:
+        groups.setdefault(find(table_name), []).append(table_name)
+    return list(groups.values())
+
+def group_metadata(metadata_content, tables):
+    """
+    Multi-table metadata limited to some tables and the relationships between them
+    """
+    return {
+        'tables': {table_name: metadata_content['tables'][table_name] for table_name in tables},
+        'relationships': [
+            relationship for relationship in metadata_content.get('relationships', [])
+            if relationship['parent_table_name'] in tables and relationship['child_table_name'] in tables
+        ],
+        'METADATA_SPEC_VERSION': 'V1'
+    }
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if peak > 1 << 32 else peak / 1024
+
+@contextlib.contextmanager
+def time_tables(synthesizer, timings):
+    """
+    Add the seconds spent on each table to ``timings`` while ``synthesizer``
+    is fitted inside this block: learning a child table's per-parent
+    parameters counts towards the child, modeling a table towards itself
+    """
+    def timed(table_name, method):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                timings[table_name] = timings.get(table_name, 0.0) + time.perf_counter() - start
+        return wrapper
+
+    get_extension = synthesizer._get_extension
+    synthesizer._get_extension = lambda child_name, *args, **kwargs: timed(
+        child_name, get_extension
+    )(child_name, *args, **kwargs)
+    for table_name, table_synthesizer in synthesizer._table_synthesizers.items():
+        table_synthesizer.fit_processed_data = timed(table_name, table_synthesizer.fit_processed_data)
+    try:
+        yield synthesizer
+    finally:
+        # Drop the wrappers so the fitted synthesizer pickles like a plain one
+        synthesizer.__dict__.pop('_get_extension', None)
+        for table_synthesizer in synthesizer._table_synthesizers.values():
+            table_synthesizer.__dict__.pop('fit_processed_data', None)
+
+def _fit_group(task, working_dir):
+    os.chdir(working_dir)
+    from sdv.metadata import Metadata
+    from sdv.multi_table import HMASynthesizer
+
+    start = time.perf_counter()
+    data = {
+        table_name: pd.read_csv(os.path.join(UPLOAD_DIR, filename))
+        for table_name, filename in task['files'].items()
+    }
+    load_seconds = time.perf_counter() - start
+
+    synthesizer = HMASynthesizer(Metadata.load_from_dict(task['metadata']), verbose=False)
+    timings = {}
+    with time_tables(synthesizer, timings):
+        synthesizer.fit(data)
+
+    with open(task['path'], 'wb') as f:
+        pickle.dump(synthesizer, f)
+
+    return {
+        'group': task['group'],
+        'tables': [
+            {
+                'table': table_name,
+                'rows': len(table),
+                'columns': len(table.columns),
+                'data_mb': table.memory_usage(deep=True).sum() / (1024 * 1024),
+                'fit_seconds': timings.get(table_name, 0.0)
+            }
+            for table_name, table in data.items()
+        ],
+        'load_seconds': load_seconds,
+        'seconds': time.perf_counter() - start,
+        'peak_rss_mb': _peak_rss_mb(),
+        'path': task['path']
+    }
+
+class MultiTableModel:
+    """
+    HMA synthesizers for independent groups of related tables, sampled as one dataset
+    """
+
+    def __init__(self, metadata_content, synthesizers):
+        self.metadata_content = metadata_content
+        self.synthesizers = synthesizers
+
+    @property
+    def tables(self):
+        return list(self.metadata_content['tables'])
+
+    def sample(self, scale=1.0):
+        """
+        Sample every group at the same scale; returns a dict of table name to DataFrame
+        """
+        data = {}
+        for synthesizer in self.synthesizers:
+            data.update(synthesizer.sample(scale=scale))
+        return data
+
+    def save(self, filepath):
+        with open(filepath, 'wb') as f:
+            pickle.dump(self, f)
+
+def fit_multi_table(metadata_content, workers=None, on_group=None):
+    """
+    Fit one HMA synthesizer per group of related tables across a process pool.
+    ``on_group(result, done, total)`` is called as each group finishes.
+
+    Groups share no relationships, so they are fitted in parallel, largest
+    first, and wall-clock time approaches that of the slowest group. Every
+    group runs in a fresh worker process that reads only its own tables, so
+    peak memory per process reflects that group alone. Returns the model and
+    the per-group report.
+    """
+    files = table_files(metadata_content)
+    groups = sorted(
+        table_groups(metadata_content),
+        key=lambda tables: sum(os.path.getsize(os.path.join(UPLOAD_DIR, files[t])) for t in tables),
+        reverse=True
+    )
+    workers = max(1, min(workers or MULTI_TABLE_WORKERS, len(groups)))
+
+    run_dir = os.path.dirname(cache_path("multi_table", uuid.uuid4().hex, "group.pkl"))
+    tasks = [
+        {
+            'group': index,
+            'metadata': group_metadata(metadata_content, tables),
+            'files': {table_name: files[table_name] for table_name in tables},
+            'path': os.path.join(run_dir, f"group-{index:03d}.pkl")
+        }
+        for index, tables in enumerate(groups)
+    ]
+
+    results = []
+    try:
+        # One task per process, so memory held by a finished group is returned to the system
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=1
+        ) as pool:
+            futures = [pool.submit(_fit_group, task, os.getcwd()) for task in tasks]
+            for future in as_completed(futures):
+                results.append(future.result())
+                if on_group is not None:
+                    on_group(results[-1], len(results), len(tasks))
+
+        results.sort(key=lambda result: result['group'])
+        synthesizers = []
+        for result in results:
+            with open(result.pop('path'), 'rb') as f:
+                synthesizers.append(pickle.load(f))
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    return MultiTableModel(metadata_content, synthesizers), results
+
+def save_tables(data, model_file):
+    """
+    Write each sampled table to the upload directory as a CSV; returns a
+    dict of table name to path. Tables are written under a hidden name and
+    renamed when complete, so a failure never leaves a partial file listed.
+    """
+    from utils.file_naming import generate_filename
+
+    paths = {}
+    for table_name, table in data.items():
+        filename = f"{generate_filename(f'synthetic_{table_name.lower()}', source_files=[model_file])}.csv"
+        path = os.path.join(UPLOAD_DIR, filename)
+        tmp_path = os.path.join(UPLOAD_DIR, f".{filename}.part")
+        try:
+            table.to_csv(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        paths[table_name] = path
+    return paths
+
+def timing_frame(results):
+    """
+    Per-table rows, fitting time and memory, with each table's group totals
+    """
+    return pd.DataFrame([
+        {
+            'Table': table['table'],
+            'Group': result['group'],
+            'Rows': table['rows'],
+            'Columns': table['columns'],
+            'Data (MB)': round(table['data_mb'], 2),
+            'Fit Time (s)': round(table['fit_seconds'], 2),
+            'Group Time (s)': round(result['seconds'], 2),
+            'Group Peak Memory (MB)': round(result['peak_rss_mb'], 1)
+        }
+        for result in results
+        for table in result['tables']
+    ])
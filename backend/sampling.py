@@ -0,0 +1,311 @@
+import json
+import math
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.storage import cache_path
+
+# Rows per shard when the caller does not choose a shard count
+MAX_SHARD_ROWS = 1000000
+
+# Rows pulled from the synthesizer per batch when streaming to disk
+DEFAULT_BATCH_ROWS = 10000
+
+# Synthesizer loaded once by each sampling worker process
+_worker_model = None
+
+def seed_synthesizer(model, seed):
+    """
+    Seed a synthesizer's sampling so the same seed always yields the same rows
+    """
+    if hasattr(model, '_set_random_state'):
+        model._set_random_state(seed)
+    else:
+        np.random.seed(seed)
+
+class RunningStats:
+    """
+    Per-column count, null count, mean, min and max, updated batch by batch
+    """
+
+    def __init__(self):
+        self.columns = {}
+
+    def update(self, df):
+        for column in df.columns:
+            values = df[column]
+            stats = self.columns.setdefault(
+                column,
+                {"count": 0, "nulls": 0, "sum": 0.0, "min": None, "max": None}
+            )
+            non_null = values.dropna()
+            stats["count"] += len(non_null)
+            stats["nulls"] += len(values) - len(non_null)
+
+            is_numeric = pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+            if is_numeric and len(non_null):
+                stats["sum"] += float(non_null.sum())
+                stats["min"] = _combine(min, stats["min"], float(non_null.min()))
+                stats["max"] = _combine(max, stats["max"], float(non_null.max()))
+
+    def merge(self, other):
+        """
+        Fold another set of statistics, e.g. from a different shard, into this one
+        """
+        for column, theirs in other.columns.items():
+            ours = self.columns.setdefault(
+                column,
+                {"count": 0, "nulls": 0, "sum": 0.0, "min": None, "max": None}
+            )
+            ours["count"] += theirs["count"]
+            ours["nulls"] += theirs["nulls"]
+            ours["sum"] += theirs["sum"]
+            ours["min"] = _combine(min, ours["min"], theirs["min"])
+            ours["max"] = _combine(max, ours["max"], theirs["max"])
+        return self
+
+    def to_frame(self):
+        """
+        Summarize as a table shaped like ``DataFrame.describe()``
+        """
+        rows = {}
+        for column, stats in self.columns.items():
+            has_numbers = stats["min"] is not None
+            rows[column] = {
+                "count": stats["count"],
+                "nulls": stats["nulls"],
+                "mean": stats["sum"] / stats["count"] if has_numbers and stats["count"] else None,
+                "min": stats["min"],
+                "max": stats["max"]
+            }
+        return pd.DataFrame(rows)
+
+def _combine(pick, current, new):
+    if current is None:
+        return new
+    if new is None:
+        return current
+    return pick(current, new)
+
+def iter_sample_batches(model, num_rows, batch_size=DEFAULT_BATCH_ROWS):
+    """
+    Yield synthetic rows ``batch_size`` at a time until ``num_rows`` are produced
+    """
+    batch_size = max(1, batch_size or DEFAULT_BATCH_ROWS)
+    remaining = num_rows
+    while remaining > 0:
+        rows = min(batch_size, remaining)
+        batch = model.sample(num_rows=rows, batch_size=rows)
+        remaining -= rows
+        yield batch
+
+def sample_to_file(model, num_rows, out_path, batch_size=DEFAULT_BATCH_ROWS,
+                   file_format="csv", preview_rows=10, transform=None):
+    """
+    Stream synthetic rows straight to a file, keeping only one batch in memory.
+    ``transform(batch)``, when given, fixes up each batch before it is written.
+    Returns running statistics over every row and a preview of the first rows.
+    """
+    stats = RunningStats()
+    preview = None
+    # Hidden, so file listings never show a half-written output
+    tmp_path = os.path.join(os.path.dirname(out_path), f".{os.path.basename(out_path)}.part")
+    writer = None
+    try:
+        for position, batch in enumerate(iter_sample_batches(model, num_rows, batch_size)):
+            if transform is not None:
+                batch = transform(batch)
+            if preview is None:
+                preview = batch.head(preview_rows)
+            stats.update(batch)
+
+            if file_format == "parquet":
+                if writer is None:
+                    table = pa.Table.from_pandas(batch, preserve_index=False)
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                else:
+                    table = pa.Table.from_pandas(batch, schema=writer.schema, preserve_index=False)
+                writer.write_table(table)
+            else:
+                batch.to_csv(tmp_path, mode='w' if position == 0 else 'a', header=position == 0, index=False)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            writer = None
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        if writer is not None:
+            writer.close()
+
+    os.replace(tmp_path, out_path)
+    return stats, preview
+
+def plan_shards(num_rows, num_shards, seed=0):
+    """
+    Split a request into shards with their own row counts and seeds.
+    The plan depends only on its arguments, not on how many workers run it.
+    Shard seeds are spawned from the request's seed, so runs with nearby
+    seeds do not share shards.
+    """
+    num_shards = max(1, min(num_shards, num_rows))
+    base, remainder = divmod(num_rows, num_shards)
+    seeds = np.random.SeedSequence(seed).spawn(num_shards)
+    return [
+        {
+            "index": index,
+            "num_rows": base + (1 if index < remainder else 0),
+            "seed": int(seeds[index].generate_state(1)[0])
+        }
+        for index in range(num_shards)
+    ]
+
+def _init_worker(model_path, working_dir, threads):
+    global _worker_model
+    os.chdir(working_dir)
+    from utils.model_registry import load_model
+    _worker_model = load_model(model_path)
+
+    # Workers share the cores instead of each starting a thread per core
+    import torch
+    torch.set_num_threads(threads)
+
+def _sample_shard(shard, output_dir, file_format, batch_size, custom_logic=None):
+    start = time.perf_counter()
+    seed_synthesizer(_worker_model, shard["seed"])
+
+    transform = None
+    if custom_logic:
+        from utils.custom_logic import apply_custom_logic
+        # Each shard already runs in its own process, so transforms stay serial here
+        transform = lambda batch: apply_custom_logic(batch, custom_logic, workers=1)
+
+    part_path = os.path.join(output_dir, f"part-{shard['index']:05d}.{file_format}")
+    stats, _ = sample_to_file(
+        _worker_model,
+        shard["num_rows"],
+        part_path,
+        batch_size=batch_size,
+        file_format=file_format,
+        transform=transform
+    )
+    return {
+        **shard,
+        "path": part_path,
+        "stats": stats.columns,
+        "seconds": time.perf_counter() - start
+    }
+
+def sample_sharded(model_path, num_rows, output_name, num_shards=None, workers=None,
+                   seed=0, batch_size=None, file_format="csv", custom_logic=None):
+    """
+    Sample ``num_rows`` across a process pool, one part file per seeded shard.
+    ``custom_logic`` constraints are applied to every batch inside the workers.
+
+    Every worker loads its own copy of the synthesizer and gets an equal share
+    of the cores for torch. Part files and a manifest listing them are written
+    under the cache directory; ``merge_parts`` combines and then removes them.
+    Columns the synthesizer generates outside the model (regex IDs, anonymized
+    values) restart in every shard, so they can repeat across shards.
+    """
+    workers = workers or os.cpu_count() or 1
+    if num_shards is None:
+        num_shards = max(workers, math.ceil(num_rows / MAX_SHARD_ROWS))
+    shards = plan_shards(num_rows, num_shards, seed)
+
+    manifest_path = cache_path("samples", output_name, "manifest.json")
+    output_dir = os.path.dirname(manifest_path)
+
+    start = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+    pool_size = min(workers, len(shards))
+    with ProcessPoolExecutor(
+        max_workers=pool_size,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(model_path, os.getcwd(), max(1, (os.cpu_count() or 1) // pool_size))
+    ) as pool:
+        futures = [
+            pool.submit(_sample_shard, shard, output_dir, file_format, batch_size, custom_logic)
+            for shard in shards
+        ]
+        parts = [future.result() for future in futures]
+
+    manifest = {
+        "model_file": os.path.basename(model_path),
+        "num_rows": num_rows,
+        "seed": seed,
+        "format": file_format,
+        "workers": workers,
+        "seconds": time.perf_counter() - start,
+        "parts": parts
+    }
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=4)
+    return manifest
+
+def merge_parts(manifest, out_path):
+    """
+    Combine a sharded sample's parts into one file, streaming part by part.
+    The merge is written under a hidden name and renamed when complete; only
+    then are the parts deleted, so a run does not keep a second copy of its
+    output. Preview them before merging.
+    """
+    parts = sorted(manifest["parts"], key=lambda part: part["index"])
+    tmp_path = os.path.join(os.path.dirname(out_path), f".{os.path.basename(out_path)}.part")
+    try:
+        if manifest["format"] == "parquet":
+            writer = None
+            try:
+                for part in parts:
+                    table = pq.read_table(part["path"])
+                    if writer is None:
+                        writer = pq.ParquetWriter(tmp_path, table.schema)
+                    writer.write_table(table.cast(writer.schema))
+            finally:
+                if writer is not None:
+                    writer.close()
+        else:
+            with open(tmp_path, 'wb') as out:
+                for position, part in enumerate(parts):
+                    with open(part["path"], 'rb') as f:
+                        header = f.readline()
+                        if position == 0:
+                            out.write(header)
+                        shutil.copyfileobj(f, out)
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    for part in parts:
+        os.remove(part["path"])
+    return out_path
+
+def merge_stats(manifest):
+    """
+    Combine the running statistics recorded by every shard
+    """
+    stats = RunningStats()
+    for part in manifest["parts"]:
+        shard_stats = RunningStats()
+        shard_stats.columns = part["stats"]
+        stats.merge(shard_stats)
+    return stats
+
+def preview_parts(manifest, rows=10):
+    """
+    Read the first rows of a sharded sample without merging it
+    """
+    first_part = min(manifest["parts"], key=lambda part: part["index"])
+    if manifest["format"] == "parquet":
+        return pd.read_parquet(first_part["path"]).head(rows)
+    return pd.read_csv(first_part["path"], nrows=rows)
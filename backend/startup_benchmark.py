@@ -0,0 +1,137 @@
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+from utils.preload import HEAVY_MODULES
+from utils.storage import cache_path
+
+# Seconds a page may spend on its own imports before anything is drawn
+FIRST_PAINT_BUDGET = float(os.environ.get("SDV_APP_FIRST_PAINT_BUDGET", "1.0"))
+
+PAGES_DIR = "pages"
+
+# Runs in a fresh interpreter per page, so every measurement is a cold start
+_MEASURE = """
+import json, sys, time
+page, imports, run = sys.argv[1], sys.argv[2], sys.argv[3] == '1'
+heavy = json.loads(sys.argv[4])
+
+start = time.perf_counter()
+import streamlit
+streamlit_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+exec(compile(imports, page, 'exec'), {'__name__': '__page_imports__'})
+import_seconds = time.perf_counter() - start
+loaded = [name for name in heavy if name in sys.modules]
+
+run_seconds = None
+error = None
+if run:
+    from streamlit.testing.v1 import AppTest
+    start = time.perf_counter()
+    app = AppTest.from_file(page, default_timeout=600)
+    app.run()
+    run_seconds = time.perf_counter() - start
+    error = app.exception[0].message if app.exception else None
+
+print(json.dumps({
+    'streamlit_seconds': streamlit_seconds,
+    'import_seconds': import_seconds,
+    'heavy_modules': loaded,
+    'run_seconds': run_seconds,
+    'error': error
+}))
+"""
+
+def page_imports(page_path):
+    """
+    The module-level import statements of a page, which run before it draws anything
+    """
+    with open(page_path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    nodes = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return ast.unparse(ast.Module(body=nodes, type_ignores=[]))
+
+def measure_page(page_path, run=False):
+    """
+    Time a page's imports in a fresh interpreter; with ``run``, also time
+    a full headless run of the page with default widget values
+    """
+    completed = subprocess.run(
+        [sys.executable, '-c', _MEASURE, page_path, page_imports(page_path), '1' if run else '0',
+         json.dumps(HEAVY_MODULES)],
+        capture_output=True,
+        text=True,
+        # Pages must not find a preload thread doing their work for them
+        env={**os.environ, "SDV_APP_PRELOAD": "0"}
+    )
+    if completed.returncode != 0:
+        return {'page': os.path.basename(page_path), 'error': completed.stderr.strip().splitlines()[-1]}
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {'page': os.path.basename(page_path), **result}
+
+def run_benchmark(pages=None, run=False, budget=FIRST_PAINT_BUDGET):
+    """
+    Measure every page and flag those whose imports exceed the budget
+    """
+    pages = pages or [
+        os.path.join(PAGES_DIR, name) for name in sorted(
+            os.listdir(PAGES_DIR),
+            key=lambda name: int(name.split('_')[0]) if name.split('_')[0].isdigit() else 0
+        )
+    ]
+    results = []
+    for page in pages:
+        if not page.endswith('.py'):
+            continue
+        result = measure_page(page, run=run)
+        result['over_budget'] = 'import_seconds' in result and result['import_seconds'] > budget
+        results.append(result)
+    return results
+
+def record_results(results, budget):
+    """
+    Append a run to the benchmark history so cold-start latency can be tracked over time
+    """
+    path = cache_path("benchmarks", "page_startup.jsonl")
+    with open(path, 'a') as f:
+        f.write(json.dumps({
+            "recorded_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "budget": budget,
+            "pages": results
+        }) + "\n")
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.startup_benchmark",
+        description="Measure the cold-start import time of every Streamlit page."
+    )
+    parser.add_argument("pages", nargs="*", help="page files to measure (default: every page)")
+    parser.add_argument("--run", action="store_true", help="also time a full headless run of each page")
+    parser.add_argument("--budget", type=float, default=FIRST_PAINT_BUDGET,
+                        help=f"seconds allowed for a page's imports (default: {FIRST_PAINT_BUDGET})")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.pages, run=args.run, budget=args.budget)
+    for result in results:
+        if 'import_seconds' not in result:
+            print(f"{result['page']:<36} error: {result['error']}")
+            continue
+        line = f"{result['page']:<36} imports {result['import_seconds']:6.2f}s"
+        if result['run_seconds'] is not None:
+            line += f"  run {result['run_seconds']:6.2f}s"
+        if result['heavy_modules']:
+            line += f"  loads {', '.join(result['heavy_modules'])}"
+        if result['over_budget']:
+            line += "  OVER BUDGET"
+        print(line)
+    print(f"History: {record_results(results, args.budget)}")
+    return 1 if any(result['over_budget'] for result in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,437 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from utils.storage import CACHE_DIR, UPLOAD_DIR, cache_path
+
+# Hyperparameters a sweep may vary; anything else is passed to every trial unchanged
+SWEEP_PARAMETERS = ['epochs', 'batch_size', 'embedding_dim', 'generator_dim', 'discriminator_dim']
+
+SWEEP_DIR = os.path.join(CACHE_DIR, "sweeps")
+
+# Data, metadata and thread settings loaded once by each trial worker process
+_worker_state = None
+
+# Sweeps this server started, kept so finished processes are reaped
+_processes = {}
+
+def plan_trials(space, mode="grid", num_trials=None, seed=0):
+    """
+    Turn a search space of parameter name to candidate values into trial settings.
+    Grid mode tries every combination; random mode draws ``num_trials``
+    distinct combinations, reproducibly for a given seed.
+    """
+    unknown = set(space) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unsupported sweep parameters: {', '.join(sorted(unknown))}")
+
+    names = list(space)
+    grid = [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+    if mode == "grid":
+        return grid
+    if mode != "random":
+        raise ValueError(f"Unknown sweep mode '{mode}'")
+
+    num_trials = min(num_trials or len(grid), len(grid))
+    return random.Random(seed).sample(grid, num_trials)
+
+def split_holdout(data, holdout_fraction=0.2, seed=0):
+    """
+    Split rows into a training frame and a held-out frame used only for scoring
+    """
+    holdout = data.sample(frac=holdout_fraction, random_state=seed)
+    return data.drop(holdout.index), holdout
+
+def _init_worker(sweep_dir, working_dir, threads):
+    global _worker_state
+    os.chdir(working_dir)
+    # Thread caps must be in place before torch starts its pools
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[variable] = str(threads)
+
+    import pandas as pd
+    from backend.training import build_metadata, transformer_key
+    from utils.loaders import load_json
+    from utils.metadata_compiler import compile_metadata
+
+    config = load_json(os.path.join(sweep_dir, "sweep.json"))
+    saved_metadata = load_json(os.path.join(UPLOAD_DIR, config["metadata_file"]))
+    train_path = os.path.join(sweep_dir, "train.parquet")
+    train = pd.read_parquet(train_path)
+    holdout = pd.read_parquet(os.path.join(sweep_dir, "holdout.parquet"))
+    metadata = build_metadata(train, saved_metadata)
+
+    _worker_state = {
+        "config": config,
+        "train": train,
+        "holdout": holdout,
+        "metadata": metadata,
+        "evaluation_metadata": compile_metadata(holdout, saved_metadata, use_primary_key=True),
+        # Every trial trains on the same rows, so they share one fitted data transformer
+        "transformer_key": transformer_key(train_path, metadata),
+        "threads": threads
+    }
+
+def _run_trial(trial, sweep_dir):
+    from sdv.evaluation.single_table import evaluate_quality
+    from backend.training import train_synthesizer, training_summary
+
+    state = _worker_state
+    config = state["config"]
+    parameters = {**config["base_parameters"], **trial["parameters"]}
+    for key in ('generator_dim', 'discriminator_dim'):
+        if key in parameters:
+            parameters[key] = tuple(parameters[key])
+
+    result = {"trial": trial["index"], "parameters": trial["parameters"], "status": "completed"}
+    try:
+        start = time.perf_counter()
+        synthesizer = train_synthesizer(
+            state["train"],
+            state["metadata"],
+            parameters,
+            performance={"intra_op_threads": state["threads"], "early_stopping": config.get("early_stopping")},
+            transformer_key=state["transformer_key"]
+        )
+        result["fit_seconds"] = time.perf_counter() - start
+        result.update(training_summary(synthesizer))
+
+        start = time.perf_counter()
+        synthetic = synthesizer.sample(num_rows=len(state["holdout"]))
+        sample_seconds = time.perf_counter() - start
+        result["sample_rows_per_second"] = len(synthetic) / sample_seconds if sample_seconds > 0 else None
+
+        report = evaluate_quality(
+            real_data=state["holdout"],
+            synthetic_data=synthetic,
+            metadata=state["evaluation_metadata"],
+            verbose=False
+        )
+        result["score"] = float(report.get_score())
+
+        model_file = f"trial-{trial['index']:03d}.pkl"
+        synthesizer.save(os.path.join(sweep_dir, model_file))
+        result["model_file"] = model_file
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e)
+    return result
+
+def _write_json(path, content):
+    tmp_path = f"{path}.part"
+    with open(tmp_path, 'w') as f:
+        json.dump(content, f, indent=4)
+    os.replace(tmp_path, path)
+
+def leaderboard(results):
+    """
+    Completed trials, best quality score first; ties go to the faster fit
+    """
+    completed = [result for result in results if result["status"] == "completed"]
+    return sorted(completed, key=lambda result: (-result["score"], result["fit_seconds"]))
+
+def leaderboard_frame(results):
+    """
+    One row per completed trial, ranked, with its hyperparameters as columns
+    """
+    import pandas as pd
+
+    return pd.DataFrame([
+        {
+            'rank': rank,
+            'trial': result['trial'],
+            'score': result['score'],
+            **{name: str(value) if isinstance(value, list) else value for name, value in result['parameters'].items()},
+            'epochs_trained': result.get('epochs_trained'),
+            'stopped_early': result.get('stopped_early'),
+            'fit_seconds': result['fit_seconds'],
+            'sample_rows_per_second': result['sample_rows_per_second'],
+            'model_file': result['model_file']
+        }
+        for rank, result in enumerate(leaderboard(results), start=1)
+    ])
+
+def write_results(sweep_dir, results):
+    """
+    Save every trial's result and the leaderboard as JSON and CSV
+    """
+    _write_json(os.path.join(sweep_dir, "results.json"), results)
+    _write_json(os.path.join(sweep_dir, "leaderboard.json"), leaderboard(results))
+    leaderboard_frame(results).to_csv(os.path.join(sweep_dir, "leaderboard.csv"), index=False)
+
+def run_sweep(data_file, metadata_file, space, mode="grid", num_trials=None, base_parameters=None,
+              holdout_fraction=0.2, workers=None, threads_per_trial=None, early_stopping=None,
+              seed=0, name=None, on_trial=None):
+    """
+    Train and score one CTGAN model per trial across a process pool.
+    ``on_trial(result, done, total)`` is called as each trial finishes.
+
+    Rows are split once into a training and a holdout set; each trial is
+    scored with ``evaluate_quality`` on the holdout. Trial models, the
+    results and the leaderboard are kept under ``.cache/sweeps/<name>``.
+    """
+    from utils.loaders import load_frame
+
+    trials = [
+        {"index": index, "parameters": parameters}
+        for index, parameters in enumerate(plan_trials(space, mode, num_trials, seed))
+    ]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(trials)))
+    # Split the cores between concurrent trials so they do not oversubscribe the CPU
+    threads_per_trial = threads_per_trial or max(1, (os.cpu_count() or 1) // workers)
+
+    name = name or f"sweep_{os.path.splitext(data_file)[0]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    sweep_dir = os.path.dirname(cache_path("sweeps", name, "sweep.json"))
+
+    data = load_frame(os.path.join(UPLOAD_DIR, data_file), os.path.join(UPLOAD_DIR, metadata_file))
+    train, holdout = split_holdout(data, holdout_fraction, seed)
+    train.to_parquet(os.path.join(sweep_dir, "train.parquet"), index=False)
+    holdout.to_parquet(os.path.join(sweep_dir, "holdout.parquet"), index=False)
+
+    config = {
+        "name": name,
+        "data_file": data_file,
+        "metadata_file": metadata_file,
+        "space": space,
+        "mode": mode,
+        "base_parameters": base_parameters or {},
+        "holdout_fraction": holdout_fraction,
+        "holdout_rows": len(holdout),
+        "train_rows": len(train),
+        "workers": workers,
+        "threads_per_trial": threads_per_trial,
+        "early_stopping": early_stopping,
+        "seed": seed,
+        "trials": len(trials),
+        "status": "running",
+        "pid": os.getpid(),
+        "host": socket.gethostname(),
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    _write_json(os.path.join(sweep_dir, "sweep.json"), config)
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(sweep_dir, os.getcwd(), threads_per_trial)
+    ) as pool:
+        futures = [pool.submit(_run_trial, trial, sweep_dir) for trial in trials]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            results.sort(key=lambda result: result["trial"])
+            # Written as trials finish, so a long sweep can be inspected while it runs
+            write_results(sweep_dir, results)
+            if on_trial is not None:
+                on_trial(result, len(results), len(trials))
+
+    config["status"] = "finished"
+    config["seconds"] = time.perf_counter() - start
+    _write_json(os.path.join(sweep_dir, "sweep.json"), config)
+    return config, results
+
+def _space_arguments(space):
+    arguments = []
+    for name, values in space.items():
+        if name in ('generator_dim', 'discriminator_dim'):
+            text = ';'.join(','.join(str(size) for size in layers) for layers in values)
+        else:
+            text = ','.join(str(value) for value in values)
+        arguments += [f"--{name.replace('_', '-')}", text]
+    return arguments
+
+def start_sweep(data_file, metadata_file, space, mode="grid", num_trials=None, holdout_fraction=0.2,
+                workers=None, patience=None, seed=0, name=None):
+    """
+    Run a sweep as a detached ``python -m backend.sweep`` process and return
+    its name. It outlives the Streamlit session that started it; progress is
+    read back from the sweep's results as trials finish, and its output goes
+    to ``sweep.log`` in the sweep directory.
+    """
+    plan_trials(space, mode, num_trials, seed)
+    name = name or f"sweep_{os.path.splitext(data_file)[0]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    command = [
+        sys.executable, "-m", "backend.sweep", data_file, metadata_file, *_space_arguments(space),
+        "--holdout", str(holdout_fraction), "--seed", str(seed), "--name", name
+    ]
+    if mode == "random":
+        command += ["--random", str(num_trials or len(plan_trials(space)))]
+    if workers:
+        command += ["--workers", str(workers)]
+    if patience:
+        command += ["--patience", str(patience)]
+
+    with open(cache_path("sweeps", name, "sweep.log"), 'a') as log:
+        _processes[name] = subprocess.Popen(
+            command, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+            cwd=os.getcwd(), start_new_session=True
+        )
+    return name
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def sweep_status(config):
+    """
+    "running", "finished", "failed", or "stopped" for a sweep whose process
+    on this host exited without finishing; sweeps on other hosts are trusted
+    """
+    status = config.get("status", "finished")
+    if status != "running" or config.get("host") != socket.gethostname():
+        return status
+    process = _processes.get(config["name"])
+    if process is not None:
+        process.poll()
+    return status if _pid_alive(config["pid"]) else "stopped"
+
+def sweep_log(name, lines=20):
+    """
+    The last lines a sweep process printed
+    """
+    path = os.path.join(SWEEP_DIR, name, "sweep.log")
+    if not os.path.exists(path):
+        return ""
+    with open(path, 'r') as f:
+        return ''.join(f.readlines()[-lines:])
+
+def list_sweeps():
+    """
+    Finished and running sweeps, newest first
+    """
+    if not os.path.isdir(SWEEP_DIR):
+        return []
+    sweeps = []
+    for name in os.listdir(SWEEP_DIR):
+        config_path = os.path.join(SWEEP_DIR, name, "sweep.json")
+        if os.path.exists(config_path):
+            with open(config_path, 'r') as f:
+                sweeps.append(json.load(f))
+    return sorted(sweeps, key=lambda config: config["created_at"], reverse=True)
+
+def load_results(name):
+    path = os.path.join(SWEEP_DIR, name, "results.json")
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def promote_trial(name, result, model_filename):
+    """
+    Copy a trial's model into the uploads as a regular model with a manifest
+    """
+    from utils.loaders import load_json
+    from utils.model_registry import write_manifest
+
+    config = load_json(os.path.join(SWEEP_DIR, name, "sweep.json"))
+    model_path = os.path.join(UPLOAD_DIR, model_filename)
+    shutil.copyfile(os.path.join(SWEEP_DIR, name, result["model_file"]), model_path)
+    write_manifest(
+        model_path,
+        data_path=os.path.join(UPLOAD_DIR, config["data_file"]),
+        metadata_path=os.path.join(UPLOAD_DIR, config["metadata_file"]),
+        synthesizer="CTGANSynthesizer",
+        parameters={**config["base_parameters"], **result["parameters"]},
+        sweep=name,
+        trial=result["trial"],
+        quality_score=result["score"],
+        epochs_trained=result.get("epochs_trained")
+    )
+    return model_path
+
+def _values(text):
+    return [int(value) for value in text.split(',')]
+
+def _layers(text):
+    # "128,128;256,256" is two candidate networks of two layers each
+    return [_values(value) for value in text.split(';')]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.sweep",
+        description="Train and score CTGAN models over a grid or random sample of hyperparameters.",
+        epilog='example: python -m backend.sweep payment.csv metadata_payment.json '
+               '--epochs 100,300 --batch-size 500,1000 --generator-dim "128,128;256,256" --workers 4'
+    )
+    parser.add_argument("data", help="CSV file in the upload directory")
+    parser.add_argument("metadata", help="metadata JSON file in the upload directory")
+    parser.add_argument("--epochs", type=_values, help="comma-separated epoch counts")
+    parser.add_argument("--batch-size", type=_values, help="comma-separated batch sizes")
+    parser.add_argument("--embedding-dim", type=_values, help="comma-separated embedding sizes")
+    parser.add_argument("--generator-dim", type=_layers,
+                        help="semicolon-separated layer sizes, e.g. \"128,128;256,256\"")
+    parser.add_argument("--discriminator-dim", type=_layers,
+                        help="semicolon-separated layer sizes")
+    parser.add_argument("--random", type=int, metavar="N", help="try N random combinations instead of the full grid")
+    parser.add_argument("--holdout", type=float, default=0.2, help="fraction of rows held out for scoring (default: 0.2)")
+    parser.add_argument("--workers", type=int, help="trials trained in parallel (default: one per core)")
+    parser.add_argument("--threads", type=int, help="torch threads per trial (default: cores / workers)")
+    parser.add_argument("--patience", type=int, help="stop a trial early after this many epochs on a loss plateau")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--name", help="sweep name (default: derived from the data file and time)")
+    args = parser.parse_args(argv)
+
+    space = {
+        name: getattr(args, name) for name in SWEEP_PARAMETERS if getattr(args, name) is not None
+    }
+    if not space:
+        parser.error("give candidate values for at least one hyperparameter")
+
+    def report(result, done, total):
+        if result["status"] == "completed":
+            print(f"[{done}/{total}] trial {result['trial']} {result['parameters']}: "
+                  f"quality {result['score']:.3f} in {result['fit_seconds']:.1f}s", flush=True)
+        else:
+            print(f"[{done}/{total}] trial {result['trial']} failed: {result['error']}", flush=True)
+
+    try:
+        config, results = run_sweep(
+            args.data,
+            args.metadata,
+            space,
+            mode="random" if args.random else "grid",
+            num_trials=args.random,
+            holdout_fraction=args.holdout,
+            workers=args.workers,
+            threads_per_trial=args.threads,
+            early_stopping={"patience": args.patience} if args.patience else None,
+            seed=args.seed,
+            name=args.name,
+            on_trial=report
+        )
+    except BaseException as e:
+        # Leave the failure where the leaderboard looks for the sweep's status
+        config_path = os.path.join(SWEEP_DIR, args.name or "", "sweep.json")
+        if args.name and os.path.exists(config_path):
+            with open(config_path, 'r') as f:
+                config = json.load(f)
+            config.update(status="failed", error=str(e) or type(e).__name__)
+            _write_json(config_path, config)
+        raise
+
+    ranked = leaderboard(results)
+    print(f"{len(ranked)}/{len(results)} trials completed in {config['seconds']:.1f}s; "
+          f"leaderboard: {os.path.join(SWEEP_DIR, config['name'], 'leaderboard.csv')}")
+    if ranked:
+        print(f"Best: trial {ranked[0]['trial']} {ranked[0]['parameters']} quality {ranked[0]['score']:.3f}")
+    return 0 if ranked else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
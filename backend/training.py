@@ -0,0 +1,445 @@
+import contextlib
+import hashlib
+import json
+import math
+import os
+import pickle
+import time
+import ctgan
+import ctgan.synthesizers.ctgan as ctgan_module
+import numpy as np
+import sdv.single_table.ctgan as sdv_ctgan
+import torch
+from ctgan import CTGAN
+from ctgan.data_transformer import DataTransformer
+from backend.engines import DEFAULT_ENGINE, ENGINES, engine_class, engine_parameters
+from utils.loaders import content_hash
+from utils.metadata_compiler import compile_metadata
+from utils.storage import cache_path
+
+# Adaptive batch sizes aim for this many optimizer steps per epoch
+TARGET_STEPS_PER_EPOCH = 50
+
+# Adaptive batch sizes never drop below CTGAN's default or grow past this
+MIN_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 10000
+
+# Share of available RAM a training batch may use
+BATCH_MEMORY_FRACTION = 0.25
+
+# Modes the data transformer keeps per continuous column, plus its scalar
+CONTINUOUS_WIDTH = 11
+
+# Torch's intra-op threads when this process started, restored for jobs
+# that do not set their own so one job's setting does not leak into the next
+DEFAULT_INTRA_OP_THREADS = torch.get_num_threads()
+
+class StopTraining(Exception):
+    """
+    Raised from the epoch callback to end CTGAN's training loop early
+    """
+
+class PlateauStopper:
+    """
+    Signal a stop once the smoothed generator and discriminator losses have
+    both moved less than ``min_delta`` over the last ``patience`` epochs
+    """
+
+    def __init__(self, patience=20, min_delta=0.05, min_epochs=50, window=10):
+        self.patience = patience
+        self.min_delta = min_delta
+        self.min_epochs = min_epochs
+        self.window = window
+        self.losses = []
+        self.stopped_epoch = None
+
+    def _smoothed(self, column):
+        values = np.array([loss[column] for loss in self.losses[-(self.window + self.patience):]])
+        return np.convolve(values, np.ones(self.window) / self.window, mode='valid')
+
+    def update(self, epoch, generator_loss, discriminator_loss):
+        """
+        Record an epoch's losses; return True when training should stop
+        """
+        self.losses.append((generator_loss, discriminator_loss))
+        if len(self.losses) < max(self.min_epochs, self.window + self.patience):
+            return False
+        plateaued = all(np.ptp(self._smoothed(column)) < self.min_delta for column in (0, 1))
+        if plateaued:
+            self.stopped_epoch = epoch
+        return plateaued
+
+def configure_threads(intra_op_threads=None, inter_op_threads=None):
+    """
+    Set torch's intra-op and inter-op thread pools for this process.
+    Without an intra-op setting the process's starting value is restored.
+    Torch only accepts an inter-op setting before its pool first runs, so a
+    later request is ignored; the threads in use are returned.
+    """
+    torch.set_num_threads(int(intra_op_threads) if intra_op_threads else DEFAULT_INTRA_OP_THREADS)
+    if inter_op_threads:
+        try:
+            torch.set_num_interop_threads(int(inter_op_threads))
+        except RuntimeError:
+            pass
+    return torch.get_num_threads(), torch.get_num_interop_threads()
+
+def available_memory_mb():
+    """
+    Memory available to new allocations, or None where it cannot be read
+    """
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def encoded_width(data, metadata):
+    """
+    Estimate how many columns CTGAN's data transformer turns the modeled columns into
+    """
+    width = 0
+    for column_name, column_info in metadata.columns.items():
+        sdtype = column_info['sdtype']
+        if sdtype in ('numerical', 'datetime'):
+            width += CONTINUOUS_WIDTH
+        elif sdtype in ('categorical', 'boolean') and column_name in data.columns:
+            width += int(data[column_name].nunique(dropna=False))
+    return max(width, 1)
+
+def adaptive_batch_size(num_rows, width, parameters=None, available_mb=None, pac=10):
+    """
+    Pick a batch size from the row count and available RAM. Larger batches
+    keep every CPU core busy on big tables; the result is even and a multiple
+    of ``pac``, as CTGAN requires.
+    """
+    parameters = parameters or {}
+    batch_size = min(max(num_rows // TARGET_STEPS_PER_EPOCH, MIN_BATCH_SIZE), MAX_BATCH_SIZE)
+
+    available_mb = available_memory_mb() if available_mb is None else available_mb
+    if available_mb:
+        # Forward activations, their gradients and the conditional vectors, as float32
+        floats_per_row = (
+            3 * width
+            + parameters.get('embedding_dim', 128)
+            + 2 * sum(parameters.get('generator_dim', (256, 256)))
+            + 2 * sum(parameters.get('discriminator_dim', (256, 256)))
+        )
+        affordable = int(available_mb * BATCH_MEMORY_FRACTION * 1024 * 1024 / (floats_per_row * 4 * 2))
+        batch_size = min(batch_size, affordable)
+
+    step = 2 * pac // math.gcd(2, pac)
+    return max(step, batch_size // step * step)
+
+def build_metadata(data, saved_metadata):
+    """
+    Build training metadata from the saved column settings, detecting only the
+    columns they leave out, and without a primary key
+    """
+    return compile_metadata(data, saved_metadata)
+
+class _ObservedCTGAN(CTGAN):
+    """
+    CTGAN that reports every finished epoch; CTGAN reassigns ``loss_values``
+    once before its training loop and once after each epoch
+    """
+    _epoch_callback = None
+    _stopper = None
+
+    def fit(self, train_data, discrete_columns=(), epochs=None):
+        self.__dict__['_observed_rows'] = len(train_data)
+        try:
+            super().fit(train_data, discrete_columns, epochs)
+        except StopTraining:
+            # The epoch that raised is complete, so the model is left in a usable state
+            pass
+
+    @property
+    def loss_values(self):
+        return self.__dict__.get('_observed_loss_values')
+
+    @loss_values.setter
+    def loss_values(self, value):
+        self.__dict__['_observed_loss_values'] = value
+        now = time.perf_counter()
+        if value is None or value.empty:
+            self.__dict__['_epoch_started'] = now
+            return
+
+        seconds = now - self.__dict__.get('_epoch_started', now)
+        self.__dict__['_epoch_started'] = now
+        rows = self.__dict__.get('_observed_rows', 0)
+        samples = max(rows // self._batch_size, 1) * self._batch_size
+
+        last = value.iloc[-1]
+        epoch = int(last['Epoch'])
+        generator_loss = float(last['Generator Loss'])
+        discriminator_loss = float(last['Discriminator Loss'])
+        if self._epoch_callback is not None:
+            self._epoch_callback(
+                epoch,
+                generator_loss,
+                discriminator_loss,
+                seconds,
+                samples / seconds if seconds > 0 else None
+            )
+        if self._stopper is not None and self._stopper.update(epoch, generator_loss, discriminator_loss):
+            raise StopTraining()
+
+def _restore_model(model):
+    """Turn an observed CTGAN back into a plain one so pickles stay portable"""
+    if isinstance(model, _ObservedCTGAN):
+        loss_values = model.__dict__.pop('_observed_loss_values', None)
+        for key in ('_observed_rows', '_epoch_started'):
+            model.__dict__.pop(key, None)
+        model.__class__ = CTGAN
+        model.loss_values = loss_values
+
+@contextlib.contextmanager
+def observe_epochs(synthesizer, callback=None, stopper=None):
+    """
+    Call ``callback(epoch, generator_loss, discriminator_loss, seconds, samples_per_second)``
+    after each epoch while ``synthesizer`` is fitted inside this block, and
+    end training once ``stopper.update`` reports a plateau
+    """
+    original = sdv_ctgan.CTGAN
+    sdv_ctgan.CTGAN = type(
+        'ObservedCTGAN',
+        (_ObservedCTGAN,),
+        {'_epoch_callback': staticmethod(callback) if callback else None, '_stopper': stopper}
+    )
+    try:
+        yield synthesizer
+    finally:
+        sdv_ctgan.CTGAN = original
+        _restore_model(getattr(synthesizer, '_model', None))
+
+# Synthesizer parameters that change the columns CTGAN is handed
+TRANSFORMER_INPUT_PARAMETERS = ('default_distribution', 'numerical_distributions')
+
+def transformer_key(data_path, metadata, engine=DEFAULT_ENGINE, parameters=None):
+    """
+    Identify a fitted data transformer by the training file's contents, the
+    compiled metadata, the engine, the parameters that shape its input and
+    the CTGAN version that fitted it
+    """
+    digest = hashlib.sha1()
+    digest.update(content_hash(data_path).encode())
+    digest.update(json.dumps(metadata.to_dict(), sort_keys=True).encode())
+    digest.update(ctgan.__version__.encode())
+    # CopulaGAN hands CTGAN normalized columns, so its transformer differs
+    if engine != DEFAULT_ENGINE:
+        digest.update(engine.encode())
+        # ...normalized by the distributions these parameters choose
+        accepted = engine_parameters(engine, parameters or {})
+        shaping = {name: accepted[name] for name in TRANSFORMER_INPUT_PARAMETERS if name in accepted}
+        if shaping:
+            digest.update(json.dumps(shaping, sort_keys=True).encode())
+    return digest.hexdigest()
+
+def transformer_cache_path(key):
+    return cache_path("transformers", f"{key}.pkl")
+
+class _CachedDataTransformer(DataTransformer):
+    """
+    DataTransformer that loads its fitted state from disk when it was fitted
+    before, and stores it after fitting otherwise
+    """
+    _cache_file = None
+
+    def fit(self, raw_data, discrete_columns=()):
+        if os.path.exists(self._cache_file):
+            with open(self._cache_file, 'rb') as f:
+                state = pickle.load(f)
+            fitted_columns = [info.column_name for info in state.get('_column_transform_info_list', [])]
+            # Guard against a stale entry; a mismatch simply refits
+            if fitted_columns == list(raw_data.columns):
+                self.__dict__.update(state)
+                return
+
+        super().fit(raw_data, discrete_columns)
+        # Per-process temporary name: parallel runs on the same data may fit it at once
+        tmp_path = f"{self._cache_file}.{os.getpid()}.part"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self.__dict__, f)
+        os.replace(tmp_path, self._cache_file)
+
+@contextlib.contextmanager
+def cache_transformer(synthesizer, key):
+    """
+    Reuse the data transformer fitted for ``key`` while ``synthesizer`` is
+    fitted inside this block, so only the GAN itself is trained again
+    """
+    original = ctgan_module.DataTransformer
+    ctgan_module.DataTransformer = type(
+        'CachedDataTransformer',
+        (_CachedDataTransformer,),
+        {'_cache_file': transformer_cache_path(key)}
+    )
+    try:
+        yield synthesizer
+    finally:
+        ctgan_module.DataTransformer = original
+        # Plain class again, so the pickled model does not depend on this module
+        transformer = getattr(getattr(synthesizer, '_model', None), '_transformer', None)
+        if isinstance(transformer, _CachedDataTransformer):
+            transformer.__class__ = DataTransformer
+
+def train_synthesizer(data, metadata, parameters, on_epoch=None, performance=None, transformer_key=None,
+                      engine=DEFAULT_ENGINE):
+    """
+    Create and fit a synthesizer of the given engine, CTGAN by default,
+    optionally reporting per-epoch losses.
+
+    ``performance`` may set ``intra_op_threads`` and ``inter_op_threads``,
+    ``adaptive_batch_size`` to size batches from the data and RAM, and
+    ``early_stopping`` as keyword arguments for ``PlateauStopper``.
+    With a ``transformer_key``, the fitted data transformer is cached on disk
+    and reused by later runs on the same data and metadata. Epoch reports,
+    early stopping and the transformer cache apply to CTGAN-based engines only.
+    """
+    performance = performance or {}
+    configure_threads(performance.get('intra_op_threads'), performance.get('inter_op_threads'))
+
+    parameters = engine_parameters(engine, parameters)
+    if performance.get('adaptive_batch_size') and 'batch_size' in parameters:
+        parameters['batch_size'] = adaptive_batch_size(
+            len(data),
+            encoded_width(data, metadata),
+            parameters,
+            pac=parameters.get('pac', 10)
+        )
+
+    early_stopping = performance.get('early_stopping')
+    stopper = PlateauStopper(**early_stopping) if early_stopping else None
+
+    synthesizer = engine_class(engine)(metadata, **parameters)
+    gan = ENGINES[engine]['gan']
+    with contextlib.ExitStack() as stack:
+        if transformer_key is not None and gan:
+            stack.enter_context(cache_transformer(synthesizer, transformer_key))
+        if gan and (on_epoch is not None or stopper is not None):
+            stack.enter_context(observe_epochs(synthesizer, on_epoch, stopper))
+        synthesizer.fit(data)
+    return synthesizer
+
+@contextlib.contextmanager
+def reuse_fitted_model(synthesizer):
+    """
+    While ``synthesizer`` is fitted inside this block, its new CTGAN starts
+    from the current one: the fitted data transformer and the generator's
+    weights carry over instead of being built from scratch. CTGAN does not
+    keep its discriminator, so that alone starts fresh. CopulaGAN's Gaussian
+    normalizer is kept too, so rows reach CTGAN in the space it learned.
+    """
+    normalizer = getattr(synthesizer, '_gaussian_normalizer_hyper_transformer', None)
+    if normalizer is not None:
+        # CopulaGAN's own _fit would refit the normalizer on the new rows
+        synthesizer._fit = lambda processed_data: sdv_ctgan.CTGANSynthesizer._fit(
+            synthesizer, normalizer.transform(processed_data)
+        )
+    model = synthesizer._model
+    fitted_state = model._transformer.__dict__
+    generator = model._generator
+    original_transformer = ctgan_module.DataTransformer
+    original_generator = ctgan_module.Generator
+    ctgan_module.DataTransformer = type(
+        'FittedDataTransformer',
+        (DataTransformer,),
+        {'fit': lambda self, raw_data, discrete_columns=(): self.__dict__.update(fitted_state)}
+    )
+    ctgan_module.Generator = lambda *args, **kwargs: generator
+    try:
+        yield synthesizer
+    finally:
+        ctgan_module.DataTransformer = original_transformer
+        ctgan_module.Generator = original_generator
+        synthesizer.__dict__.pop('_fit', None)
+        transformer = getattr(getattr(synthesizer, '_model', None), '_transformer', None)
+        if transformer is not None:
+            transformer.__class__ = DataTransformer
+
+def warm_start_problems(synthesizer, data, metadata):
+    """
+    Reasons a saved synthesizer cannot continue training on ``data``
+    described by ``metadata``; an empty list means it can
+    """
+    engine = next((name for name, engine in ENGINES.items() if engine['class'] == type(synthesizer).__name__), None)
+    if engine is None or not ENGINES[engine]['gan']:
+        return [f"{type(synthesizer).__name__} models cannot continue training; only CTGAN-based engines can"]
+    if getattr(synthesizer, '_model', None) is None:
+        return ["The model has not been trained"]
+
+    problems = []
+    fitted_columns = synthesizer.metadata.columns
+    new_columns = metadata.columns
+    for column in sorted(set(fitted_columns) ^ set(new_columns)):
+        problems.append(f"Column '{column}' is only in the {'model' if column in fitted_columns else 'new'} metadata")
+    for column in sorted(set(fitted_columns) & set(new_columns)):
+        if fitted_columns[column]['sdtype'] != new_columns[column]['sdtype']:
+            problems.append(
+                f"Column '{column}' was {fitted_columns[column]['sdtype']} and is now {new_columns[column]['sdtype']}"
+            )
+    if problems:
+        return problems
+
+    # The transformer's one-hot widths are fixed, so categories it never saw cannot be learned
+    processed = synthesizer._data_processor.transform(data)
+    for info in synthesizer._model._transformer._column_transform_info_list:
+        if info.column_type != 'discrete' or info.column_name not in processed.columns:
+            continue
+        dummies = getattr(info.transform, 'dummies', None)
+        known = set(dummies) if dummies is not None else set()
+        unseen = {value for value in processed[info.column_name].dropna().unique() if value not in known}
+        if unseen:
+            shown = ', '.join(map(str, sorted(unseen, key=str)[:5]))
+            problems.append(f"Column '{info.column_name}' has categories the model never saw: {shown}")
+    return problems
+
+def continue_training(synthesizer, data, metadata, epochs, on_epoch=None, performance=None):
+    """
+    Keep training a fitted CTGAN-based synthesizer on ``data`` for ``epochs``
+    more epochs. Rows go through the synthesizer's existing data processor,
+    CopulaGAN normalizer and transformer, so only the networks are updated.
+
+    Raises ValueError when the data or metadata are not compatible with the model.
+    """
+    problems = warm_start_problems(synthesizer, data, metadata)
+    if problems:
+        raise ValueError("Model cannot continue training: " + "; ".join(problems))
+
+    performance = performance or {}
+    configure_threads(performance.get('intra_op_threads'), performance.get('inter_op_threads'))
+    early_stopping = performance.get('early_stopping')
+    stopper = PlateauStopper(**early_stopping) if early_stopping else None
+
+    synthesizer.validate(data)
+    processed = synthesizer._data_processor.transform(data)
+    synthesizer._model_kwargs['epochs'] = epochs
+    synthesizer.epochs = epochs
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(reuse_fitted_model(synthesizer))
+        if on_epoch is not None or stopper is not None:
+            stack.enter_context(observe_epochs(synthesizer, on_epoch, stopper))
+        synthesizer.fit_processed_data(processed)
+    return synthesizer
+
+def training_summary(synthesizer):
+    """
+    Epochs actually trained, against those requested, for the model manifest
+    """
+    loss_values = getattr(getattr(synthesizer, '_model', None), 'loss_values', None)
+    # TVAE records a row per batch, CTGAN one per epoch
+    epochs_trained = 0 if loss_values is None else int(loss_values['Epoch'].nunique())
+    epochs = synthesizer.get_parameters().get('epochs')
+    return {
+        "epochs_trained": epochs_trained,
+        "stopped_early": epochs is not None and epochs_trained < epochs,
+        "batch_size": synthesizer.get_parameters().get('batch_size')
+    }
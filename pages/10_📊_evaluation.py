@@ -1,16 +1,10 @@
 import streamlit as st
 import pandas as pd
 import os
-import json
 import re
-from sdv.evaluation.single_table import evaluate_quality
-from sdv.evaluation.single_table import get_column_plot
-from sdv.evaluation.single_table import get_column_pair_plot
-from sdv.evaluation.single_table import run_diagnostic
-from sdv.metadata import SingleTableMetadata
-import plotly.graph_objects as go
 from datetime import datetime
-import sdmetrics
+from utils.loaders import load_frame, load_json
+from utils.metadata_compiler import compile_metadata
 
 
 UPLOAD_DIR = "uploads"
@@ -59,39 +53,25 @@ if os.path.exists(UPLOAD_DIR):
         
         if original_data and synthetic_data and metadata_file:
             try:
-                # Load data and metadata
-                original_df = pd.read_csv(os.path.join(UPLOAD_DIR, original_data))
-                synthetic_df = pd.read_csv(os.path.join(UPLOAD_DIR, synthetic_data))
-                
-                # Load metadata
+                # Load data typed by the selected metadata
                 metadata_path = os.path.join(UPLOAD_DIR, metadata_file)
-                with open(metadata_path, 'r') as f:
-                    metadata_dict = json.load(f)
-                
-                # Create metadata instance
-                metadata = SingleTableMetadata()
-                metadata.detect_from_dataframe(original_df)
+                original_df = load_frame(os.path.join(UPLOAD_DIR, original_data), metadata_path)
+                synthetic_df = load_frame(os.path.join(UPLOAD_DIR, synthetic_data), metadata_path)
                 
-                # Update metadata with saved properties
-                table_name = list(metadata_dict['tables'].keys())[0]
-                table_metadata = metadata_dict['tables'][table_name]
+                # Load metadata
+                metadata_dict = load_json(metadata_path)
                 
-                # Update column properties
-                for column_name, column_props in table_metadata['columns'].items():
-                    if column_name in metadata.columns:
-                        if column_props['sdtype'] == 'id':
-                            metadata.set_primary_key(column_name)
-                        else:
-                            update_args = {'sdtype': column_props['sdtype']}
-                            if 'computer_representation' in column_props:
-                                update_args['computer_representation'] = column_props['computer_representation']
-                            metadata.update_column(column_name, **update_args)
+                # Compile metadata, reusing column detection from earlier versions of the data
+                metadata = compile_metadata(original_df, metadata_dict, use_primary_key=True)
                 
                 # Diagnostic Evaluation
                 if st.button("Run Diagnostic"):
                     progress_placeholder = st.empty()
                     with st.spinner("Running diagnostic checks..."):
                         try:
+                            # SDV's evaluation stack is imported on first use
+                            from sdv.evaluation.single_table import run_diagnostic
+                            
                             # Redirect stdout to capture progress
                             import io
                             import sys
@@ -156,6 +136,8 @@ if os.path.exists(UPLOAD_DIR):
                 # Quality Evaluation
                 if st.button("Evaluate Data Quality"):
                     with st.spinner("Calculating quality metrics..."):
+                        from sdv.evaluation.single_table import evaluate_quality, get_column_plot
+                        
                         # Compute quality report
                         quality_report = evaluate_quality(
                             real_data=original_df,
@@ -0,0 +1,216 @@
+import streamlit as st
+import pandas as pd
+import os
+import json
+from backend.jobs import ensure_workers, list_jobs, submit_multi_table
+from backend.multi_table import MULTI_TABLE_WORKERS, save_tables, table_files, table_groups, timing_frame
+from utils.export import COMPRESSION_EXTENSIONS, download_name, export_artifact
+from utils.file_naming import generate_filename
+from utils.loaders import load_json
+from utils.model_registry import list_models, load_model, read_manifest
+
+UPLOAD_DIR = "uploads"
+
+st.title("Multi-table Synthesis")
+
+st.markdown("""
+### HMA Synthesizer for Related Tables
+
+1. Select multi-table metadata saved in the Metadata Manager
+2. Fit one HMA synthesizer per group of related tables, in parallel in the background
+3. Sample every table at once from a trained model
+""")
+
+def multi_table_metadata_files():
+    """Saved metadata files that describe more than one table"""
+    files = []
+    for filename in sorted(os.listdir(UPLOAD_DIR)):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            content = load_json(os.path.join(UPLOAD_DIR, filename))
+        except Exception:
+            continue
+        if isinstance(content, dict) and len(content.get('tables', {})) > 1:
+            files.append(filename)
+    return files
+
+if os.path.exists(UPLOAD_DIR):
+    metadata_files = multi_table_metadata_files()
+
+    if not metadata_files:
+        st.warning("No multi-table metadata found. Create it in the Metadata Manager's Multi Table tab.")
+    else:
+        selected_metadata = st.selectbox("Select Metadata File:", metadata_files)
+
+        if selected_metadata:
+            try:
+                metadata_path = os.path.join(UPLOAD_DIR, selected_metadata)
+                metadata_content = load_json(metadata_path)
+                files = table_files(metadata_content)
+                groups = table_groups(metadata_content)
+
+                missing = [f for f in files.values() if not os.path.exists(os.path.join(UPLOAD_DIR, f))]
+                if missing:
+                    st.error(f"Missing data files: {', '.join(missing)}")
+                    st.stop()
+
+                st.markdown("### Table Groups")
+                st.dataframe(
+                    pd.DataFrame([
+                        {
+                            'Group': index,
+                            'Tables': ', '.join(tables),
+                            'Files': ', '.join(files[t] for t in tables),
+                            'Size (KB)': round(sum(
+                                os.path.getsize(os.path.join(UPLOAD_DIR, files[t])) for t in tables
+                            ) / 1024, 2)
+                        }
+                        for index, tables in enumerate(groups)
+                    ]),
+                    hide_index=True,
+                    use_container_width=True
+                )
+                st.caption("Groups share no relationships, so each is fitted in its own worker process")
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    workers = st.number_input(
+                        "Worker processes",
+                        min_value=1,
+                        value=max(1, min(MULTI_TABLE_WORKERS, len(groups)))
+                    )
+                with col2:
+                    custom_filename = st.text_input(
+                        "Model filename",
+                        value=generate_filename("model_hma", source_files=[selected_metadata]),
+                        help="You can modify the filename (without extension)"
+                    ).strip()
+
+                if st.button("Fit Multi-table Model"):
+                    if not custom_filename:
+                        st.error("Filename cannot be empty")
+                        st.stop()
+                    model_filename = custom_filename if custom_filename.endswith('.pkl') else f"{custom_filename}.pkl"
+
+                    job_id = submit_multi_table(selected_metadata, model_filename, workers=workers)
+                    st.session_state.multi_table_job = job_id
+                    st.success(
+                        f"Fitting job #{job_id} submitted. The model will be saved as {model_filename} "
+                        "when it completes, even if you leave this page."
+                    )
+
+            except Exception as e:
+                st.error(f"Error fitting multi-table model: {str(e)}")
+
+    @st.fragment(run_every=5)
+    def show_fitting_jobs():
+        """Poll multi-table fitting jobs and show their progress and timings"""
+        # Pick up jobs left queued by an earlier server run
+        ensure_workers()
+        jobs = {job['id']: job for job in list_jobs(kind='multi_table')}
+        if not jobs:
+            return
+
+        st.markdown("### Fitting Jobs")
+        default = st.session_state.get('multi_table_job')
+        job_ids = list(jobs)
+        selected_job = st.selectbox(
+            "Fitting job:", job_ids,
+            index=job_ids.index(default) if default in job_ids else 0,
+            format_func=lambda job_id: f"#{job_id} {jobs[job_id]['model_file']} ({jobs[job_id]['status']})"
+        )
+        job = jobs[selected_job]
+
+        if job['status'] in ('queued', 'running'):
+            progress = json.loads(job['progress']) if job['progress'] else {"done": 0, "total": None}
+            st.progress(
+                progress['done'] / progress['total'] if progress['total'] else 0.0,
+                text=f"{job['status'].capitalize()}: {progress['done']}/{progress['total'] or '?'} groups fitted"
+            )
+        elif job['status'] == 'failed':
+            with st.expander("Error details"):
+                st.code(job['error'])
+        else:
+            manifest = read_manifest(os.path.join(UPLOAD_DIR, job['model_file']))
+            if manifest:
+                results = manifest['groups']
+                st.info(
+                    f"Wall-clock time: {manifest['seconds']:.1f}s; slowest group: "
+                    f"{max(r['seconds'] for r in results):.1f}s; "
+                    f"all groups one after another: {sum(r['seconds'] for r in results):.1f}s"
+                )
+                st.dataframe(timing_frame(results), hide_index=True, use_container_width=True)
+
+    show_fitting_jobs()
+
+    st.markdown("### Sample from a Multi-table Model")
+    models = {m['model_file']: m for m in list_models(UPLOAD_DIR, kind='multi_table')}
+
+    if not models:
+        st.info("No multi-table models yet.")
+    else:
+        selected_model = st.selectbox("Select trained model:", list(models))
+        model_info = models[selected_model]
+        st.caption(
+            f"Tables: {', '.join(model_info.get('tables', []))}; "
+            f"fitted in {model_info.get('seconds', 0):.1f}s from {model_info.get('metadata_file')}"
+        )
+        with st.expander("Fitting time and memory per table"):
+            st.dataframe(timing_frame(model_info.get('groups', [])), hide_index=True, use_container_width=True)
+
+        scale = st.number_input(
+            "Scale",
+            min_value=0.01,
+            value=1.0,
+            help="Rows sampled per table, relative to the training data"
+        )
+
+        if st.button("Generate Synthetic Tables"):
+            try:
+                with st.spinner("Sampling..."):
+                    synthetic_data = load_model(os.path.join(UPLOAD_DIR, selected_model)).sample(scale=scale)
+                    # Kept on disk, not in the session, and exported only when asked for
+                    st.session_state.multi_table_sample = save_tables(synthetic_data, selected_model)
+            except Exception as e:
+                st.error(f"Error generating synthetic data: {str(e)}")
+
+        sample_paths = {
+            table_name: path for table_name, path in (st.session_state.get('multi_table_sample') or {}).items()
+            if os.path.exists(path)
+        }
+        if sample_paths:
+            compression = st.selectbox(
+                "Compression",
+                list(COMPRESSION_EXTENSIONS),
+                format_func=lambda c: c or "None"
+            )
+            for table_name, path in sample_paths.items():
+                st.markdown(f"#### {table_name} ({os.path.basename(path)})")
+                st.dataframe(pd.read_csv(path, nrows=10), use_container_width=True)
+
+                export_key = f"multi_table_export_{table_name}"
+                prepared = st.session_state.get(export_key)
+                if prepared and (prepared["options"] != (path, compression) or not os.path.exists(prepared["path"])):
+                    del st.session_state[export_key]
+                if export_key not in st.session_state:
+                    if st.button(f"Prepare {table_name} Download", key=f"prepare_{table_name}"):
+                        try:
+                            st.session_state[export_key] = {
+                                "options": (path, compression),
+                                "path": export_artifact(path, compression=compression)
+                            }
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Error preparing download: {str(e)}")
+                else:
+                    with open(st.session_state[export_key]["path"], "rb") as f:
+                        st.download_button(
+                            f"Download {table_name}",
+                            data=f,
+                            file_name=download_name(path, compression=compression),
+                            mime="application/octet-stream",
+                            key=f"download_{table_name}"
+                        )
+else:
+    st.warning("Upload directory does not exist. Please check your configuration.")
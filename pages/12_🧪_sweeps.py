@@ -0,0 +1,165 @@
+import streamlit as st
+import os
+from backend.sweep import (
+    leaderboard, leaderboard_frame, list_sweeps, load_results, promote_trial, start_sweep, sweep_log, sweep_status
+)
+from utils.file_naming import generate_filename
+
+UPLOAD_DIR = "uploads"
+
+st.title("Hyperparameter Sweeps")
+
+st.markdown("""
+### Find Good CTGAN Settings
+
+1. Select your data and metadata files
+2. List candidate values for each hyperparameter
+3. Train one model per combination in parallel in the background, each scored on held-out rows
+4. Follow the leaderboard as trials finish, then save the best trial as a regular model
+""")
+
+def parse_values(text):
+    """Comma-separated integers"""
+    return [int(value) for value in text.split(',') if value.strip()]
+
+def parse_layers(text):
+    """Semicolon-separated networks of comma-separated layer sizes"""
+    return [parse_values(value) for value in text.split(';') if value.strip()]
+
+if os.path.exists(UPLOAD_DIR):
+    csv_files = [f for f in os.listdir(UPLOAD_DIR) if f.endswith('.csv')]
+    json_files = [f for f in os.listdir(UPLOAD_DIR) if f.endswith('.json')]
+
+    if not csv_files or not json_files:
+        st.warning("Please ensure you have both CSV data files and metadata JSON files in your uploads.")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            selected_data = st.selectbox("Select Data File:", csv_files)
+        with col2:
+            selected_metadata = st.selectbox("Select Metadata File:", json_files)
+
+        st.markdown("### Search Space")
+        col1, col2 = st.columns(2)
+        with col1:
+            epochs = st.text_input("Epochs", "100, 300")
+            batch_size = st.text_input("Batch Size", "500, 1000", help="Multiples of 10")
+            embedding_dim = st.text_input("Embedding Dimension", "128")
+        with col2:
+            generator_dim = st.text_input(
+                "Generator Dimensions", "128, 128; 256, 256",
+                help="Separate candidate networks with semicolons"
+            )
+            discriminator_dim = st.text_input(
+                "Discriminator Dimensions", "128, 128",
+                help="Separate candidate networks with semicolons"
+            )
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            mode = st.radio("Search", ["Grid", "Random"], horizontal=True)
+            num_trials = st.number_input("Random trials", min_value=1, value=8, disabled=mode == "Grid")
+        with col2:
+            workers = st.number_input("Parallel trials", min_value=1, value=max(1, (os.cpu_count() or 1) // 2))
+            st.caption(f"Each trial gets {max(1, (os.cpu_count() or 1) // workers)} torch threads")
+        with col3:
+            holdout_fraction = st.slider("Holdout fraction", min_value=0.05, max_value=0.5, value=0.2)
+            early_stopping = st.checkbox("Stop trials early when losses plateau")
+
+        if st.button("Run Sweep"):
+            try:
+                space = {
+                    'epochs': parse_values(epochs),
+                    'batch_size': parse_values(batch_size),
+                    'embedding_dim': parse_values(embedding_dim),
+                    'generator_dim': parse_layers(generator_dim),
+                    'discriminator_dim': parse_layers(discriminator_dim)
+                }
+                space = {name: values for name, values in space.items() if values}
+
+                name = start_sweep(
+                    selected_data,
+                    selected_metadata,
+                    space,
+                    mode=mode.lower(),
+                    num_trials=num_trials,
+                    holdout_fraction=holdout_fraction,
+                    workers=workers,
+                    patience=20 if early_stopping else None
+                )
+                st.session_state.selected_sweep = name
+                st.success(f"Sweep {name} started in the background. It keeps running if you leave this page.")
+            except Exception as e:
+                st.error(f"Error starting sweep: {str(e)}")
+
+    st.markdown("### Leaderboards")
+
+    @st.fragment(run_every=5)
+    def show_leaderboard():
+        """Poll the selected sweep's results while its trials finish"""
+        sweeps = {config['name']: config for config in list_sweeps()}
+        default = st.session_state.get('selected_sweep')
+
+        if default and default not in sweeps:
+            # The sweep process writes its plan once the data is loaded and split
+            st.info(f"Sweep {default} has not listed its trials yet. Its output so far:")
+            st.code(sweep_log(default) or "No output yet")
+        if not sweeps:
+            if not default:
+                st.info("No sweeps yet.")
+            return
+
+        names = list(sweeps)
+        selected_sweep = st.selectbox(
+            "Select sweep:", names, index=names.index(default) if default in names else 0
+        )
+        config = sweeps[selected_sweep]
+        st.caption(
+            f"{config['data_file']} with {config['metadata_file']}; {config['mode']} search over "
+            f"{', '.join(config['space'])}; scored on {config['holdout_rows']} held-out rows"
+        )
+
+        results = load_results(selected_sweep)
+        status = sweep_status(config)
+        if status == 'running':
+            st.progress(len(results) / config['trials'], text=f"{len(results)}/{config['trials']} trials finished")
+        elif status in ('failed', 'stopped'):
+            st.error(f"Sweep {status} after {len(results)}/{config['trials']} trials: {config.get('error', 'the sweep process exited')}")
+            with st.expander("Sweep output"):
+                st.code(sweep_log(selected_sweep))
+
+        ranked = leaderboard(results)
+        if ranked:
+            st.dataframe(leaderboard_frame(results), hide_index=True, use_container_width=True)
+        failed = [result for result in results if result['status'] != 'completed']
+        if failed:
+            with st.expander(f"{len(failed)} failed trials"):
+                for result in failed:
+                    st.code(f"Trial {result['trial']} {result['parameters']}: {result['error']}")
+
+        if ranked:
+            trials = {result['trial']: result for result in ranked}
+            selected_trial = st.selectbox(
+                "Trial to save:", list(trials),
+                format_func=lambda trial: f"Trial {trial} (quality {trials[trial]['score']:.3f})"
+            )
+            custom_filename = st.text_input(
+                "Model filename",
+                value=generate_filename("model_ctgan", source_files=[config['data_file'], config['metadata_file']]),
+                help="You can modify the filename (without extension)"
+            ).strip()
+
+            if st.button("Save as Model"):
+                if not custom_filename:
+                    st.error("Filename cannot be empty")
+                    return
+                model_filename = custom_filename if custom_filename.endswith('.pkl') else f"{custom_filename}.pkl"
+                try:
+                    promote_trial(selected_sweep, trials[selected_trial], model_filename)
+                    st.success(f"Model saved as {model_filename}")
+                except Exception as e:
+                    st.error(f"Error saving model: {str(e)}")
+
+    show_leaderboard()
+else:
+    st.warning("Upload directory does not exist. Please check your configuration.")
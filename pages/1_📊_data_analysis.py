@@ -3,6 +3,8 @@ import pandas as pd
 import os
 from datetime import datetime
 import shutil
+from utils.ingest import save_upload, summarize_csv
+from utils.loaders import invalidate
 
 # Create uploads directory if it doesn't exist
 UPLOAD_DIR = "uploads"
@@ -35,8 +37,11 @@ try:
                 default_name = os.path.splitext(uploaded_file.name)[0]
                 st.session_state[file_key] = default_name
 
-            # Load and display data preview
-            df = pd.read_csv(uploaded_file)
+            # Summarize from a bounded scan instead of parsing the whole file
+            summary_key = f"summary_{uploaded_file.file_id}"
+            if summary_key not in st.session_state:
+                st.session_state[summary_key] = summarize_csv(uploaded_file)
+            summary = st.session_state[summary_key]
             
             # Custom filename input
             custom_filename = st.text_input(
@@ -63,9 +68,10 @@ try:
                     else:
                         save_filename = custom_filename
                     
-                    # Save the file
+                    # Save the raw bytes of the upload
                     save_path = os.path.join(UPLOAD_DIR, save_filename)
-                    df.to_csv(save_path, index=False)
+                    save_upload(uploaded_file, save_path)
+                    invalidate(save_path)
                     
                     st.success(f"""
                     File saved successfully as: {save_filename}
@@ -82,8 +88,8 @@ try:
                 # Display file info
                 st.info(f"""
                 **File Details:**
-                - Rows: {len(df)}
-                - Columns: {len(df.columns)}
+                - Rows: {summary['rows']}
+                - Columns: {summary['columns']}
                 - Size: {uploaded_file.size / 1024:.2f} KB
                 """)
             
@@ -91,15 +97,16 @@ try:
                 # Display column info
                 st.markdown("#### Column Types")
                 col_types = pd.DataFrame({
-                    'Type': df.dtypes
+                    'Type': summary['dtypes']
                 }).reset_index()
                 col_types.columns = ['Column', 'Type']
                 st.dataframe(col_types, use_container_width=True)
+                st.caption(f"Inferred from the first {summary['scanned_rows']} rows")
             
             # Show data preview in full width
             st.markdown("#### Data Preview")
             st.dataframe(
-                df.head(),
+                summary['preview'],
                 use_container_width=True
             )
 
@@ -0,0 +1,133 @@
+import streamlit as st
+import pandas as pd
+import os
+import json
+from backend.engines import ENGINES, benchmark_results
+from backend.jobs import ensure_workers, list_jobs, submit_benchmark
+
+UPLOAD_DIR = "uploads"
+
+st.title("Engine Benchmark")
+
+st.markdown("""
+### Compare Synthesizer Engines
+
+Fit each engine on the selected dataset and compare:
+1. Fit time
+2. Sampling speed in rows per second
+3. Quality score of the sampled rows against the original data
+
+Benchmarks run in the background on the training workers; results appear here as each engine finishes.
+Pick the engine that meets your fidelity needs at the lowest cost, then train it on the Modeling page.
+""")
+
+if os.path.exists(UPLOAD_DIR):
+    csv_files = [f for f in os.listdir(UPLOAD_DIR) if f.endswith('.csv')]
+    json_files = [f for f in os.listdir(UPLOAD_DIR) if f.endswith('.json')]
+
+    if not csv_files or not json_files:
+        st.warning("Please ensure you have both CSV data files and metadata JSON files in your uploads.")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            selected_data = st.selectbox("Select Data File:", csv_files)
+        with col2:
+            selected_metadata = st.selectbox("Select Metadata File:", json_files)
+
+        engines = st.multiselect(
+            "Engines",
+            list(ENGINES),
+            default=list(ENGINES),
+            format_func=lambda name: ENGINES[name]['label']
+        )
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            epochs = st.number_input(
+                "Training Epochs", min_value=1, value=100,
+                help="Used by CTGAN, CopulaGAN and TVAE; Gaussian Copula has no epochs"
+            )
+        with col2:
+            batch_size = st.number_input("Batch Size", min_value=10, value=500, step=10)
+        with col3:
+            num_rows = st.number_input(
+                "Rows to sample", min_value=0, value=0,
+                help="0 samples as many rows as the original data"
+            )
+
+        if st.button("Run Benchmark"):
+            if not engines:
+                st.error("Select at least one engine")
+                st.stop()
+            try:
+                job_id = submit_benchmark(
+                    selected_data,
+                    selected_metadata,
+                    engines,
+                    {"epochs": epochs, "batch_size": batch_size},
+                    num_rows=num_rows or None
+                )
+                st.session_state.engine_benchmark_job = job_id
+                st.success(f"Benchmark job #{job_id} submitted. It keeps running if you leave this page.")
+            except Exception as e:
+                st.error(f"Error submitting benchmark: {str(e)}")
+
+    @st.fragment(run_every=5)
+    def show_benchmarks():
+        """Poll benchmark jobs and show the engine results recorded so far"""
+        # Pick up jobs left queued by an earlier server run
+        ensure_workers()
+        jobs = {job['id']: job for job in list_jobs(kind='benchmark')}
+        if not jobs:
+            return
+
+        st.markdown("### Benchmark Runs")
+        default = st.session_state.get('engine_benchmark_job')
+        job_ids = list(jobs)
+        selected_job = st.selectbox(
+            "Benchmark job:", job_ids,
+            index=job_ids.index(default) if default in job_ids else 0,
+            format_func=lambda job_id: f"#{job_id} {jobs[job_id]['data_file']} ({jobs[job_id]['status']})"
+        )
+        job = jobs[selected_job]
+        requested = json.loads(job['parameters'])['engines']
+        results = benchmark_results(selected_job)
+
+        if job['status'] in ('queued', 'running'):
+            st.progress(
+                len(results) / len(requested),
+                text=f"{job['status'].capitalize()}: {len(results)}/{len(requested)} engines finished"
+            )
+        elif job['status'] == 'failed':
+            with st.expander("Error details"):
+                st.code(job['error'])
+
+        completed = [result for result in results if result['status'] == 'completed']
+        if completed:
+            results_df = pd.DataFrame([{
+                'Engine': result['label'],
+                'Fit time (s)': round(result['fit_seconds'], 2),
+                'Sample rows/s': round(result['sample_rows_per_second'] or 0),
+                'Quality score': round(result['score'], 4)
+            } for result in completed])
+            st.dataframe(results_df, hide_index=True, use_container_width=True)
+
+            fastest = min(completed, key=lambda result: result['fit_seconds'])
+            best = max(completed, key=lambda result: result['score'])
+            st.info(
+                f"Fastest to train: {fastest['label']} ({fastest['fit_seconds']:.1f}s); "
+                f"highest quality: {best['label']} ({best['score']:.3f})"
+            )
+            col1, col2 = st.columns(2)
+            with col1:
+                st.bar_chart(results_df.set_index('Engine')[['Fit time (s)']])
+            with col2:
+                st.bar_chart(results_df.set_index('Engine')[['Quality score']])
+
+        for result in results:
+            if result['status'] != 'completed':
+                st.error(f"{result['label']} failed: {result['error']}")
+
+    show_benchmarks()
+else:
+    st.warning("Upload directory does not exist. Please check your configuration.")
@@ -2,6 +2,10 @@ import streamlit as st
 import os
 import pandas as pd
 from datetime import datetime
+from utils.loaders import invalidate
+from utils.file_index import refresh_index, rename_entry
+from utils.export import COMPRESSION_EXTENSIONS, EXPORT_FORMATS, download_name, export_artifact
+from utils.model_registry import model_removed, model_renamed
 
 # Use the same upload directory as defined in the data analysis page
 UPLOAD_DIR = "uploads"
@@ -17,20 +21,14 @@ View, manage, and organize your files:
 def delete_file(file_path):
     try:
         os.remove(file_path)
+        invalidate(file_path)
+        if file_path.endswith('.pkl'):
+            model_removed(file_path)
         return True
     except Exception as e:
         st.error(f"Error deleting file: {str(e)}")
         return False
 
-def get_file_type(filename):
-    extension = filename.split('.')[-1].lower()
-    type_mapping = {
-        'csv': 'Data File',
-        'json': 'Metadata File',
-        'pkl': 'Model File'
-    }
-    return type_mapping.get(extension, 'Unknown')
-
 def get_file_source(filename):
     # Check file extension first
     extension = filename.split('.')[-1].lower()
@@ -40,36 +38,28 @@ def get_file_source(filename):
         return 'Generated'
     
     # For other files, check if they contain indicators of being generated
-    generated_indicators = ['synthetic', 'model_ctgan', 'generated']
+    generated_indicators = ['synthetic', 'model_', 'generated']
     return 'Generated' if any(indicator in filename.lower() for indicator in generated_indicators) else 'Uploaded'
 
-def get_file_details(file_path):
-    file_size = os.path.getsize(file_path)
+def get_file_details(file_path, index_entry):
     creation_time = datetime.fromtimestamp(os.path.getctime(file_path))
     filename = os.path.basename(file_path)
     
     file_details = {
         "Filename": filename,
-        "Type": get_file_type(filename),
+        "Type": index_entry["file_type"],
         "Source": get_file_source(filename),
-        "Size (KB)": f"{file_size/1024:.2f}",
+        "Size (KB)": f"{index_entry['size']/1024:.2f}",
         "Upload Date": creation_time.strftime("%Y-%m-%d %H:%M:%S")
     }
     
-    # Add row and column counts only for CSV/Excel files
-    if file_path.endswith(('.csv', '.xlsx')):
-        try:
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            else:
-                df = pd.read_excel(file_path)
-            file_details["Rows"] = len(df)
-            file_details["Columns"] = len(df.columns)
-        except Exception as e:
-            st.warning(f"Could not read file contents for {filename}")
-            file_details["Rows"] = "N/A"
-            file_details["Columns"] = "N/A"
+    # Row and column counts come from the file index, not from parsing the file
+    if index_entry["rows"] is not None:
+        file_details["Rows"] = index_entry["rows"]
+        file_details["Columns"] = index_entry["columns"]
     else:
+        if filename.endswith(('.csv', '.xlsx')):
+            st.warning(f"Could not read file contents for {filename}")
         file_details["Rows"] = "N/A"
         file_details["Columns"] = "N/A"
     
@@ -86,23 +76,30 @@ def rename_file(old_path, new_name):
             return False, "A file with this name already exists"
         
         os.rename(old_path, new_path)
+        rename_entry(os.path.basename(old_path), os.path.basename(new_path))
+        invalidate(old_path)
+        invalidate(new_path)
+        if old_path.endswith('.pkl'):
+            model_renamed(old_path, new_path)
         return True, "File renamed successfully"
     except Exception as e:
         return False, f"Error renaming file: {str(e)}"
 
 if os.path.exists(UPLOAD_DIR):
-    files = os.listdir(UPLOAD_DIR)
+    # Hidden entries hold derived caches and partial writes, not user files
+    files = [f for f in os.listdir(UPLOAD_DIR) if not f.startswith('.')]
     
     if not files:
         st.info("No files have been uploaded yet.")
     else:
         # Create a list to store file details
         file_details = []
+        file_index = refresh_index(UPLOAD_DIR)
         
         for file in files:
             file_path = os.path.join(UPLOAD_DIR, file)
             try:
-                details = get_file_details(file_path)
+                details = get_file_details(file_path, file_index[file])
                 file_details.append(details)
             except Exception as e:
                 st.error(f"Error processing file {file}: {str(e)}")
@@ -142,6 +139,17 @@ if os.path.exists(UPLOAD_DIR):
             # File management section
             st.markdown("### File Management")
             
+            # Download options apply to every file; payloads are built only on request
+            col1, col2 = st.columns(2)
+            with col1:
+                export_format = st.selectbox("Download format", EXPORT_FORMATS)
+            with col2:
+                compression = st.selectbox(
+                    "Compression",
+                    list(COMPRESSION_EXTENSIONS),
+                    format_func=lambda c: c or "None"
+                )
+            
             # Create columns for file actions
             for file in files:
                 col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
@@ -167,14 +175,31 @@ if os.path.exists(UPLOAD_DIR):
                                 st.error(message)
                 
                 with col3:
-                    with open(file_path, "rb") as f:
-                        st.download_button(
-                            label="⬇️ Download",
-                            data=f,
-                            file_name=file,
-                            mime="application/octet-stream",
-                            key=f"download_{file}"
-                        )
+                    export_key = f"export_{file}"
+                    export_options = (export_format, compression)
+                    # A re-save or rename deletes the prepared export; offer to prepare it again
+                    prepared = st.session_state.get(export_key)
+                    if prepared and not os.path.exists(prepared["path"]):
+                        del st.session_state[export_key]
+                    if st.session_state.get(export_key, {}).get("options") != export_options:
+                        if st.button("📦 Prepare", key=f"prepare_{file}"):
+                            try:
+                                st.session_state[export_key] = {
+                                    "options": export_options,
+                                    "path": export_artifact(file_path, export_format, compression)
+                                }
+                                st.rerun()
+                            except Exception as e:
+                                st.error(f"Error preparing download: {str(e)}")
+                    else:
+                        with open(st.session_state[export_key]["path"], "rb") as f:
+                            st.download_button(
+                                label="⬇️ Download",
+                                data=f,
+                                file_name=download_name(file_path, export_format, compression),
+                                mime="application/octet-stream",
+                                key=f"download_{file}"
+                            )
                 
                 with col4:
                     if st.button("🗑️ Delete", key=f"delete_{file}"):
@@ -1,10 +1,11 @@
 import streamlit as st
 import pandas as pd
 import os
-import pickle
 from datetime import datetime
-from sdv.metadata import SingleTableMetadata
-from sdv.single_table import CTGANSynthesizer
+
+from utils.model_registry import list_models, load_model
+from utils.custom_logic import apply_custom_logic, model_custom_logic
+from backend.sampling import sample_to_file
 
 UPLOAD_DIR = "uploads"
 
@@ -20,7 +21,8 @@ st.markdown("""
 
 if os.path.exists(UPLOAD_DIR):
     # Get available model files
-    model_files = [f for f in os.listdir(UPLOAD_DIR) if f.endswith('.pkl')]
+    models = {m['model_file']: m for m in list_models(UPLOAD_DIR, kind='single_table')}
+    model_files = list(models)
     
     if not model_files:
         st.warning("No trained models found. Please train a model first in the Modeling page.")
@@ -33,10 +35,13 @@ if os.path.exists(UPLOAD_DIR):
         
         if selected_model:
             try:
-                # Load the model
-                model_path = os.path.join(UPLOAD_DIR, selected_model)
-                with open(model_path, 'rb') as f:
-                    model = pickle.load(f)
+                # Show what the model was trained on without unpickling it
+                model_info = models[selected_model]
+                if model_info['has_manifest']:
+                    st.caption(
+                        f"Trained on {model_info['data_file']} with {model_info['metadata_file']} "
+                        f"({model_info['file_size'] / 1024:.0f} KB)"
+                    )
                 
                 # Generation parameters
                 num_rows = st.number_input(
@@ -65,10 +70,11 @@ if os.path.exists(UPLOAD_DIR):
                 
                 if st.button("Generate Synthetic Data"):
                     with st.spinner("Generating synthetic data..."):
-                        # Generate synthetic data
-                        synthetic_data = model.sample(num_rows=num_rows)
+                        # Load the model only when it is needed
+                        model_path = os.path.join(UPLOAD_DIR, selected_model)
+                        model = load_model(model_path)
+                        custom_logic = model_custom_logic(model_path)
                         
-                        # Save synthetic data
                         if not custom_filename:
                             st.error("Filename cannot be empty")
                             st.stop()
@@ -79,14 +85,24 @@ if os.path.exists(UPLOAD_DIR):
                         else:
                             output_filename = custom_filename
                         
+                        # Generate synthetic data batch by batch straight into the output file
                         output_path = os.path.join(UPLOAD_DIR, output_filename)
-                        synthetic_data.to_csv(output_path, index=False)
+                        _, preview = sample_to_file(
+                            model,
+                            num_rows,
+                            output_path,
+                            preview_rows=5,
+                            transform=(
+                                (lambda batch: apply_custom_logic(batch, custom_logic))
+                                if custom_logic else None
+                            )
+                        )
                         
                         st.success(f"Generated synthetic data saved as: {output_filename}")
                         
                         # Display preview
                         st.markdown("### Data Preview")
-                        st.dataframe(synthetic_data.head())
+                        st.dataframe(preview)
                         
             except Exception as e:
                 st.error(f"Error loading model or generating data: {str(e)}")
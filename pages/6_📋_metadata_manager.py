@@ -2,17 +2,33 @@ import streamlit as st
 import pandas as pd
 import os
 import json
-from sdv.metadata import Metadata, SingleTableMetadata
 from datetime import datetime
 from utils.file_naming import generate_filename
+from utils.custom_logic import CustomLogicError, compile_logic
+from utils.loaders import load_json
+from utils.metadata_loader import load_saved_metadata
+from utils.profiling import column_info_frame, profile_csv
 
 UPLOAD_DIR = "uploads"
 
 def detect_metadata(file_path):
-    """Detect metadata from a CSV file using SDV's SingleTableMetadata."""
-    df = pd.read_csv(os.path.join(UPLOAD_DIR, file_path))
-    metadata = SingleTableMetadata()
-    metadata.detect_from_dataframe(df)
+    """Detect metadata from a CSV file's sampled profile using SDV's SingleTableMetadata."""
+    from sdv.metadata import SingleTableMetadata
+    profile = profile_csv(os.path.join(UPLOAD_DIR, file_path))
+    return SingleTableMetadata.load_from_dict(profile['metadata'])
+
+def detect_multi_table_metadata(file_paths):
+    """Detect metadata for several CSV files, one table each, and the relationships between them."""
+    from sdv.metadata import Metadata
+    metadata = Metadata.load_from_dict({
+        'tables': {
+            os.path.splitext(file_path)[0].upper(): profile_csv(os.path.join(UPLOAD_DIR, file_path))['metadata']
+            for file_path in file_paths
+        },
+        'relationships': []
+    })
+    # Links every table whose primary key name appears as a column of another table
+    metadata._detect_relationships()
     return metadata
 
 # Define sdtype reference dictionary
@@ -66,6 +82,7 @@ def display_table_settings(metadata):
 
 def detect_single_table_metadata(df, table_name):
     """Detect metadata for a single table using SDV"""
+    from sdv.metadata import SingleTableMetadata
     metadata = SingleTableMetadata()
     metadata.detect_from_dataframe(df)
     return metadata
@@ -220,31 +237,11 @@ def get_value_input_for_sdtype(sdtype, label, key):
 
 def load_metadata_from_json(json_path):
     """Load metadata from JSON file and create SingleTableMetadata instance"""
-    with open(json_path, 'r') as f:
-        metadata_json = json.load(f)
-    
-    table_name = list(metadata_json['tables'].keys())[0]
-    table_info = metadata_json['tables'][table_name]
-    
-    metadata = SingleTableMetadata()
-    
-    # Load columns with their properties
-    for col_name, col_info in table_info['columns'].items():
-        update_args = {'sdtype': col_info['sdtype']}
-        
-        # Add additional properties based on sdtype
-        if col_info['sdtype'] == 'numerical' and 'computer_representation' in col_info:
-            update_args['computer_representation'] = col_info['computer_representation']
-        elif col_info['sdtype'] == 'datetime' and 'datetime_format' in col_info:
-            update_args['datetime_format'] = col_info['datetime_format']
-        elif col_info['sdtype'] == 'id' and 'regex_format' in col_info:
-            update_args['regex_format'] = col_info['regex_format']
-        
-        metadata.update_column(col_name, **update_args)
+    metadata, table_name, constraints = load_saved_metadata(json_path)
     
     # Load constraints if they exist
-    if 'constraints' in metadata_json:
-        st.session_state.constraints = metadata_json['constraints']
+    if constraints is not None:
+        st.session_state.constraints = constraints
     
     return metadata, table_name
 
@@ -291,8 +288,7 @@ with tab1:
         if selected_metadata_file and st.button("Load Metadata"):
             try:
                 metadata_path = os.path.join(UPLOAD_DIR, selected_metadata_file)
-                with open(metadata_path, 'r') as f:
-                    metadata_content = json.load(f)
+                metadata_content = load_json(metadata_path)
                 
                 st.success("Metadata loaded successfully!")
                 
@@ -315,10 +311,7 @@ with tab1:
                             if constraint['constraint_class'] == 'ScalarRange':
                                 col1, col2, col3 = st.columns(3)
                                 with col1:
-                                    # Get table name from metadata content
-                                    table_name = list(metadata_content['tables'].keys())[0]
-                                    metadata = Metadata()
-                                    metadata.load_from_dict(metadata_content['tables'][table_name])
+                                    metadata, _, _ = load_saved_metadata(metadata_path)
                                     column = st.selectbox(
                                         "Column", 
                                         metadata.columns.keys(),
@@ -365,19 +358,9 @@ with tab1:
                 # Show edit button for metadata
                 if st.button("Edit This Metadata"):
                     st.session_state.metadata_dict = {}
-                    table_name = list(metadata_content['tables'].keys())[0]
                     
                     # Convert JSON metadata to SingleTableMetadata
-                    metadata = Metadata()
-                    table_metadata = metadata_content['tables'][table_name]
-                    
-                    for column_name, column_props in table_metadata['columns'].items():
-                        update_args = {'sdtype': column_props['sdtype']}
-                        if 'computer_representation' in column_props:
-                            update_args['computer_representation'] = column_props['computer_representation']
-                        if 'datetime_format' in column_props:
-                            update_args['datetime_format'] = column_props['datetime_format']
-                        metadata.update_column(column_name, **update_args)
+                    metadata, _, _ = load_saved_metadata(metadata_path)
                     
                     st.session_state.metadata_dict[selected_metadata_file] = metadata
                     st.rerun()
@@ -412,36 +395,35 @@ if os.path.exists(UPLOAD_DIR):
                 if 'metadata_dict' not in st.session_state:
                     st.session_state.metadata_dict = {}
                 
-                # Load and display data preview
+                # Profile the file in one streaming pass; results are cached per file hash
                 file_path = os.path.join(UPLOAD_DIR, selected_file)
-                df = pd.read_csv(file_path)
+                with st.spinner("Profiling file..."):
+                    profile = profile_csv(file_path)
                 
                 st.markdown("### Data Preview")
                 col1, col2 = st.columns([2, 1])
                 
                 with col1:
                     st.dataframe(
-                        df.head(),
+                        pd.read_csv(file_path, nrows=5),
                         use_container_width=True
                     )
                 
                 with col2:
                     st.info(f"""
                     **File Details:**
-                    - Rows: {len(df)}
-                    - Columns: {len(df.columns)}
-                    - Memory Usage: {df.memory_usage().sum() / 1024:.2f} KB
+                    - Rows: {profile['rows']}
+                    - Columns: {len(profile['columns'])}
+                    - File Size: {os.path.getsize(file_path) / 1024:.2f} KB
                     """)
                 
                 # Display column info
                 st.markdown("### Column Information")
-                column_info = pd.DataFrame({
-                    'Data Type': df.dtypes,
-                    'Non-Null Count': df.count(),
-                    'Null Count': df.isnull().sum(),
-                    'Unique Values': df.nunique()
-                })
-                st.dataframe(column_info, use_container_width=True)
+                st.dataframe(column_info_frame(profile), use_container_width=True)
+                st.caption(
+                    f"Unique values are estimated with a HyperLogLog sketch; "
+                    f"sdtypes are detected on a stratified sample of {profile['sample_rows']} rows"
+                )
                 
                 st.markdown("### Metadata Editor")
                 # Auto-detect metadata for selected file
@@ -449,7 +431,7 @@ if os.path.exists(UPLOAD_DIR):
                     # Check if metadata JSON exists for this file
                     metadata_json_path = os.path.join(UPLOAD_DIR, f"metadata_{os.path.splitext(selected_file)[0]}.json")
                     if os.path.exists(metadata_json_path):
-                        metadata = load_metadata_from_json(metadata_json_path)
+                        metadata, _ = load_metadata_from_json(metadata_json_path)
                     else:
                         metadata = detect_metadata(selected_file)
                     st.session_state.metadata_dict[selected_file] = metadata
@@ -562,16 +544,22 @@ if os.path.exists(UPLOAD_DIR):
                     )
                     
                     if st.button("Add Custom Logic Constraint"):
-                        new_constraint = {
-                            'constraint_class': 'CustomLogic',
-                            'constraint_parameters': {
-                                'source_column': source_column,
-                                'target_column': target_column,
-                                'transform_function': transform_function
+                        try:
+                            # Reject snippets that do not compile or are not allowed before saving them
+                            compile_logic(transform_function)
+                        except CustomLogicError as e:
+                            st.error(f"Invalid custom logic: {str(e)}")
+                        else:
+                            new_constraint = {
+                                'constraint_class': 'CustomLogic',
+                                'constraint_parameters': {
+                                    'source_column': source_column,
+                                    'target_column': target_column,
+                                    'transform_function': transform_function
+                                }
                             }
-                        }
-                        st.session_state.constraints.append(new_constraint)
-                        st.success("Custom Logic Constraint added!")
+                            st.session_state.constraints.append(new_constraint)
+                            st.success("Custom Logic Constraint added!")
 
                 # Different inputs based on constraint type
                 if constraint_type == "ScalarRange":
@@ -868,7 +856,128 @@ if os.path.exists(UPLOAD_DIR):
             
             if selected_files:
                 st.markdown("### Multi-table Metadata Configuration")
-                # Rest of the multi-table configuration code...
+                table_files = {os.path.splitext(f)[0].upper(): f for f in selected_files}
+                
+                # Detect again only when the selection changes; profiles are cached per file hash
+                if st.session_state.get('multi_table_files') != sorted(selected_files):
+                    with st.spinner("Profiling files..."):
+                        st.session_state.multi_metadata = detect_multi_table_metadata(selected_files)
+                    st.session_state.multi_table_files = sorted(selected_files)
+                multi_metadata = st.session_state.multi_metadata
+                
+                st.markdown("### Tables")
+                for table_name, file_name in table_files.items():
+                    table_metadata = multi_metadata.tables[table_name]
+                    with st.expander(f"{table_name} ({file_name})"):
+                        column_names = list(table_metadata.columns.keys())
+                        primary_key = st.selectbox(
+                            "Primary Key",
+                            options=["None"] + column_names,
+                            index=0 if table_metadata.primary_key is None else column_names.index(table_metadata.primary_key) + 1,
+                            key=f"multi_pk_{table_name}",
+                            help="Select the primary key column (must contain unique values)"
+                        )
+                        try:
+                            if primary_key == "None":
+                                if table_metadata.primary_key is not None:
+                                    multi_metadata.remove_primary_key(table_name)
+                            elif primary_key != table_metadata.primary_key:
+                                if table_metadata.columns[primary_key]['sdtype'] != 'id':
+                                    multi_metadata.update_column(table_name, primary_key, sdtype='id')
+                                multi_metadata.set_primary_key(table_name, primary_key)
+                        except Exception as e:
+                            st.error(f"Error setting primary key: {str(e)}")
+                        
+                        for column_name, column_metadata in table_metadata.columns.items():
+                            try:
+                                display_column_metadata_editor(table_metadata, table_name, column_name, column_metadata)
+                            except Exception as e:
+                                st.error(f"Error updating column '{column_name}': {str(e)}")
+                
+                st.markdown("### Relationships")
+                if multi_metadata.relationships:
+                    for i, relationship in enumerate(multi_metadata.relationships):
+                        col1, col2 = st.columns([4, 1])
+                        with col1:
+                            st.markdown(
+                                f"**{relationship['parent_table_name']}**.{relationship['parent_primary_key']} → "
+                                f"**{relationship['child_table_name']}**.{relationship['child_foreign_key']}"
+                            )
+                        with col2:
+                            if st.button("Remove", key=f"remove_relationship_{i}"):
+                                multi_metadata.remove_relationship(
+                                    relationship['parent_table_name'],
+                                    relationship['child_table_name']
+                                )
+                                st.rerun()
+                else:
+                    st.info("No relationships detected. Tables without relationships are modeled independently.")
+                
+                parent_tables = [name for name in table_files if multi_metadata.tables[name].primary_key]
+                if parent_tables and len(table_files) > 1:
+                    st.markdown("#### Add Relationship")
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        parent_table = st.selectbox("Parent Table", parent_tables, key="multi_parent_table")
+                        st.caption(f"Primary key: {multi_metadata.tables[parent_table].primary_key}")
+                    with col2:
+                        child_table = st.selectbox(
+                            "Child Table",
+                            [name for name in table_files if name != parent_table],
+                            key="multi_child_table"
+                        )
+                    with col3:
+                        foreign_key = st.selectbox(
+                            "Foreign Key",
+                            list(multi_metadata.tables[child_table].columns.keys()),
+                            key="multi_foreign_key"
+                        )
+                    
+                    if st.button("Add Relationship"):
+                        try:
+                            # Foreign keys must be ID columns
+                            if multi_metadata.tables[child_table].columns[foreign_key]['sdtype'] != 'id':
+                                multi_metadata.update_column(child_table, foreign_key, sdtype='id')
+                            multi_metadata.add_relationship(
+                                parent_table_name=parent_table,
+                                child_table_name=child_table,
+                                parent_primary_key=multi_metadata.tables[parent_table].primary_key,
+                                child_foreign_key=foreign_key
+                            )
+                            st.success("Relationship added!")
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Error adding relationship: {str(e)}")
+                
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    multi_filename = st.text_input(
+                        "Filename for metadata",
+                        value=generate_filename("metadata_multi", source_files=selected_files),
+                        help="You can modify the filename (without extension)",
+                        key="multi_metadata_filename_input"
+                    ).strip()
+                
+                with col2:
+                    if st.button("Save Multi-table Metadata"):
+                        try:
+                            if not multi_filename:
+                                st.error("Filename cannot be empty")
+                                st.stop()
+                            
+                            multi_metadata.validate()
+                            metadata_json = multi_metadata.to_dict()
+                            # Records which upload each table is read from when fitting
+                            metadata_json["table_files"] = table_files
+                            metadata_json["constraints"] = []
+                            
+                            metadata_filename = multi_filename if multi_filename.endswith('.json') else f"{multi_filename}.json"
+                            with open(os.path.join(UPLOAD_DIR, metadata_filename), 'w') as f:
+                                json.dump(metadata_json, f, indent=4)
+                            
+                            st.success(f"Saved metadata as: {metadata_filename}")
+                        except Exception as e:
+                            st.error(f"Error saving metadata: {str(e)}")
                 
 else:
     st.warning("Upload directory does not exist. Please upload files first.")
\ No newline at end of file
@@ -2,23 +2,26 @@ import streamlit as st
 import pandas as pd
 import os
 import json
-from sdv.single_table import CTGANSynthesizer
-from sdv.metadata import SingleTableMetadata
 from datetime import datetime
+from backend.engines import DEFAULT_ENGINE, ENGINES
+from backend.jobs import ensure_workers, get_job_epochs, list_jobs, submit_job
 from utils.file_naming import generate_filename
+from utils.loaders import load_frame, load_json
+from utils.model_registry import list_models, load_model
 
 UPLOAD_DIR = "uploads"
 
-st.title("CTGAN Model Training")
+st.title("Model Training")
 
 st.markdown("""
-### CTGAN Model Configuration
+### Synthesizer Configuration
 
-Configure and train a CTGAN (Conditional Tabular GAN) model:
+Configure and train a synthesizer model:
 1. Select your data and metadata files
-2. Configure CTGAN parameters
+2. Choose an engine and configure its parameters; Gaussian Copula trains in seconds,
+   CTGAN, CopulaGAN and TVAE train neural networks for higher fidelity
 3. Train the model
-4. Save the trained model
+4. Follow training progress; the model is saved when training completes
 """)
 
 # Get available files
@@ -47,82 +50,196 @@ if os.path.exists(UPLOAD_DIR):
         if selected_data and selected_metadata:
             try:
                 with st.spinner("Loading data and metadata..."):
-                    # Load data
-                    data_path = os.path.join(UPLOAD_DIR, selected_data)
-                    data = pd.read_csv(data_path)
-                    
-                    # Create new metadata instance
-                    metadata = SingleTableMetadata()
-                    
-                    # First detect from dataframe
-                    metadata.detect_from_dataframe(data)
+                    # Imported on first use; SDV and torch take seconds to load
+                    from backend.training import (
+                        adaptive_batch_size, available_memory_mb, build_metadata, encoded_width, warm_start_problems
+                    )
                     
-                    # Load saved metadata properties
+                    # Load data typed by the selected metadata
+                    data_path = os.path.join(UPLOAD_DIR, selected_data)
                     metadata_path = os.path.join(UPLOAD_DIR, selected_metadata)
-                    with open(metadata_path, 'r') as f:
-                        saved_metadata = json.load(f)
+                    data = load_frame(data_path, metadata_path)
                     
-                    # Get table info
-                    table_name = list(saved_metadata['tables'].keys())[0]
-                    table_metadata = saved_metadata['tables'][table_name]
+                    # Build training metadata from the saved properties
+                    metadata = build_metadata(data, load_json(metadata_path))
                     
-                    # Update column properties
-                    for column_name, column_props in table_metadata['columns'].items():
-                        if column_name in metadata.columns:
-                            update_args = {'sdtype': column_props['sdtype']}
-                            
-                            # Add other properties if they exist
-                            if 'computer_representation' in column_props:
-                                update_args['computer_representation'] = column_props['computer_representation']
-                            if 'datetime_format' in column_props:
-                                update_args['datetime_format'] = column_props['datetime_format']
-                            
-                            metadata.update_column(column_name, **update_args)
+                    st.success("Metadata loaded successfully!")
                     
-                    # Explicitly set primary key to None
-                    metadata.set_primary_key(None)
+                    training_mode = st.radio(
+                        "Training mode",
+                        ["Train a new model", "Continue training an existing model"],
+                        horizontal=True,
+                        help="Continuing starts from a saved model's networks and data transformer, so a "
+                             "short run on refreshed data replaces a full retrain"
+                    )
+                    warm_start = training_mode != "Train a new model"
                     
-                    st.success("Metadata loaded successfully!")
+                    if not warm_start:
+                        engine = st.selectbox(
+                            "Engine",
+                            list(ENGINES),
+                            index=list(ENGINES).index(DEFAULT_ENGINE),
+                            format_func=lambda name: ENGINES[name]['label'],
+                            help="Compare engines on this data in the Engine Benchmark page"
+                        )
+                        gan = ENGINES[engine]['gan']
                     
-                    # CTGAN parameters
-                    st.markdown("### CTGAN Parameters")
+                        # Engine parameters
+                        st.markdown(f"### {ENGINES[engine]['label']} Parameters")
                     
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        epochs = st.number_input("Training Epochs", min_value=1, value=300)
-                        batch_size = st.number_input("Batch Size", min_value=1, value=500)
-                        log_frequency = st.checkbox("Log Frequency", value=True)
+                        # Parameters passed to the engine's synthesizer by the training worker
+                        parameters = {"engine": engine}
+                        col1, col2 = st.columns(2)
+                        if ENGINES[engine]['epochs']:
+                            with col1:
+                                epochs = st.number_input("Training Epochs", min_value=1, value=300)
+                                batch_size = st.number_input("Batch Size", min_value=1, value=500)
+                                parameters.update({"epochs": epochs, "batch_size": batch_size})
+                                if gan:
+                                    parameters["log_frequency"] = st.checkbox("Log Frequency", value=True)
+                        
+                            with col2:
+                                if gan:
+                                    generator_dim = st.text_input("Generator Dimensions", "128, 128, 128")
+                                    discriminator_dim = st.text_input("Discriminator Dimensions", "128, 128, 128")
+                                    # Convert string dimensions to tuples
+                                    parameters["generator_dim"] = tuple(map(int, generator_dim.split(',')))
+                                    parameters["discriminator_dim"] = tuple(map(int, discriminator_dim.split(',')))
+                                else:
+                                    compress_dims = st.text_input("Encoder Dimensions", "128, 128")
+                                    decompress_dims = st.text_input("Decoder Dimensions", "128, 128")
+                                    parameters["compress_dims"] = tuple(map(int, compress_dims.split(',')))
+                                    parameters["decompress_dims"] = tuple(map(int, decompress_dims.split(',')))
+                                parameters["embedding_dim"] = st.number_input("Embedding Dimension", min_value=1, value=128)
+                    
+                        if engine in ('gaussian_copula', 'copula_gan'):
+                            with col1:
+                                parameters["default_distribution"] = st.selectbox(
+                                    "Default Distribution",
+                                    ['beta', 'norm', 'truncnorm', 'uniform', 'gamma', 'gaussian_kde'],
+                                    help="Marginal distribution fitted to numerical columns"
+                                )
+                    else:
+                        st.markdown("### Warm Start")
+                        models = {
+                            m['model_file']: m for m in list_models(UPLOAD_DIR, kind='single_table')
+                            if ENGINES.get(m.get('engine', DEFAULT_ENGINE), {}).get('gan')
+                        }
+                        if not models:
+                            st.warning("No CTGAN or CopulaGAN models to continue training. Train a new model first.")
+                            st.stop()
+                        
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            parent_model = st.selectbox("Model to continue:", list(models))
+                            parent_info = models[parent_model]
+                            st.caption(
+                                f"Trained on {parent_info.get('data_file') or 'unknown data'} for "
+                                f"{parent_info.get('total_epochs', parent_info.get('epochs_trained', '?'))} epochs"
+                                + (f"; continues {parent_info['parent_model']}" if parent_info.get('parent_model') else "")
+                            )
+                        with col2:
+                            epochs = st.number_input(
+                                "Additional Epochs", min_value=1, value=50,
+                                help="A fraction of a full training run is usually enough to absorb new rows"
+                            )
+                            warm_start_data = st.radio(
+                                "Train on",
+                                ["new", "combined"],
+                                format_func=lambda option: {
+                                    "new": "Selected data only",
+                                    "combined": "Model's training data followed by the selected data"
+                                }[option],
+                                help="Pick 'Selected data only' when the selected file already holds the old rows"
+                            )
                         
-                    with col2:
-                        generator_dim = st.text_input("Generator Dimensions", "128, 128, 128")
-                        discriminator_dim = st.text_input("Discriminator Dimensions", "128, 128, 128")
-                        embedding_dim = st.number_input("Embedding Dimension", min_value=1, value=128)
+                        engine = parent_info.get('engine', DEFAULT_ENGINE)
+                        gan = True
+                        
+                        st.caption("The selected data is checked against the model when training is submitted")
+                        
+                        parameters = {
+                            "engine": engine,
+                            "epochs": epochs,
+                            "warm_start": {"parent_model": parent_model, "data": warm_start_data}
+                        }
                     
-                    # Convert string dimensions to tuples
-                    generator_dim = tuple(map(int, generator_dim.split(',')))
-                    discriminator_dim = tuple(map(int, discriminator_dim.split(',')))
+                    # Training performance settings, applied by the worker before training starts
+                    with st.expander("Training Performance"):
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            intra_op_threads = st.number_input(
+                                "Intra-op threads",
+                                min_value=0,
+                                value=0,
+                                help="Threads torch uses within each operation; 0 keeps torch's default"
+                            )
+                            inter_op_threads = st.number_input(
+                                "Inter-op threads",
+                                min_value=0,
+                                value=0,
+                                help="Threads torch runs independent operations on; 0 keeps torch's default. "
+                                     "Torch only applies this to the first job in each worker process"
+                            )
+                            adaptive = st.checkbox(
+                                "Adaptive batch size",
+                                disabled=warm_start or not ENGINES[engine]['epochs'],
+                                help="Size batches from the row count and available RAM instead of the batch size above"
+                            ) and ENGINES[engine]['epochs'] and not warm_start
+                            if adaptive:
+                                memory_mb = available_memory_mb()
+                                suggested = adaptive_batch_size(
+                                    len(data), encoded_width(data, metadata), parameters, memory_mb
+                                )
+                                st.caption(
+                                    f"About {suggested} rows per batch for {len(data)} rows"
+                                    + (f" and {memory_mb:.0f} MB available" if memory_mb else "")
+                                    + "; recomputed on the training host"
+                                )
+                        
+                        with col2:
+                            early_stopping = st.checkbox(
+                                "Stop early when losses plateau",
+                                disabled=not gan,
+                                help="End training once the smoothed generator and discriminator losses stop moving"
+                            ) and gan
+                            if early_stopping:
+                                patience = st.number_input("Patience (epochs)", min_value=1, value=20)
+                                min_delta = st.number_input(
+                                    "Minimum loss change", min_value=0.0, value=0.05, step=0.01, format="%.3f"
+                                )
+                                min_epochs = st.number_input("Minimum epochs", min_value=1, value=50)
+                            
+                            cache_transformer = st.checkbox(
+                                "Reuse fitted data transformer",
+                                value=True,
+                                disabled=warm_start or not gan,
+                                help="Runs on the same data and metadata skip fitting the per-column "
+                                     "Gaussian mixtures and one-hot encoders, and go straight to training"
+                            ) and gan and not warm_start
                     
-                    # Initialize CTGAN with metadata
-                    model = CTGANSynthesizer(
-                        metadata,
-                        epochs=epochs,
-                        batch_size=batch_size,
-                        log_frequency=log_frequency,
-                        generator_dim=generator_dim,
-                        discriminator_dim=discriminator_dim,
-                        embedding_dim=embedding_dim
-                    )
+                    parameters["performance"] = {
+                        "intra_op_threads": intra_op_threads or None,
+                        "inter_op_threads": inter_op_threads or None,
+                        "adaptive_batch_size": adaptive,
+                        "cache_transformer": cache_transformer,
+                        "early_stopping": {
+                            "patience": patience,
+                            "min_delta": min_delta,
+                            "min_epochs": min_epochs
+                        } if early_stopping else None
+                    }
 
                     # Model filename handling
                     if 'model_filename' not in st.session_state:
                         st.session_state.model_filename = generate_filename(
-                            "model_ctgan",
+                            f"model_{engine}",
                             source_files=[selected_data, selected_metadata]
                         )
 
                     # Update default filename when files change
                     current_default = generate_filename(
-                        "model_ctgan",
+                        f"model_{engine}",
                         source_files=[selected_data, selected_metadata]
                     )
                     if current_default != st.session_state.model_filename:
@@ -136,44 +253,86 @@ if os.path.exists(UPLOAD_DIR):
                         key="model_filename_input"
                     ).strip()
 
-                    # Train and Save buttons
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        if st.button("Train Model"):
-                            with st.spinner(f"Training CTGAN model for {epochs} epochs..."):
-                                model.fit(data)
-                                st.session_state.trained_model = model
-                                st.success("Model training completed!")
-                    
-                    with col2:
-                        if st.button("Save Model") and 'trained_model' in st.session_state:
-                            try:
-                                if not custom_filename:
-                                    st.error("Filename cannot be empty")
-                                    st.stop()
-                                
-                                # Ensure .pkl extension
-                                if not custom_filename.endswith('.pkl'):
-                                    model_filename = f"{custom_filename}.pkl"
-                                else:
-                                    model_filename = custom_filename
-                                
-                                model_path = os.path.join(UPLOAD_DIR, model_filename)
-                                st.session_state.trained_model.save(model_path)
-                                
-                                st.success(f"""
-                                Model saved successfully as: {model_filename}
-                                Training details:
-                                - Epochs: {epochs}
-                                - Batch size: {batch_size}
-                                - Data file: {selected_data}
-                                - Metadata file: {selected_metadata}
-                                """)
-                            except Exception as e:
-                                st.error(f"Error saving model: {str(e)}")
+                    # Training runs in a background worker so the page stays responsive
+                    if st.button("Train Model"):
+                        if not custom_filename:
+                            st.error("Filename cannot be empty")
+                            st.stop()
+                        
+                        # Ensure .pkl extension
+                        if not custom_filename.endswith('.pkl'):
+                            model_filename = f"{custom_filename}.pkl"
+                        else:
+                            model_filename = custom_filename
+                        
+                        if warm_start:
+                            # The parent's data processor and transformer are kept, so the data must fit them;
+                            # checked on submit only, as it transforms the whole selected file
+                            problems = warm_start_problems(load_model(os.path.join(UPLOAD_DIR, parent_model)), data, metadata)
+                            if problems:
+                                st.error("This model cannot continue training on the selected data:")
+                                for problem in problems:
+                                    st.markdown(f"- {problem}")
+                                st.stop()
+                        
+                        job_id = submit_job(selected_data, selected_metadata, model_filename, parameters)
+                        st.success(f"""
+                        Training job #{job_id} submitted. The model will be saved as {model_filename} when it completes.
+                        Training details:
+                        - Engine: {ENGINES[engine]['label']}{f" (continuing {parent_model})" if warm_start else ""}
+                        - Epochs: {parameters.get('epochs', 'n/a')}{" (stops early on a loss plateau)" if early_stopping else ""}
+                        - Batch size: {"adaptive" if adaptive else parameters.get('batch_size', 'n/a')}
+                        - Data file: {selected_data}
+                        - Metadata file: {selected_metadata}
+                        """)
                 
             except Exception as e:
-                st.error(f"Error during model training: {str(e)}")
+                st.error(f"Error preparing model training: {str(e)}")
                 st.error("Please check if your metadata file is compatible with the data.")
+
+    @st.fragment(run_every=5)
+    def show_training_jobs():
+        """Poll the job queue and show progress of recent training jobs"""
+        # Pick up jobs left queued by an earlier server run
+        ensure_workers()
+        jobs = list_jobs()
+        if not jobs:
+            return
+        
+        st.markdown("### Training Jobs")
+        st.dataframe(
+            pd.DataFrame([{
+                'Job': job['id'],
+                'Status': job['status'],
+                'Engine': ENGINES.get(json.loads(job['parameters']).get('engine', DEFAULT_ENGINE), {}).get('label'),
+                'Model': job['model_file'],
+                'Epoch': job['last_epoch'],
+                'Epochs': json.loads(job['parameters']).get('epochs'),
+                'Started': job['started_at'],
+                'Finished': job['finished_at']
+            } for job in jobs]),
+            hide_index=True,
+            use_container_width=True
+        )
+        
+        selected_job = st.selectbox("Show losses for job:", [job['id'] for job in jobs])
+        epochs_df = pd.DataFrame(get_job_epochs(selected_job))
+        if not epochs_df.empty:
+            st.line_chart(epochs_df.set_index('epoch')[['generator_loss', 'discriminator_loss']])
+            
+            throughput = epochs_df.dropna(subset=['samples_per_second'])
+            if not throughput.empty:
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Mean epoch time", f"{throughput['seconds'].mean():.2f}s")
+                col2.metric("Rows/s", f"{throughput['samples_per_second'].mean():,.0f}")
+                col3.metric("Epochs recorded", len(epochs_df))
+                st.line_chart(throughput.set_index('epoch')[['samples_per_second']])
+        
+        failed = next((job for job in jobs if job['id'] == selected_job and job['status'] == 'failed'), None)
+        if failed:
+            with st.expander("Error details"):
+                st.code(failed['error'])
+    
+    show_training_jobs()
 else:
     st.warning("Upload directory does not exist. Please check your configuration.") 
\ No newline at end of file
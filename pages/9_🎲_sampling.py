@@ -1,9 +1,12 @@
 import streamlit as st
 import pandas as pd
 import os
-import pickle
 from datetime import datetime
 from utils.file_naming import generate_filename
+from utils.model_registry import list_models, load_model, registry_stats
+from utils.export import COMPRESSION_EXTENSIONS, download_name, export_artifact
+from utils.custom_logic import apply_custom_logic, model_custom_logic
+from backend.sampling import merge_parts, merge_stats, preview_parts, sample_sharded, sample_to_file
 
 UPLOAD_DIR = "uploads"
 
@@ -19,7 +22,8 @@ st.markdown("""
 
 # Get available model files
 if os.path.exists(UPLOAD_DIR):
-    model_files = [f for f in os.listdir(UPLOAD_DIR) if f.endswith('.pkl')]
+    models = {m['model_file']: m for m in list_models(UPLOAD_DIR, kind='single_table')}
+    model_files = list(models)
     
     if not model_files:
         st.warning("No trained models found. Please train a model first in the Modeling page.")
@@ -32,10 +36,14 @@ if os.path.exists(UPLOAD_DIR):
         
         if selected_model:
             try:
-                # Load the model
-                model_path = os.path.join(UPLOAD_DIR, selected_model)
-                with open(model_path, 'rb') as f:
-                    model = pickle.load(f)
+                # Show what the model was trained on without unpickling it
+                model_info = models[selected_model]
+                if model_info['has_manifest']:
+                    st.caption(
+                        f"Trained on {model_info['data_file']} with {model_info['metadata_file']} "
+                        f"({model_info['file_size'] / 1024:.0f} KB)"
+                        + (f"; continued from {' → '.join(model_info['lineage'])}" if model_info.get('lineage') else "")
+                    )
                 
                 # Sampling configuration
                 st.markdown("### Sampling Configuration")
@@ -56,23 +64,77 @@ if os.path.exists(UPLOAD_DIR):
                         help="Larger batch sizes are faster but use more memory"
                     )
                 
+                # Parallel sampling splits the request into seeded shards
+                parallel = st.checkbox(
+                    "Sample in parallel across CPU cores",
+                    help="Each worker process loads its own copy of the model and writes its own part file"
+                )
+                if parallel:
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        workers = st.number_input("Worker processes", min_value=1, value=os.cpu_count() or 1)
+                    with col2:
+                        num_shards = st.number_input(
+                            "Shards",
+                            min_value=1,
+                            value=os.cpu_count() or 1,
+                            help="Keep the shard count fixed to reproduce a sample with the same seed"
+                        )
+                    with col3:
+                        seed = st.number_input("Seed", min_value=0, value=0)
+                
+                # CustomLogic constraints from the model's metadata fix up every sampled batch
+                custom_logic = model_custom_logic(os.path.join(UPLOAD_DIR, selected_model))
+                if custom_logic:
+                    targets = ', '.join(c['constraint_parameters']['target_column'] for c in custom_logic)
+                    st.caption(f"Custom logic will be applied to: {targets}")
+                
                 if st.button("Generate Synthetic Data"):
                     try:
                         with st.spinner(f"Generating {num_rows} synthetic rows..."):
-                            # Sample data with only supported parameters
-                            synthetic_data = model.sample(
-                                num_rows=num_rows,
-                                batch_size=batch_size
-                            )
-                            
-                            # Save synthetic data
                             base_filename = generate_filename(
                                 "synthetic",
                                 source_files=[selected_model]
                             )
                             output_filename = f"{base_filename}.csv"
                             output_path = os.path.join(UPLOAD_DIR, output_filename)
-                            synthetic_data.to_csv(output_path, index=False)
+                            
+                            if parallel:
+                                manifest = sample_sharded(
+                                    os.path.join(UPLOAD_DIR, selected_model),
+                                    num_rows,
+                                    base_filename,
+                                    num_shards=num_shards,
+                                    workers=workers,
+                                    seed=seed,
+                                    batch_size=batch_size,
+                                    custom_logic=custom_logic
+                                )
+                                # Preview first: merging removes the parts
+                                preview = preview_parts(manifest)
+                                merge_parts(manifest, output_path)
+                                stats = merge_stats(manifest)
+                                st.info(
+                                    f"Sampled {len(manifest['parts'])} shards with {workers} workers "
+                                    f"in {manifest['seconds']:.1f}s ({num_rows / manifest['seconds']:.0f} rows/s)"
+                                )
+                            else:
+                                # Load the model only when it is needed
+                                model = load_model(os.path.join(UPLOAD_DIR, selected_model))
+                                
+                                # Stream batches to disk, collecting statistics on the way
+                                stats, preview = sample_to_file(
+                                    model,
+                                    num_rows,
+                                    output_path,
+                                    batch_size=batch_size,
+                                    transform=(
+                                        (lambda batch: apply_custom_logic(batch, custom_logic))
+                                        if custom_logic else None
+                                    )
+                                )
+                            
+                            st.session_state.sampling_output = output_path
                             
                             st.success(f"Generated synthetic data saved as: {output_filename}")
                             
@@ -81,23 +143,45 @@ if os.path.exists(UPLOAD_DIR):
                             
                             with tab1:
                                 st.markdown("### Generated Data Preview")
-                                st.dataframe(synthetic_data.head(10))
+                                st.dataframe(preview)
                             
                             with tab2:
                                 st.markdown("### Basic Statistics")
-                                st.dataframe(synthetic_data.describe())
-                            
-                            # Download button
-                            st.download_button(
-                                label="Download Synthetic Data",
-                                data=synthetic_data.to_csv(index=False),
-                                file_name=output_filename,
-                                mime='text/csv'
-                            )
+                                st.dataframe(stats.to_frame())
+                                if parallel:
+                                    st.markdown("### Shards")
+                                    st.dataframe(pd.DataFrame(manifest['parts'])[['index', 'num_rows', 'seed', 'seconds']])
                     
                     except Exception as e:
                         st.error(f"Error generating synthetic data: {str(e)}")
                         st.error("Please check if the model is compatible with the current version of SDV.")
+                
+                # Download the last generated file, built from disk only when requested
+                output_path = st.session_state.get('sampling_output')
+                if output_path and os.path.exists(output_path):
+                    st.markdown("### Download")
+                    compression = st.selectbox(
+                        "Compression",
+                        list(COMPRESSION_EXTENSIONS),
+                        format_func=lambda c: c or "None"
+                    )
+                    if st.button("Prepare Download"):
+                        st.session_state.sampling_export = {
+                            "options": (output_path, compression),
+                            "path": export_artifact(output_path, compression=compression)
+                        }
+                    export = st.session_state.get('sampling_export')
+                    if export and export["options"] == (output_path, compression):
+                        with open(export["path"], "rb") as f:
+                            st.download_button(
+                                label="Download Synthetic Data",
+                                data=f,
+                                file_name=download_name(output_path, compression=compression),
+                                mime='application/octet-stream'
+                            )
+                
+                with st.expander("Model cache"):
+                    st.json(registry_stats())
             
             except Exception as e:
                 st.error(f"Error loading model: {str(e)}")
@@ -0,0 +1,36 @@
+import pandas as pd
+import utils.profiling as profiling
+from utils.profiling import profile_csv
+
+def _write_csv(tmp_path, ids):
+    csv_path = tmp_path / "table.csv"
+    pd.DataFrame({"key": ids, "value": range(len(ids))}).to_csv(csv_path, index=False)
+    return str(csv_path)
+
+def _detected(profile):
+    metadata = profile["metadata"]
+    return metadata["columns"]["key"]["sdtype"], metadata.get("primary_key")
+
+def test_near_unique_numbers_are_not_an_id(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # 77 whole numbers with one duplicate
+    sdtype, primary_key = _detected(profile_csv(_write_csv(tmp_path, list(range(76)) + [5])))
+    assert sdtype != "id"
+    assert primary_key != "key"
+
+def test_near_unique_strings_are_not_an_id(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ids = [f"ID{number:04d}" for number in range(98)] + ["ID0001", "ID0002"]
+    sdtype, primary_key = _detected(profile_csv(_write_csv(tmp_path, ids)))
+    assert sdtype != "id"
+    assert primary_key != "key"
+
+def test_estimated_uniqueness_is_checked_exactly(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # Force the sketch-only path that large files take
+    monkeypatch.setattr(profiling, "EXACT_DISTINCT_LIMIT", 10)
+    unique = profile_csv(_write_csv(tmp_path, list(range(1000))))
+    assert _detected(unique) == ("id", "key")
+
+    duplicated = profile_csv(_write_csv(tmp_path, list(range(990)) + list(range(10))))
+    assert _detected(duplicated)[1] != "key"
@@ -0,0 +1,34 @@
+import json
+import pandas as pd
+from utils.validation import KeySet, iter_csv_chunks, validate_chunks
+
+METADATA = {
+    "tables": {
+        "TABLE": {
+            "primary_key": "id",
+            "columns": {"id": {"sdtype": "id"}, "value": {"sdtype": "numerical"}}
+        }
+    }
+}
+
+def test_duplicate_keys_found_across_int_and_float_chunks(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    csv_path = tmp_path / "keys.csv"
+    # The second chunk holds an empty key, so pandas reads it as floats
+    csv_path.write_text("id,value\n1,1\n2,2\n3,3\n1,4\n,5\n2,6\n")
+
+    chunked = validate_chunks(iter_csv_chunks(str(csv_path), METADATA, chunk_rows=3), METADATA)
+    whole = validate_chunks([pd.read_csv(csv_path)], METADATA)
+
+    expected = [error for error in whole.errors if "duplicate" in error]
+    assert expected
+    assert [error for error in chunked.errors if "duplicate" in error] == expected
+
+def test_key_set_matches_integral_floats_and_ints(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    key_set = KeySet()
+    try:
+        assert not key_set.add(pd.Series([1, 2], dtype='int64')).any()
+        assert key_set.add(pd.Series([1.0, 2.5], dtype='float64')).tolist() == [True, False]
+    finally:
+        key_set.close()
@@ -0,0 +1,281 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+DEFAULT_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Checkers by constraint class; each compiles a constraint into a violation mask
+CONSTRAINT_CHECKERS = {}
+
+class ConstraintError(ValueError):
+    """A constraint that cannot be checked because of how it is configured"""
+
+def register_checker(constraint_class):
+    """Register a checker function for a constraint class"""
+    def decorator(checker):
+        CONSTRAINT_CHECKERS[constraint_class] = checker
+        return checker
+    return decorator
+
+class ValidationContext:
+    """Data under validation plus column conversions shared by every checker"""
+
+    def __init__(self, df, columns_metadata):
+        self.df = df
+        self.columns_metadata = columns_metadata
+        self._numeric = {}
+        self._datetimes = {}
+
+    def numeric(self, column_name):
+        """Column as a float array; values that are not numbers become NaN"""
+        if column_name not in self._numeric:
+            values = pd.to_numeric(self.df[column_name], errors='coerce')
+            self._numeric[column_name] = values.to_numpy(dtype='float64', na_value=np.nan)
+        return self._numeric[column_name]
+
+    def datetime_format(self, column_name):
+        return self.columns_metadata[column_name].get('datetime_format', DEFAULT_DATETIME_FORMAT)
+
+    def datetimes(self, column_name):
+        """Column parsed once with its declared format; values that do not match become NaT"""
+        if column_name not in self._datetimes:
+            self._datetimes[column_name] = pd.to_datetime(
+                self.df[column_name],
+                format=self.datetime_format(column_name),
+                errors='coerce'
+            )
+        return self._datetimes[column_name]
+
+    def invalid_datetimes(self, column_name):
+        """Mask of values present in the data that do not match the declared format"""
+        return (self.df[column_name].notna() & self.datetimes(column_name).isna()).to_numpy()
+
+    def comparable(self, column_name):
+        """Column as an array that orders correctly: parsed datetimes or numbers"""
+        if self.sdtype(column_name) == 'datetime':
+            return self.datetimes(column_name).to_numpy(dtype='datetime64[ns]')
+        return self.numeric(column_name)
+
+    def sdtype(self, column_name):
+        return self.columns_metadata.get(column_name, {}).get('sdtype')
+
+def has_fractional_values(series):
+    """Vectorized check for values that would not fit an integer representation"""
+    values = series.dropna()
+    if values.empty or pd.api.types.is_bool_dtype(values):
+        return False
+    if pd.api.types.is_integer_dtype(values):
+        return False
+    if pd.api.types.is_float_dtype(values):
+        # Float columns always print with a decimal point
+        return True
+    return bool(values.astype(str).str.contains('.', regex=False).any())
+
+def _compare_outside(values, low, high, strict):
+    if strict:
+        return (values <= low) | (values >= high)
+    return (values < low) | (values > high)
+
+@register_checker('ScalarRange')
+def check_scalar_range(context, params):
+    column = params.get('column_name')
+    if not column:
+        raise ConstraintError("❌ ScalarRange constraint missing column_name")
+    if column not in context.columns_metadata:
+        raise ConstraintError(f"❌ ScalarRange constraint: Column '{column}' not found")
+
+    strict_boundaries = params.get('strict_boundaries', False)
+    boundary_type = "strictly between" if strict_boundaries else "between"
+    sdtype = context.sdtype(column)
+
+    if sdtype == 'datetime':
+        datetime_format = context.datetime_format(column)
+        try:
+            low_dt = datetime.strptime(str(params['low_value']), datetime_format)
+            high_dt = datetime.strptime(str(params['high_value']), datetime_format)
+        except ValueError as e:
+            raise ConstraintError(
+                f"❌ ScalarRange constraint error: Invalid datetime format for column '{column}'. Error: {str(e)}"
+            )
+        # Values that do not parse are reported by the column check, not here
+        mask = _compare_outside(
+            context.comparable(column),
+            np.datetime64(low_dt),
+            np.datetime64(high_dt),
+            strict_boundaries
+        )
+        message = (
+            f"❌ ScalarRange constraint violated: {column} should be {boundary_type} "
+            f"{params['low_value']} and {params['high_value']}"
+        )
+    elif sdtype in ['numerical', 'id']:
+        try:
+            low_value = float(params['low_value'])
+            high_value = float(params['high_value'])
+        except ValueError as e:
+            raise ConstraintError(
+                f"❌ ScalarRange constraint error: Invalid numeric values for column '{column}'. Error: {str(e)}"
+            )
+        mask = _compare_outside(context.numeric(column), low_value, high_value, strict_boundaries)
+        message = (
+            f"❌ ScalarRange constraint violated: {column} should be {boundary_type} "
+            f"{low_value} and {high_value}"
+        )
+    else:
+        return None
+
+    return mask, [column], message
+
+@register_checker('Inequality')
+def check_inequality(context, params):
+    low_col = params['low_column_name']
+    high_col = params['high_column_name']
+    mask = context.comparable(low_col) >= context.comparable(high_col)
+    return mask, [low_col, high_col], f"❌ Inequality constraint violated: {low_col} should be less than {high_col}"
+
+@register_checker('Range')
+def check_range(context, params):
+    low_col = params['low_column_name']
+    mid_col = params['middle_column_name']
+    high_col = params['high_column_name']
+    mid_values = context.comparable(mid_col)
+    mask = (context.comparable(low_col) >= mid_values) | (mid_values >= context.comparable(high_col))
+    return mask, [low_col, mid_col, high_col], f"❌ Range constraint violated for {low_col} ≤ {mid_col} ≤ {high_col}"
+
+# Relation required by a ScalarInequality, mapped to the comparison that violates it
+_VIOLATING_COMPARISONS = {
+    '>': np.less_equal,
+    '>=': np.less,
+    '<': np.greater_equal,
+    '<=': np.greater
+}
+
+@register_checker('ScalarInequality')
+def check_scalar_inequality(context, params):
+    column = params['column_name']
+    relation = params['relation']
+    if relation not in _VIOLATING_COMPARISONS:
+        raise ConstraintError(f"❌ ScalarInequality constraint: Unknown relation '{relation}' for column '{column}'")
+    try:
+        value = float(params['value'])
+    except (TypeError, ValueError):
+        raise ConstraintError(f"❌ ScalarInequality constraint: Invalid value '{params['value']}' for column '{column}'")
+
+    mask = _VIOLATING_COMPARISONS[relation](context.numeric(column), value)
+    return mask, [column], f"❌ ScalarInequality constraint violated: {column} should be {relation} {value}"
+
+@register_checker('Positive')
+def check_positive(context, params):
+    column = params['column_name']
+    mask = context.numeric(column) <= 0
+    return mask, [column], f"❌ Positive constraint violated: {column} should be positive"
+
+@register_checker('Negative')
+def check_negative(context, params):
+    column = params['column_name']
+    mask = context.numeric(column) >= 0
+    return mask, [column], f"❌ Negative constraint violated: {column} should be negative"
+
+@register_checker('OneHotEncoding')
+def check_one_hot_encoding(context, params):
+    columns = params['column_names']
+    row_sums = np.nansum(np.column_stack([context.numeric(column) for column in columns]), axis=1)
+    mask = row_sums != 1
+    return mask, columns, f"❌ OneHotEncoding constraint violated: Exactly one of {columns} should be 1"
+
+@register_checker('FixedIncrements')
+def check_fixed_increments(context, params):
+    column = params['column_name']
+    # The Metadata Manager saves the increment as 'increment'
+    increment_value = params.get('increment_value', params.get('increment'))
+    if not increment_value:
+        raise ConstraintError(f"❌ FixedIncrements constraint: Missing increment for column '{column}'")
+
+    with np.errstate(invalid='ignore'):
+        mask = np.mod(context.numeric(column), increment_value) != 0
+    return mask, [column], f"❌ FixedIncrements constraint violated: {column} should be in increments of {increment_value}"
+
+@register_checker('FixedCombinations')
+def check_fixed_combinations(context, params):
+    columns = params['column_names']
+    message = f"❌ FixedCombinations constraint violated: Invalid combinations found in {columns}"
+    if 'allowed_combinations' not in params:
+        # Without an explicit list the data's own combinations are the allowed ones
+        return np.zeros(len(context.df), dtype=bool), columns, message
+
+    data = context.df[columns]
+    allowed = pd.DataFrame(params['allowed_combinations'], columns=columns).drop_duplicates()
+    try:
+        allowed = allowed.astype(data.dtypes.to_dict())
+        merged = data.merge(allowed, on=columns, how='left', indicator=True)
+    except (TypeError, ValueError):
+        # Types that cannot be reconciled are compared as text
+        merged = data.astype(str).merge(allowed.astype(str), on=columns, how='left', indicator=True)
+
+    # A left join on deduplicated keys keeps the left row order and row count
+    mask = (merged['_merge'] == 'left_only').to_numpy()
+    return mask, columns, message
+
+@register_checker('CustomLogic')
+def check_custom_logic(context, params):
+    from utils.custom_logic import CustomLogicError, logic_mismatches
+
+    columns = [params['source_column'], params['target_column']]
+    try:
+        mask = logic_mismatches(context.df, params)
+    except CustomLogicError as e:
+        raise ConstraintError(f"❌ CustomLogic constraint error for {columns[1]}: {str(e)}")
+    message = f"❌ CustomLogic constraint violated: {columns[1]} should equal transform({columns[0]})"
+    return mask, columns, message
+
+def check_constraints(df, columns_metadata, constraints, context=None):
+    """Check every constraint against the data.
+
+    Returns ``(results, errors)``. Each result describes one constraint with its
+    violation count and a packed bitmap of violating rows; errors are messages
+    for constraints that could not be checked.
+    """
+    context = context or ValidationContext(df, columns_metadata)
+    results = []
+    errors = []
+
+    for constraint in constraints:
+        constraint_class = constraint.get('constraint_class')
+        checker = CONSTRAINT_CHECKERS.get(constraint_class)
+        if checker is None:
+            continue
+
+        params = constraint.get('constraint_parameters', {})
+        try:
+            checked = checker(context, params)
+        except ConstraintError as e:
+            errors.append(str(e))
+            continue
+        except KeyError as e:
+            errors.append(f"❌ {constraint_class} constraint: Missing parameter or column {e}")
+            continue
+        except TypeError as e:
+            # e.g. an Inequality between a datetime column and a numerical one
+            errors.append(f"❌ {constraint_class} constraint: Columns cannot be compared. Error: {str(e)}")
+            continue
+
+        if checked is None:
+            continue
+        mask, columns, message = checked
+        mask = np.asarray(mask, dtype=bool)
+        results.append({
+            'constraint': constraint_class,
+            'columns': columns,
+            'message': message,
+            'count': int(mask.sum()),
+            'num_rows': len(mask),
+            'bitmap': np.packbits(mask)
+        })
+
+    return results, errors
+
+def violation_rows(result, limit=None):
+    """Row positions flagged in a result's bitmap, optionally only the first ``limit``"""
+    mask = np.unpackbits(result['bitmap'], count=result['num_rows']).astype(bool)
+    rows = np.flatnonzero(mask)
+    return rows if limit is None else rows[:limit]
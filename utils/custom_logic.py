@@ -0,0 +1,303 @@
+import ast
+import builtins
+import functools
+import itertools
+import math
+import multiprocessing
+import os
+import re
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from utils.loaders import load_json
+from utils.model_registry import read_manifest
+from utils.storage import UPLOAD_DIR
+
+# Distinct source values above which transforms fan out across processes
+PARALLEL_MIN_VALUES = int(os.environ.get("SDV_APP_CUSTOM_LOGIC_PARALLEL_VALUES", "200000"))
+
+# Worker processes used for large transforms
+CUSTOM_LOGIC_WORKERS = int(os.environ.get("SDV_APP_CUSTOM_LOGIC_WORKERS", str(os.cpu_count() or 1)))
+
+# Builtins a transform may call; anything that reaches files, imports or code is left out
+SAFE_BUILTINS = {
+    name: getattr(builtins, name)
+    for name in [
+        'abs', 'all', 'any', 'bool', 'dict', 'divmod', 'enumerate', 'filter', 'float',
+        'int', 'isinstance', 'len', 'list', 'map', 'max', 'min', 'pow', 'range',
+        'reversed', 'round', 'set', 'sorted', 'str', 'sum', 'tuple', 'zip',
+        'Exception', 'ValueError', 'TypeError', 'KeyError', 'IndexError'
+    ]
+}
+
+# Functions a transform can use without importing them. Plain namespaces rather
+# than the modules themselves, so nothing those modules import is reachable.
+SAFE_NAMESPACES = {
+    'math': types.SimpleNamespace(**{name: getattr(math, name) for name in dir(math) if not name.startswith('_')}),
+    're': types.SimpleNamespace(**{
+        name: getattr(re, name)
+        for name in [
+            'compile', 'escape', 'findall', 'finditer', 'fullmatch', 'match', 'search', 'split', 'sub', 'subn',
+            'A', 'ASCII', 'I', 'IGNORECASE', 'M', 'MULTILINE', 'S', 'DOTALL', 'X', 'VERBOSE'
+        ]
+    })
+}
+
+# Attributes that lead to interpreter frames, format-string attribute lookups,
+# or pandas and numpy methods that read or write files
+DENIED_ATTRIBUTES = {
+    'gi_frame', 'gi_code', 'gi_yieldfrom', 'cr_frame', 'cr_code', 'ag_frame', 'ag_code', 'tb_frame', 'tb_next',
+    'f_back', 'f_builtins', 'f_code', 'f_globals', 'f_locals',
+    'format', 'format_map', 'eval', 'query', 'plot', 'hist', 'boxplot', 'style',
+    'tofile', 'dump', 'dumps', 'ctypes', 'to_string'
+}
+
+# Methods starting with "to_" write files, except these conversions
+ALLOWED_TO_ATTRIBUTES = {'to_dict', 'to_frame', 'to_list', 'to_numpy', 'to_period', 'to_timestamp'}
+
+# Seconds a snippet may run on one column before its process is stopped
+LOGIC_TIMEOUT = float(os.environ.get("SDV_APP_CUSTOM_LOGIC_TIMEOUT", "60"))
+
+# Idle runner processes kept for reuse; each call has a runner to itself
+_idle_runners = []
+_runners_lock = threading.Lock()
+
+class CustomLogicError(ValueError):
+    """A CustomLogic transform that is not allowed, does not compile or fails"""
+
+class CompiledLogic:
+    """A checked CustomLogic snippet and the transform functions it defines.
+
+    ``transform(value)`` maps one source value; an optional
+    ``transform_series(series)`` maps a whole column at once and is preferred.
+    The functions themselves only ever exist in the runner processes.
+    """
+
+    def __init__(self, source, has_transform=False, has_transform_series=False):
+        self.source = source
+        self.has_transform = has_transform
+        self.has_transform_series = has_transform_series
+
+def _check_tree(tree):
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom, ast.Global, ast.Nonlocal)):
+            raise CustomLogicError(f"{type(node).__name__} statements are not allowed in custom logic")
+        if isinstance(node, ast.Attribute) and (
+            node.attr.startswith('_')
+            or node.attr in DENIED_ATTRIBUTES
+            or (node.attr.startswith('to_') and node.attr not in ALLOWED_TO_ATTRIBUTES)
+        ):
+            raise CustomLogicError(f"Access to '{node.attr}' is not allowed in custom logic")
+        if isinstance(node, ast.Name) and node.id.startswith('__'):
+            raise CustomLogicError(f"Use of '{node.id}' is not allowed in custom logic")
+
+@functools.lru_cache(maxsize=128)
+def _define(source):
+    """Run a checked snippet's definitions; only ever called inside a runner process"""
+    namespace = {'__builtins__': SAFE_BUILTINS, **SAFE_NAMESPACES}
+    exec(compile(source, '<custom logic>', 'exec'), namespace)
+    transform = namespace.get('transform')
+    transform_series = namespace.get('transform_series')
+    return (transform if callable(transform) else None), (transform_series if callable(transform_series) else None)
+
+def _describe(source):
+    transform, transform_series = _define(source)
+    return transform is not None, transform_series is not None
+
+def _serve(connection):
+    """Runner process loop: call each requested function and send back its outcome"""
+    while True:
+        try:
+            function, args = connection.recv()
+        except EOFError:
+            return
+        try:
+            outcome = (True, function(*args))
+        except Exception as e:
+            outcome = (False, e)
+        try:
+            connection.send(outcome)
+        except Exception as e:
+            connection.send((False, CustomLogicError(f"Custom logic returned a value that cannot be sent back: {e}")))
+
+class _Runner:
+    """A spawned process that runs snippets, with the handle needed to stop it"""
+
+    def __init__(self):
+        context = multiprocessing.get_context("spawn")
+        self.connection, child_connection = context.Pipe()
+        # Daemonic, so an idle runner is ended when this process exits
+        self.process = context.Process(target=_serve, args=(child_connection,), name="custom-logic", daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.busy = False
+
+    def call(self, function, args, timeout):
+        self.busy = True
+        self.connection.send((function, args))
+        if not self.connection.poll(timeout):
+            self.stop()
+            raise CustomLogicError(f"Custom logic did not finish within {timeout:.0f} seconds")
+        try:
+            succeeded, value = self.connection.recv()
+        except EOFError:
+            self.stop()
+            raise CustomLogicError("Custom logic stopped its process unexpectedly")
+        self.busy = False
+        if not succeeded:
+            raise value
+        return value
+
+    def stop(self):
+        self.busy = False
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+def _run(function, *args, timeout=None):
+    """Call ``function`` in a runner process of its own, stopping it after ``timeout`` seconds.
+
+    Concurrent calls, e.g. from different sessions, never share a runner, so
+    stopping one never disturbs another. Runners are reused once a call ends.
+    """
+    with _runners_lock:
+        runner = _idle_runners.pop() if _idle_runners else None
+    if runner is not None and not runner.process.is_alive():
+        runner.stop()
+        runner = None
+    if runner is None:
+        runner = _Runner()
+    try:
+        return runner.call(function, args, timeout or LOGIC_TIMEOUT)
+    finally:
+        # A runner interrupted mid-call still owes a reply, so it is stopped
+        # rather than reused; one whose transform merely raised is kept
+        if runner.busy:
+            runner.stop()
+        elif runner.process.is_alive():
+            _release(runner)
+
+def _release(runner):
+    with _runners_lock:
+        if len(_idle_runners) < CUSTOM_LOGIC_WORKERS:
+            _idle_runners.append(runner)
+            return
+    runner.stop()
+
+@functools.lru_cache(maxsize=128)
+def compile_logic(source):
+    """Check a CustomLogic snippet and find the transforms it defines.
+
+    The checks reject imports, private attributes and known escape routes,
+    and the snippet only ever runs in a separate process with a time limit.
+    They guard against mistakes, not hostile code: only load metadata from
+    people you trust.
+    """
+    try:
+        tree = ast.parse(source, mode='exec')
+        compile(tree, '<custom logic>', 'exec')
+    except SyntaxError as e:
+        raise CustomLogicError(f"Custom logic does not compile: {e}")
+    _check_tree(tree)
+
+    try:
+        has_transform, has_transform_series = _run(_describe, source)
+    except CustomLogicError:
+        raise
+    except Exception as e:
+        raise CustomLogicError(f"Custom logic failed while loading: {e}")
+    if not has_transform and not has_transform_series:
+        raise CustomLogicError("Custom logic must define transform(source_value) or transform_series(series)")
+    return CompiledLogic(source, has_transform, has_transform_series)
+
+def _map_values(source, values):
+    transform, _ = _define(source)
+    mapped = []
+    for value in values:
+        try:
+            mapped.append(transform(value))
+        except Exception as e:
+            raise CustomLogicError(f"transform({value!r}) failed: {e}")
+    return mapped
+
+def _transform_series(source, series):
+    _, transform_series = _define(source)
+    try:
+        result = transform_series(series)
+    except Exception as e:
+        raise CustomLogicError(f"transform_series failed: {e}")
+    return pd.Series(result, index=series.index)
+
+def apply_logic(logic, series, workers=None, timeout=None):
+    """Run a compiled transform over a column in a separate process.
+
+    The series-level variant runs when defined. Otherwise each distinct
+    non-null value is transformed once and the results are broadcast back;
+    with many distinct values the work is split across several processes.
+    Missing source values stay missing. A call longer than ``timeout``
+    seconds (``SDV_APP_CUSTOM_LOGIC_TIMEOUT`` by default) is stopped and
+    raises ``CustomLogicError``.
+    """
+    timeout = timeout or LOGIC_TIMEOUT
+    if logic.has_transform_series:
+        return _run(_transform_series, logic.source, series.copy(), timeout=timeout)
+
+    codes, uniques = pd.factorize(series)
+    uniques = list(uniques)
+    workers = workers or CUSTOM_LOGIC_WORKERS
+    if workers > 1 and len(uniques) >= PARALLEL_MIN_VALUES:
+        batches = [[uniques[i] for i in batch] for batch in np.array_split(np.arange(len(uniques)), workers * 4)]
+        # Each thread drives a runner process of its own
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            mapped = list(itertools.chain.from_iterable(pool.map(
+                lambda batch: _run(_map_values, logic.source, batch, timeout=timeout), batches
+            )))
+    else:
+        mapped = _run(_map_values, logic.source, uniques, timeout=timeout)
+
+    # Position -1 marks a missing source value
+    lookup = np.empty(len(mapped) + 1, dtype=object)
+    lookup[:len(mapped)] = mapped
+    lookup[-1] = None
+    return pd.Series(lookup[codes], index=series.index)
+
+def logic_constraints(constraints):
+    """The CustomLogic entries of a metadata constraint list"""
+    return [
+        constraint for constraint in constraints or []
+        if constraint.get('constraint_class') == 'CustomLogic'
+    ]
+
+def logic_mismatches(df, params, workers=None):
+    """Mask of rows whose target value differs from the transformed source value"""
+    logic = compile_logic(params['transform_function'])
+    expected = apply_logic(logic, df[params['source_column']], workers)
+    actual = df[params['target_column']]
+
+    both_missing = (expected.isna() & actual.isna()).to_numpy()
+    # Numbers and their text form count as equal, e.g. 7 and "7"
+    same = (expected == actual).fillna(False).to_numpy(dtype=bool) | (
+        expected.astype(str) == actual.astype(str)
+    ).to_numpy()
+    return ~(same | both_missing)
+
+def apply_custom_logic(df, constraints, workers=None):
+    """Overwrite every CustomLogic target column with the transform of its source column"""
+    for constraint in logic_constraints(constraints):
+        params = constraint['constraint_parameters']
+        logic = compile_logic(params['transform_function'])
+        df[params['target_column']] = apply_logic(logic, df[params['source_column']], workers)
+    return df
+
+def model_custom_logic(model_path):
+    """CustomLogic constraints from the metadata a saved model was trained with"""
+    manifest = read_manifest(model_path) or {}
+    metadata_file = manifest.get('metadata_file')
+    if not metadata_file:
+        return []
+    metadata_path = os.path.join(UPLOAD_DIR, metadata_file)
+    if not os.path.exists(metadata_path):
+        return []
+    return logic_constraints(load_json(metadata_path).get('constraints', []))
@@ -0,0 +1,79 @@
+import gzip
+import os
+import pyarrow as pa
+from utils.storage import cache_path, convert_csv, is_stale
+
+# Size of each byte chunk streamed during an export
+CHUNK_SIZE = 8 * 1024 * 1024
+
+COMPRESSION_EXTENSIONS = {
+    None: "",
+    "gzip": ".gz",
+    "zstd": ".zst"
+}
+
+EXPORT_FORMATS = ["Original", "Parquet"]
+
+def iter_chunks(path, chunk_size=CHUNK_SIZE):
+    """Yield a file's bytes in fixed-size chunks"""
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            yield chunk
+
+def _open_compressed(path, compression):
+    if compression == "gzip":
+        return gzip.open(path, 'wb')
+    if compression == "zstd":
+        return pa.CompressedOutputStream(path, "zstd")
+    return open(path, 'wb')
+
+def export_path(path, export_format="Original", compression=None):
+    """Return where an export of a file with the given options is written"""
+    filename = os.path.basename(path)
+    if export_format == "Parquet":
+        codec = f".{compression}" if compression else ""
+        filename = f"{os.path.splitext(filename)[0]}{codec}.parquet"
+    else:
+        filename += COMPRESSION_EXTENSIONS[compression]
+    return cache_path("exports", filename)
+
+def export_artifact(path, export_format="Original", compression=None):
+    """Write a download-ready copy of a file, streaming it chunk by chunk.
+
+    Exports are reused until the source file changes. Parquet exports of CSVs
+    use the requested codec inside the Parquet file instead of wrapping it.
+    """
+    if compression not in COMPRESSION_EXTENSIONS:
+        raise ValueError(f"Unsupported compression: {compression}")
+    if export_format == "Parquet" and not path.endswith('.csv'):
+        raise ValueError("Only CSV files can be exported as Parquet")
+
+    if export_format == "Original" and compression is None:
+        # Nothing to transform, so the file itself is the payload
+        return path
+
+    out_path = export_path(path, export_format, compression)
+    if not is_stale(path, out_path):
+        return out_path
+
+    if export_format == "Parquet":
+        return convert_csv(path, out_path, compression=compression or "snappy")
+
+    tmp_path = f"{out_path}.part"
+    with _open_compressed(tmp_path, compression) as out:
+        for chunk in iter_chunks(path):
+            out.write(chunk)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+def remove_exports(path):
+    """Delete every export made from a file"""
+    for export_format in EXPORT_FORMATS:
+        for compression in COMPRESSION_EXTENSIONS:
+            out_path = export_path(path, export_format, compression)
+            if os.path.exists(out_path):
+                os.remove(out_path)
+
+def download_name(path, export_format="Original", compression=None):
+    """File name offered to the browser for an export"""
+    return os.path.basename(export_path(path, export_format, compression))
@@ -0,0 +1,136 @@
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+import pyarrow.parquet as pq
+from utils.ingest import count_rows
+from utils.storage import UPLOAD_DIR, cache_path
+
+TYPE_BY_EXTENSION = {
+    'csv': 'Data File',
+    'parquet': 'Data File',
+    'xlsx': 'Data File',
+    'json': 'Metadata File',
+    'pkl': 'Model File'
+}
+
+def _connect():
+    connection = sqlite3.connect(cache_path("file_index.sqlite"), timeout=30)
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS files (
+            filename TEXT PRIMARY KEY,
+            size INTEGER,
+            mtime_ns INTEGER,
+            rows INTEGER,
+            columns INTEGER,
+            schema_hash TEXT,
+            file_type TEXT,
+            indexed_at TEXT
+        )
+    """)
+    return connection
+
+def _schema_hash(column_names):
+    return hashlib.sha1("\x1f".join(map(str, column_names)).encode()).hexdigest()[:16]
+
+def detect_file_type(file_path):
+    """Detect what kind of artifact a file is, looking inside JSON files"""
+    extension = file_path.split('.')[-1].lower()
+    if extension == 'json':
+        try:
+            with open(file_path, 'r') as f:
+                content = json.load(f)
+            return 'Metadata File' if isinstance(content, dict) and 'tables' in content else 'JSON File'
+        except (OSError, ValueError):
+            return 'Unknown'
+    return TYPE_BY_EXTENSION.get(extension, 'Unknown')
+
+def scan_file(file_path):
+    """Compute row count, column count and schema hash without loading the data"""
+    extension = file_path.split('.')[-1].lower()
+    rows, column_names = None, None
+
+    if extension == 'csv':
+        with open(file_path, 'r', newline='') as f:
+            column_names = next(csv.reader(f), [])
+        with open(file_path, 'rb') as f:
+            rows = count_rows(f)
+    elif extension == 'parquet':
+        # Row and column counts come straight from the Parquet footer
+        parquet_metadata = pq.ParquetFile(file_path).metadata
+        rows = parquet_metadata.num_rows
+        column_names = parquet_metadata.schema.names
+    elif extension == 'xlsx':
+        import pandas as pd
+        df = pd.read_excel(file_path)
+        rows = len(df)
+        column_names = list(df.columns)
+
+    return {
+        "rows": rows,
+        "columns": len(column_names) if column_names is not None else None,
+        "schema_hash": _schema_hash(column_names) if column_names is not None else None,
+        "file_type": detect_file_type(file_path)
+    }
+
+def refresh_index(directory=UPLOAD_DIR):
+    """Bring the index up to date, rescanning only files whose size or mtime changed.
+
+    Returns a mapping of filename to its index entry.
+    """
+    filenames = [f for f in os.listdir(directory) if not f.startswith('.')]
+    connection = _connect()
+    try:
+        indexed = {
+            row[0]: row
+            for row in connection.execute("SELECT * FROM files")
+        }
+
+        for filename in filenames:
+            file_path = os.path.join(directory, filename)
+            if not os.path.isfile(file_path):
+                continue
+            stat = os.stat(file_path)
+            entry = indexed.get(filename)
+            if entry and entry[1] == stat.st_size and entry[2] == stat.st_mtime_ns:
+                continue
+
+            try:
+                details = scan_file(file_path)
+            except Exception:
+                # Unreadable files are still listed, just without counts
+                details = {"rows": None, "columns": None, "schema_hash": None,
+                           "file_type": detect_file_type(file_path)}
+
+            connection.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (filename, stat.st_size, stat.st_mtime_ns, details["rows"], details["columns"],
+                 details["schema_hash"], details["file_type"],
+                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+
+        # Drop entries for files that no longer exist
+        for filename in set(indexed) - set(filenames):
+            connection.execute("DELETE FROM files WHERE filename = ?", (filename,))
+        connection.commit()
+
+        cursor = connection.execute("SELECT * FROM files")
+        fields = [description[0] for description in cursor.description]
+        return {row[0]: dict(zip(fields, row)) for row in cursor}
+    finally:
+        connection.close()
+
+def rename_entry(old_name, new_name):
+    """Carry an entry over to a renamed file so it is not rescanned"""
+    connection = _connect()
+    try:
+        connection.execute("DELETE FROM files WHERE filename = ?", (new_name,))
+        connection.execute(
+            "UPDATE files SET filename = ? WHERE filename = ?",
+            (new_name, old_name)
+        )
+        connection.commit()
+    finally:
+        connection.close()
@@ -0,0 +1,62 @@
+import os
+import shutil
+import pandas as pd
+
+# Size of each raw byte chunk copied or scanned from an upload
+CHUNK_SIZE = 8 * 1024 * 1024
+# Number of leading rows parsed to infer column types and build the preview
+SCAN_ROWS = 10000
+PREVIEW_ROWS = 5
+
+def save_upload(uploaded_file, save_path, chunk_size=CHUNK_SIZE):
+    """Stream an uploaded file to disk as raw bytes, without parsing it"""
+    directory, filename = os.path.split(save_path)
+    tmp_path = os.path.join(directory, f".{filename}.part")
+
+    uploaded_file.seek(0)
+    try:
+        with open(tmp_path, 'wb') as out:
+            shutil.copyfileobj(uploaded_file, out, chunk_size)
+        os.replace(tmp_path, save_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        uploaded_file.seek(0)
+
+    return save_path
+
+def count_rows(file_obj, chunk_size=CHUNK_SIZE):
+    """Count data rows (excluding the header) by scanning newlines chunk by chunk.
+
+    Memory use is bounded by ``chunk_size``. Quoted fields that contain line
+    breaks are counted as extra rows.
+    """
+    file_obj.seek(0)
+    lines = 0
+    last_byte = b""
+    while True:
+        chunk = file_obj.read(chunk_size)
+        if not chunk:
+            break
+        lines += chunk.count(b"\n")
+        last_byte = chunk[-1:]
+    file_obj.seek(0)
+
+    # Account for a final line without a trailing newline
+    if last_byte and last_byte != b"\n":
+        lines += 1
+    return max(lines - 1, 0)
+
+def summarize_csv(file_obj, scan_rows=SCAN_ROWS, preview_rows=PREVIEW_ROWS):
+    """Build a row/column/dtype summary of a CSV from a bounded scan"""
+    file_obj.seek(0)
+    sample = pd.read_csv(file_obj, nrows=scan_rows)
+    file_obj.seek(0)
+
+    return {
+        "rows": count_rows(file_obj),
+        "columns": len(sample.columns),
+        "dtypes": sample.dtypes,
+        "scanned_rows": len(sample),
+        "preview": sample.head(preview_rows)
+    }
@@ -0,0 +1,123 @@
+import copy
+import json
+import os
+import threading
+from collections import OrderedDict
+from utils.export import remove_exports
+from utils.storage import file_hash, load_table, remove_derived
+
+# Approximate memory budget shared by every session of the app process
+MEMORY_BUDGET_MB = int(os.environ.get("SDV_APP_CACHE_MB", "1024"))
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by the total size of its entries"""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value, size):
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._size += size
+            # Always keep the newest entry, even when it alone exceeds the budget
+            while self._size > self.budget_bytes and len(self._entries) > 1:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, path):
+        """Drop every entry loaded from ``path``"""
+        path = os.path.abspath(path)
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == path]:
+                self._size -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_mb": self._size / (1024 * 1024),
+                "budget_mb": self.budget_bytes / (1024 * 1024),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+# Module-level state lives as long as the server process, so it is shared across sessions
+_cache = LRUCache(MEMORY_BUDGET_MB * 1024 * 1024)
+
+def file_key(path):
+    """Identify a file version by absolute path, modification time and size"""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+def _cached(kind, path, extra, load, sizeof):
+    key = (kind,) + file_key(path) + extra
+    value = _cache.get(key)
+    if value is None:
+        value = load()
+        _cache.put(key, value, sizeof(value))
+    return value
+
+def load_frame(path, metadata_path=None, columns=None):
+    """Load a CSV as a DataFrame through the shared cache.
+
+    The returned frame is shared between sessions and must be treated as read-only.
+    """
+    extra = (
+        file_key(metadata_path) if metadata_path else None,
+        tuple(columns) if columns else None
+    )
+    return _cached(
+        "frame", path, extra,
+        lambda: load_table(path, metadata_path, columns),
+        lambda df: int(df.memory_usage(deep=True).sum())
+    )
+
+def load_json(path):
+    """Load a JSON file through the shared cache, returning a private copy"""
+    content = _cached(
+        "json", path, (),
+        lambda: _read_json(path),
+        lambda _: os.path.getsize(path)
+    )
+    return copy.deepcopy(content)
+
+def content_hash(path):
+    """Hash a file's contents once per file version"""
+    return _cached("hash", path, (), lambda: file_hash(path), lambda digest: len(digest))
+
+def invalidate(path):
+    """Forget cached and derived copies of a file that was changed, renamed or deleted"""
+    _cache.invalidate(path)
+    remove_derived(path)
+    remove_exports(path)
+
+def cache_stats():
+    return _cache.stats()
+
+def _read_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from utils.loaders import LRUCache
+from utils.metadata_loader import saved_columns, saved_table
+from utils.storage import cache_path
+
+# Leading rows hashed into each column's fingerprint
+FINGERPRINT_ROWS = 1000
+
+# Compiled metadata dicts kept in memory, one unit each
+COMPILED_ENTRIES = 64
+
+_compiled = LRUCache(COMPILED_ENTRIES)
+
+def column_fingerprint(data, column_name):
+    """Fingerprint one column by name, dtype and a hash of its leading values"""
+    values = data[column_name].head(FINGERPRINT_ROWS)
+    value_hash = pd.util.hash_pandas_object(values, index=False).to_numpy()
+    digest = hashlib.sha1()
+    digest.update(str(column_name).encode())
+    digest.update(str(data[column_name].dtype).encode())
+    digest.update(np.ascontiguousarray(value_hash).tobytes())
+    return digest.hexdigest()
+
+def schema_fingerprint(data):
+    """Fingerprint a table's schema as the per-column fingerprints plus one combined hash"""
+    columns = {column_name: column_fingerprint(data, column_name) for column_name in data.columns}
+    combined = hashlib.sha1(json.dumps(list(columns.items())).encode()).hexdigest()
+    return combined, columns
+
+def _detection_path(fingerprint):
+    return cache_path("metadata", "columns", f"{fingerprint}.json")
+
+def detect_columns(data, fingerprints):
+    """Detect column metadata, re-running detection only for columns not seen before.
+
+    Detected columns are stored by column fingerprint, so a new version of a
+    file only pays for the columns that were added or changed.
+    """
+    detected = {}
+    missing = []
+    for column_name, fingerprint in fingerprints.items():
+        path = _detection_path(fingerprint)
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                detected[column_name] = json.load(f)
+        else:
+            missing.append(column_name)
+
+    if missing:
+        from sdv.metadata import SingleTableMetadata
+        metadata = SingleTableMetadata()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            metadata.detect_from_dataframe(data[missing])
+        for column_name in missing:
+            column_metadata = metadata.columns[str(column_name)]
+            with open(_detection_path(fingerprints[column_name]), 'w') as f:
+                json.dump(column_metadata, f)
+            detected[column_name] = column_metadata
+
+    columns = {str(column_name): detected[column_name] for column_name in fingerprints}
+
+    # As in SDV's detection, every ID column after the first is demoted
+    id_columns = [name for name, info in columns.items() if info['sdtype'] == 'id']
+    for column_name in id_columns[1:]:
+        columns[column_name] = {'sdtype': 'unknown', 'pii': True}
+    return columns
+
+def compile_metadata(data, saved_metadata, use_primary_key=False):
+    """Build SingleTableMetadata for a DataFrame and the saved metadata JSON.
+
+    Columns described in the saved JSON take its sdtype, computer_representation
+    and datetime_format as they are; only the remaining columns are detected,
+    reusing earlier detections by column fingerprint. A fully specified table
+    skips detection entirely. Training uses no primary key; ``use_primary_key``
+    keeps the saved one, or else the first saved ID column, for evaluation.
+    """
+    # Imported here: SDV loads torch, which pages that never compile metadata should not pay for
+    from sdv.metadata import SingleTableMetadata
+
+    schema_hash, fingerprints = schema_fingerprint(data)
+    saved_hash = hashlib.sha1(json.dumps(saved_metadata, sort_keys=True).encode()).hexdigest()
+    key = ("compiled", schema_hash, saved_hash, use_primary_key)
+
+    compiled = _compiled.get(key)
+    if compiled is None:
+        saved = saved_columns(saved_metadata, keep=('computer_representation', 'datetime_format'))
+        unsaved = {
+            column_name: fingerprint for column_name, fingerprint in fingerprints.items()
+            if str(column_name) not in saved
+        }
+        detected = detect_columns(data, unsaved) if unsaved else {}
+        columns = {
+            str(column_name): saved.get(str(column_name)) or detected[str(column_name)]
+            for column_name in data.columns
+        }
+        metadata = SingleTableMetadata.load_from_dict({
+            'columns': columns,
+            'METADATA_SPEC_VERSION': 'SINGLE_TABLE_V1'
+        })
+
+        primary_key = None
+        if use_primary_key:
+            _, table_metadata = saved_table(saved_metadata)
+            candidates = [table_metadata.get('primary_key')] + [
+                name for name, props in table_metadata['columns'].items() if props['sdtype'] == 'id'
+            ]
+            primary_key = next(
+                (name for name in candidates if metadata.columns.get(name, {}).get('sdtype') == 'id'),
+                None
+            )
+        metadata.set_primary_key(primary_key)
+
+        compiled = metadata.to_dict()
+        _compiled.put(key, compiled, 1)
+
+    # Callers get their own object, so edits never leak into the cache
+    return SingleTableMetadata.load_from_dict(compiled)
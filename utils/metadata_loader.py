@@ -0,0 +1,84 @@
+import copy
+from utils.loaders import LRUCache, content_hash, load_json
+
+# SDV loads torch on import, so it is imported inside the functions that build metadata
+
+# Parsed metadata files kept in memory, one unit each
+PARSED_ENTRIES = 64
+
+# Column settings from the saved JSON that SDV accepts for each sdtype;
+# other sdtypes are PII types, which only take the pii flag
+COLUMN_KWARGS = {
+    'numerical': ('computer_representation',),
+    'datetime': ('datetime_format',),
+    'id': ('regex_format',),
+    'categorical': ('order', 'order_by'),
+    'boolean': ()
+}
+
+_parsed = LRUCache(PARSED_ENTRIES)
+
+def saved_table(saved_metadata):
+    """Return the first table's name and settings from saved metadata JSON"""
+    table_name = list(saved_metadata['tables'].keys())[0]
+    return table_name, saved_metadata['tables'][table_name]
+
+def saved_columns(saved_metadata, keep=None):
+    """Column metadata from saved JSON, limited to settings valid for each sdtype.
+
+    ``keep``, when given, further limits which settings are carried over.
+    """
+    _, table_metadata = saved_table(saved_metadata)
+    columns = {}
+    for column_name, column_props in table_metadata.get('columns', {}).items():
+        sdtype = column_props['sdtype']
+        allowed = COLUMN_KWARGS.get(sdtype, ('pii',))
+        columns[column_name] = {
+            'sdtype': sdtype,
+            **{
+                key: value for key, value in column_props.items()
+                if key in allowed and (keep is None or key in keep) and value is not None
+            }
+        }
+    return columns
+
+def metadata_from_content(saved_metadata):
+    """Build SingleTableMetadata straight from saved JSON, without a detection pass.
+
+    Returns ``(metadata, table_name, constraints)``; ``constraints`` is None
+    when the file has no constraint list.
+    """
+    table_name, table_metadata = saved_table(saved_metadata)
+    columns = saved_columns(saved_metadata)
+    metadata_dict = {
+        'columns': columns,
+        'METADATA_SPEC_VERSION': 'SINGLE_TABLE_V1'
+    }
+    if table_metadata.get('primary_key') in columns:
+        metadata_dict['primary_key'] = table_metadata['primary_key']
+    if table_metadata.get('sequence_key') in columns:
+        metadata_dict['sequence_key'] = table_metadata['sequence_key']
+    alternate_keys = [key for key in table_metadata.get('alternate_keys') or [] if key in columns]
+    if alternate_keys:
+        metadata_dict['alternate_keys'] = alternate_keys
+
+    from sdv.metadata import SingleTableMetadata
+    metadata = SingleTableMetadata.load_from_dict(metadata_dict)
+    return metadata, table_name, saved_metadata.get('constraints')
+
+def load_saved_metadata(metadata_path):
+    """Load a saved metadata JSON file as SingleTableMetadata.
+
+    Parsing is memoized by file content hash. Every call returns fresh copies,
+    so callers can edit the metadata and constraints freely.
+    """
+    key = ("saved_metadata", content_hash(metadata_path))
+    parsed = _parsed.get(key)
+    if parsed is None:
+        metadata, table_name, constraints = metadata_from_content(load_json(metadata_path))
+        parsed = (metadata.to_dict(), table_name, constraints)
+        _parsed.put(key, parsed, 1)
+
+    from sdv.metadata import SingleTableMetadata
+    metadata_dict, table_name, constraints = parsed
+    return SingleTableMetadata.load_from_dict(metadata_dict), table_name, copy.deepcopy(constraints)
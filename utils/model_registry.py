@@ -0,0 +1,110 @@
+import json
+import os
+import pickle
+from datetime import datetime
+from utils.loaders import LRUCache, file_key
+from utils.storage import UPLOAD_DIR, cache_path, file_hash
+
+# Number of unpickled synthesizers kept in memory per server process
+HOT_MODELS = int(os.environ.get("SDV_APP_HOT_MODELS", "3"))
+
+# Each hot model counts as one unit of the budget
+_hot_models = LRUCache(HOT_MODELS)
+
+def manifest_path(model_path):
+    """Return the sidecar manifest path for a model file"""
+    return cache_path("models", f"{os.path.basename(model_path)}.json")
+
+def write_manifest(model_path, data_path=None, metadata_path=None, **info):
+    """Record how a model was trained so listing it never requires unpickling"""
+    manifest = {
+        "model_file": os.path.basename(model_path),
+        "file_size": os.path.getsize(model_path),
+        "saved_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "data_file": os.path.basename(data_path) if data_path else None,
+        "data_hash": file_hash(data_path) if data_path else None,
+        "metadata_file": os.path.basename(metadata_path) if metadata_path else None
+    }
+    manifest.update(info)
+
+    with open(manifest_path(model_path), 'w') as f:
+        json.dump(manifest, f, indent=4)
+    return manifest
+
+def read_manifest(model_path):
+    """Read a model's manifest, or None when the model predates manifests"""
+    path = manifest_path(model_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def list_models(model_dir=UPLOAD_DIR, kind=None):
+    """List saved models with their manifests, without loading any of them.
+
+    ``kind`` limits the list to 'single_table' or 'multi_table' models; models
+    whose manifest records no kind are single-table.
+    """
+    models = []
+    for filename in sorted(os.listdir(model_dir)):
+        if not filename.endswith('.pkl'):
+            continue
+        model_path = os.path.join(model_dir, filename)
+        manifest = read_manifest(model_path) or {}
+        if kind is not None and manifest.get("kind", "single_table") != kind:
+            continue
+        models.append({
+            **manifest,
+            "model_file": filename,
+            "file_size": os.path.getsize(model_path),
+            "has_manifest": bool(manifest)
+        })
+    return models
+
+def load_model(model_path):
+    """Load a synthesizer, reusing the in-process copy while the file is unchanged"""
+    key = ("model",) + file_key(model_path)
+    model = _hot_models.get(key)
+    if model is None:
+        with open(model_path, 'rb') as f:
+            model = pickle.load(f)
+        _hot_models.put(key, model, 1)
+    return model
+
+def evict_model(model_path=None):
+    """Drop one model, or every model when no path is given, from memory"""
+    if model_path is None:
+        _hot_models.clear()
+    else:
+        _hot_models.invalidate(model_path)
+
+def registry_stats():
+    """Report hot-model cache usage"""
+    stats = _hot_models.stats()
+    return {
+        "hot_models": stats["entries"],
+        "capacity": HOT_MODELS,
+        "hits": stats["hits"],
+        "misses": stats["misses"],
+        "evictions": stats["evictions"]
+    }
+
+def model_removed(model_path):
+    """Forget a deleted model and its manifest"""
+    evict_model(model_path)
+    path = manifest_path(model_path)
+    if os.path.exists(path):
+        os.remove(path)
+
+def model_renamed(old_path, new_path):
+    """Move a renamed model's manifest along with it"""
+    evict_model(old_path)
+    old_manifest = manifest_path(old_path)
+    if not os.path.exists(old_manifest):
+        return
+    with open(old_manifest, 'r') as f:
+        manifest = json.load(f)
+    manifest["model_file"] = os.path.basename(new_path)
+    with open(manifest_path(new_path), 'w') as f:
+        json.dump(manifest, f, indent=4)
+    os.remove(old_manifest)
@@ -0,0 +1,60 @@
+import importlib
+import os
+import sys
+import threading
+import time
+
+# Set to 0 for import-budget mode: heavy libraries load only when a page first uses them
+PRELOAD = os.environ.get("SDV_APP_PRELOAD", "1") != "0"
+
+# Libraries that take seconds to import; pages import them lazily, the preload warms them early
+HEAVY_MODULES = [
+    'torch',
+    'sdv.metadata',
+    'sdv.single_table',
+    'sdv.evaluation.single_table',
+    'sdmetrics'
+]
+
+_lock = threading.Lock()
+_thread = None
+_timings = {}
+
+def _preload(modules):
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception:
+            # A page importing the module later reports the error properly
+            continue
+        _timings[name] = time.perf_counter() - start
+
+def start_preload(modules=HEAVY_MODULES):
+    """Import heavy libraries in a daemon thread, once per server process"""
+    global _thread
+    with _lock:
+        if _thread is None and PRELOAD:
+            _thread = threading.Thread(target=_preload, args=(list(modules),), name="preload", daemon=True)
+            _thread.start()
+    return _thread
+
+def start_preload_in_server():
+    """Start the preload when running inside the Streamlit server.
+
+    Called from a module every page imports, so the preload also starts
+    when a session opens a page directly. Worker processes, CLIs and tests
+    never import Streamlit's runtime and so never start it.
+    """
+    if 'streamlit' not in sys.modules:
+        return None
+    from streamlit import runtime
+    return start_preload() if runtime.exists() else None
+
+def preload_status():
+    """Whether the preload is enabled and running, and how long each finished import took"""
+    return {
+        "enabled": PRELOAD,
+        "running": _thread is not None and _thread.is_alive(),
+        "seconds": dict(_timings)
+    }
@@ -0,0 +1,354 @@
+import itertools
+import json
+import math
+import os
+import re
+import warnings
+import numpy as np
+import pandas as pd
+from utils.ingest import count_rows
+from utils.loaders import content_hash
+from utils.storage import cache_path
+from utils.validation import KeySet
+
+# Rows kept in the stratified sample that metadata detection runs on
+PROFILE_SAMPLE_ROWS = int(os.environ.get("SDV_APP_PROFILE_SAMPLE_ROWS", "50000"))
+
+# Rows read per chunk while building the column sketches
+PROFILE_CHUNK_ROWS = 200000
+
+# HyperLogLog registers are 2 ** precision; 14 gives about 0.8% standard error
+HLL_PRECISION = 14
+
+# Distinct values counted exactly per column before falling back to the sketch
+EXACT_DISTINCT_LIMIT = 100000
+
+# Bumped when detection changes, so profiles cached by older code are not reused
+PROFILE_VERSION = 2
+
+# Sampled values checked by the format sniffers
+SNIFF_VALUES = 1000
+
+DATETIME_FORMATS = [
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y/%m/%d',
+    '%m/%d/%Y',
+    '%d/%m/%Y',
+    '%m/%d/%Y %H:%M',
+    '%m/%d/%Y %H:%M:%S',
+    '%d-%m-%Y',
+    '%d.%m.%Y',
+    '%Y%m%d'
+]
+
+class HyperLogLog:
+    """Fixed-size cardinality sketch that can be updated chunk by chunk"""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, values):
+        self.add_hashes(pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64))
+
+    def add_hashes(self, hashes):
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        remaining = hashes << np.uint64(self.precision)
+
+        # Bit length from the float exponent of each 32-bit half, which floats hold exactly
+        high = np.frexp((remaining >> np.uint64(32)).astype(np.float64))[1]
+        low = np.frexp((remaining & np.uint64(0xFFFFFFFF)).astype(np.float64))[1]
+        bit_length = np.where(high > 0, 32 + high, low)
+        rank = np.minimum(64 - bit_length + 1, 64 - self.precision + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+class ColumnSketch:
+    """Null count, distinct-value sketch and number traits of one column.
+
+    Distinct values are counted exactly while there are few of them; past
+    ``EXACT_DISTINCT_LIMIT`` only the HyperLogLog estimate is kept.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.nulls = 0
+        self.distinct = HyperLogLog()
+        self.hashes = np.empty(0, dtype=np.uint64)
+        # Set by an exact uniqueness check when the estimate alone cannot settle it
+        self.unique = None
+        self.numeric = True
+        self.whole = True
+        self.positive = True
+
+    def _add(self, values):
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+        self.distinct.add_hashes(hashes)
+        if self.hashes is not None:
+            self.hashes = np.union1d(self.hashes, hashes)
+            if len(self.hashes) > EXACT_DISTINCT_LIMIT:
+                self.hashes = None
+
+    @property
+    def exact(self):
+        return self.hashes is not None
+
+    def distinct_count(self):
+        return len(self.hashes) if self.exact else self.distinct.count()
+
+    def update(self, values):
+        non_null = values.dropna()
+        self.count += len(non_null)
+        self.nulls += len(values) - len(non_null)
+        if non_null.empty:
+            return
+
+        if pd.api.types.is_numeric_dtype(non_null) and not pd.api.types.is_bool_dtype(non_null):
+            numbers = non_null.astype('float64')
+            self.whole = self.whole and bool((numbers == numbers.round()).all())
+            self.positive = self.positive and bool((numbers >= 0).all())
+            # Hash numbers as floats so int and float chunks of one column agree
+            self._add(numbers)
+        else:
+            self.numeric = False
+            self._add(non_null.astype(str))
+
+def sniff_datetime_format(values):
+    """Return the first known datetime format that parses every sampled value"""
+    values = pd.Series(values).dropna().astype(str).head(SNIFF_VALUES)
+    if values.empty:
+        return None
+    for datetime_format in DATETIME_FORMATS:
+        parsed = pd.to_datetime(values, format=datetime_format, errors='coerce')
+        if parsed.notna().all():
+            return datetime_format
+    return None
+
+def _char_class(char):
+    if 'A' <= char <= 'Z':
+        return '[A-Z]'
+    if 'a' <= char <= 'z':
+        return '[a-z]'
+    if '0' <= char <= '9':
+        return '[0-9]'
+    return re.escape(char)
+
+def _shape(value):
+    return tuple((cls, len(list(run))) for cls, run in itertools.groupby(value, key=_char_class))
+
+def sniff_id_regex(values):
+    """Derive a regex such as ``[A-Z]{2}[0-9]{4}`` that every sampled ID matches"""
+    values = pd.Series(values).dropna().astype(str).head(SNIFF_VALUES)
+    if values.empty:
+        return None
+    shapes = values.map(_shape)
+    classes = {tuple(cls for cls, _ in shape) for shape in shapes}
+    if len(classes) != 1:
+        return None
+
+    parts = []
+    for position, cls in enumerate(next(iter(classes))):
+        lengths = [shape[position][1] for shape in shapes]
+        low, high = min(lengths), max(lengths)
+        repeat = f"{{{low}}}" if low == high else f"{{{low},{high}}}"
+        parts.append(cls if repeat == "{1}" else f"{cls}{repeat}")
+    regex = ''.join(parts)
+    return regex if values.str.fullmatch(regex).all() else None
+
+def stratified_sample(csv_path, sample_rows=PROFILE_SAMPLE_ROWS, chunk_rows=PROFILE_CHUNK_ROWS,
+                      sketches=None, seed=0):
+    """Sample rows evenly from every part of a CSV in one streaming pass.
+
+    Each chunk contributes rows in proportion to its size, so the sample covers
+    the whole file rather than its head. ``sketches``, when given, is a dict
+    of column name to ``ColumnSketch`` updated with every row on the way.
+    """
+    with open(csv_path, 'rb') as f:
+        estimated_rows = count_rows(f)
+    fraction = min(1.0, sample_rows / estimated_rows) if estimated_rows else 1.0
+
+    parts = []
+    total_rows = 0
+    for position, chunk in enumerate(pd.read_csv(csv_path, chunksize=chunk_rows)):
+        total_rows += len(chunk)
+        if sketches is not None:
+            for column in chunk.columns:
+                sketches.setdefault(column, ColumnSketch()).update(chunk[column])
+        parts.append(chunk if fraction >= 1.0 else chunk.sample(frac=fraction, random_state=seed + position))
+
+    if not parts:
+        return pd.read_csv(csv_path), 0
+    return pd.concat(parts), total_rows
+
+def _sdtype_for_numbers(sketch, rows):
+    distinct = sketch.distinct_count()
+    if rows <= 5:
+        return 'numerical'
+    if sketch.whole and sketch.positive and distinct <= min(round(rows / 10), 10):
+        return 'categorical'
+    if sketch.whole and _all_unique(sketch, rows):
+        return 'id'
+    return 'numerical'
+
+def _sdtype_for_objects(sketch, rows):
+    distinct = sketch.distinct_count()
+    if rows <= 5:
+        return 'categorical'
+    if _all_unique(sketch, rows):
+        return 'id'
+    if distinct <= round(rows / 5):
+        return 'categorical'
+    return 'unknown'
+
+def _all_unique(sketch, rows):
+    if sketch.nulls:
+        return False
+    if sketch.unique is not None:
+        return sketch.unique
+    if sketch.exact:
+        return len(sketch.hashes) == rows
+    # A candidate only, within the sketch's error of about three standard errors;
+    # ``verify_unique`` settles it before any detection relies on it
+    tolerance = 3 * 1.04 / math.sqrt(len(sketch.distinct.registers))
+    return sketch.distinct.count() >= rows * (1 - tolerance)
+
+def verify_unique(csv_path, sketches, rows, chunk_rows=PROFILE_CHUNK_ROWS):
+    """Check columns that only look unique by their estimate with an exact pass over their keys.
+
+    Reads just those columns and records the answer on each sketch, so SDV
+    never receives a primary key with duplicates.
+    """
+    candidates = [
+        column for column, sketch in sketches.items()
+        if not sketch.exact and sketch.unique is None and _all_unique(sketch, rows)
+    ]
+    if not candidates:
+        return
+    keys = {column: KeySet() for column in candidates}
+    try:
+        for chunk in pd.read_csv(csv_path, usecols=candidates, chunksize=chunk_rows):
+            for column, key_set in keys.items():
+                if sketches[column].unique is None and key_set.add(chunk[column]).any():
+                    sketches[column].unique = False
+        for column in candidates:
+            if sketches[column].unique is None:
+                sketches[column].unique = True
+    finally:
+        for key_set in keys.values():
+            key_set.close()
+
+def detect_from_profile(sample, sketches, rows):
+    """Detect metadata on a row sample, then settle cardinality-based sdtypes with full-data sketches.
+
+    Mirrors ``SingleTableMetadata.detect_from_dataframe``: sdtypes that depend on
+    how many distinct values a column has are decided from the sketches instead
+    of the sample, and the first ID column becomes the primary key.
+    """
+    # Imported here: SDV loads torch, and cached profiles never need it
+    from sdv.metadata import SingleTableMetadata
+
+    metadata = SingleTableMetadata()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        metadata.detect_from_dataframe(sample)
+    metadata_dict = metadata.to_dict()
+    columns = metadata_dict['columns']
+
+    for column_name, column_info in columns.items():
+        sketch = sketches.get(column_name)
+        sdtype = column_info['sdtype']
+        if sketch is None or metadata._detect_pii_column(column_name) is not None:
+            continue
+
+        if sdtype == 'datetime':
+            datetime_format = sniff_datetime_format(sample[column_name])
+            if datetime_format and sample[column_name].dtype == object:
+                column_info['datetime_format'] = datetime_format
+            continue
+
+        if sdtype in ('numerical', 'categorical', 'id', 'unknown'):
+            if sketch.numeric and pd.api.types.is_numeric_dtype(sample[column_name]):
+                new_sdtype = _sdtype_for_numbers(sketch, rows)
+            else:
+                new_sdtype = _sdtype_for_objects(sketch, rows)
+            if new_sdtype != sdtype:
+                columns[column_name] = {'sdtype': new_sdtype}
+                if new_sdtype == 'unknown':
+                    columns[column_name]['pii'] = True
+
+        if columns[column_name]['sdtype'] == 'id' and sample[column_name].dtype == object:
+            regex = sniff_id_regex(sample[column_name])
+            if regex:
+                columns[column_name]['regex_format'] = regex
+
+    # Only the first ID column can be the primary key, as in SDV's own detection
+    id_columns = [name for name, info in columns.items() if info['sdtype'] == 'id']
+    for column_name in id_columns[1:]:
+        columns[column_name] = {'sdtype': 'unknown', 'pii': True}
+
+    primary_key = id_columns[0] if id_columns else metadata_dict.get('primary_key')
+    if primary_key and (id_columns or _all_unique(sketches.get(primary_key, ColumnSketch()), rows)):
+        metadata_dict['primary_key'] = primary_key
+    else:
+        # A PII key that was only unique within the sample
+        metadata_dict.pop('primary_key', None)
+
+    return metadata_dict
+
+def profile_csv(csv_path, sample_rows=PROFILE_SAMPLE_ROWS):
+    """Profile a CSV in one streaming pass and detect its metadata from a sample.
+
+    Returns the row count, a per-column summary (dtype, non-null and null
+    counts, distinct values, estimated once there are many) and the detected metadata as a dict.
+    Results are cached by the file's content hash.
+    """
+    path = cache_path("profiles", f"{content_hash(csv_path)}-{sample_rows}-v{PROFILE_VERSION}.json")
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    sketches = {}
+    sample, rows = stratified_sample(csv_path, sample_rows, sketches=sketches)
+    verify_unique(csv_path, sketches, rows)
+    profile = {
+        "rows": rows,
+        "sample_rows": len(sample),
+        "columns": [
+            {
+                "column": column,
+                "dtype": str(sample[column].dtype),
+                "non_null": sketches[column].count if column in sketches else 0,
+                "nulls": sketches[column].nulls if column in sketches else 0,
+                "unique": sketches[column].distinct_count() if column in sketches else 0
+            }
+            for column in sample.columns
+        ],
+        "metadata": detect_from_profile(sample, sketches, rows)
+    }
+
+    tmp_path = f"{path}.part"
+    with open(tmp_path, 'w') as f:
+        json.dump(profile, f, indent=4)
+    os.replace(tmp_path, path)
+    return profile
+
+def column_info_frame(profile):
+    """Column summary shaped like the Metadata Manager's column information table"""
+    return pd.DataFrame(profile["columns"]).set_index("column").rename(columns={
+        "dtype": "Data Type",
+        "non_null": "Non-Null Count",
+        "nulls": "Null Count",
+        "unique": "Unique Values (est.)"
+    })
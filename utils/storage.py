@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.preload import start_preload_in_server
+
+UPLOAD_DIR = "uploads"
+# Derived artifacts live in a hidden directory so they never show up as uploads
+CACHE_DIR = os.path.join(UPLOAD_DIR, ".cache")
+PARQUET_DIR = os.path.join(CACHE_DIR, "parquet")
+
+# Rows per chunk when converting a CSV to Parquet
+CONVERT_CHUNK_ROWS = 200000
+
+def cache_path(*parts):
+    """Return a path inside the cache directory, creating its parent folders"""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def file_hash(path, chunk_size=8 * 1024 * 1024):
+    """Hash a file's contents in fixed-size chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def column_dtypes(metadata_content):
+    """Map the saved metadata JSON's sdtypes to the pandas dtypes used for storage"""
+    table_name = list(metadata_content['tables'].keys())[0]
+    columns = metadata_content['tables'][table_name].get('columns', {})
+
+    dtypes = {}
+    for col_name, col_info in columns.items():
+        sdtype = col_info.get('sdtype')
+        if sdtype == 'numerical':
+            representation = col_info.get('computer_representation', 'Float')
+            # Nullable integers keep missing values without turning the column into floats
+            dtypes[col_name] = representation if representation.startswith('Int') else 'float64'
+        elif sdtype == 'boolean':
+            dtypes[col_name] = 'boolean'
+    return dtypes
+
+def apply_dtypes(df, dtypes):
+    """Cast columns to the requested dtypes, leaving columns that do not fit untouched"""
+    for col_name, dtype in dtypes.items():
+        if col_name not in df.columns:
+            continue
+        try:
+            df[col_name] = df[col_name].astype(dtype)
+        except (TypeError, ValueError):
+            # Values that contradict the metadata are kept as-is for the validator to report
+            pass
+    return df
+
+def parquet_path(csv_path, dtypes=None):
+    """Return the Parquet path for a CSV under a given column typing"""
+    typing_key = hashlib.sha1(
+        json.dumps(dtypes or {}, sort_keys=True).encode()
+    ).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return cache_path("parquet", f"{stem}-{typing_key}.parquet")
+
+def remove_derived(csv_path):
+    """Delete every Parquet copy of a CSV, whatever typing it was built with"""
+    if not csv_path.endswith('.csv') or not os.path.isdir(PARQUET_DIR):
+        return
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    # Copies are named "<stem>-<12 hex digits>.parquet"
+    expected_length = len(stem) + len("-") + 12 + len(".parquet")
+    for filename in os.listdir(PARQUET_DIR):
+        if filename.startswith(f"{stem}-") and len(filename) == expected_length:
+            os.remove(os.path.join(PARQUET_DIR, filename))
+
+def is_stale(source_path, derived_path):
+    """Check whether a derived file is missing or older than its source"""
+    return (
+        not os.path.exists(derived_path)
+        or os.path.getmtime(derived_path) < os.path.getmtime(source_path)
+    )
+
+def convert_csv(csv_path, out_path, dtypes=None, chunk_rows=CONVERT_CHUNK_ROWS, compression="snappy"):
+    """Convert a CSV into a typed Parquet file, one chunk at a time"""
+    dtypes = dtypes or {}
+    tmp_path = f"{out_path}.part"
+    writer = None
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+            table = pa.Table.from_pandas(apply_dtypes(chunk, dtypes), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema, compression=compression)
+            writer.write_table(table.cast(writer.schema))
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, ValueError):
+        # Types inferred from the first chunk did not hold for the whole file,
+        # so fall back to a single pass over the full CSV
+        if writer is not None:
+            writer.close()
+            writer = None
+        df = apply_dtypes(pd.read_csv(csv_path), dtypes)
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path, compression=compression)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if not os.path.exists(tmp_path):
+        # Empty CSV: write the header-only frame so readers still get the columns
+        df = apply_dtypes(pd.read_csv(csv_path), dtypes)
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path, compression=compression)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+def load_metadata_content(metadata_path):
+    """Read a saved metadata JSON file"""
+    with open(metadata_path, 'r') as f:
+        return json.load(f)
+
+def load_table(csv_path, metadata_path=None, columns=None):
+    """Load a CSV through its typed Parquet copy, converting it first when stale.
+
+    Column types come from the metadata JSON when one is given, so every page
+    reading the same file with the same metadata sees identical dtypes.
+    ``columns`` restricts the read to a subset of columns.
+    """
+    dtypes = column_dtypes(load_metadata_content(metadata_path)) if metadata_path else {}
+    path = parquet_path(csv_path, dtypes)
+    if is_stale(csv_path, path):
+        convert_csv(csv_path, path, dtypes)
+
+    table = pq.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+# Every page imports this module, so whichever page a session opens first starts the preload
+start_preload_in_server()
@@ -0,0 +1,237 @@
+import os
+import sqlite3
+import tempfile
+import pandas as pd
+from utils.constraints import ValidationContext, check_constraints, has_fractional_values, violation_rows
+from utils.storage import CACHE_DIR, apply_dtypes, column_dtypes
+
+# Rows read per chunk when streaming a CSV through the validator
+VALIDATION_CHUNK_ROWS = int(os.environ.get("SDV_APP_VALIDATION_CHUNK_ROWS", "200000"))
+
+# Files larger than this are validated in chunks by default
+STREAMING_THRESHOLD_MB = int(os.environ.get("SDV_APP_STREAMING_VALIDATION_MB", "256"))
+
+# Violating rows kept per constraint; counts always cover every row
+EXAMPLE_ROWS = 100
+
+# Offending values quoted in column error messages
+EXAMPLE_VALUES = 3
+
+def should_stream(path):
+    """Check whether a file is large enough to be validated in chunks"""
+    return os.path.getsize(path) > STREAMING_THRESHOLD_MB * 1024 * 1024
+
+def iter_csv_chunks(csv_path, metadata_content, chunk_rows=VALIDATION_CHUNK_ROWS):
+    """Read a CSV chunk by chunk, typed the same way as the Parquet copies"""
+    dtypes = column_dtypes(metadata_content)
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+        yield apply_dtypes(chunk, dtypes)
+
+class KeySet:
+    """Disk-backed set of key hashes, for uniqueness checks that outgrow memory.
+
+    Values are reduced to 64-bit hashes, so two distinct keys colliding is
+    possible but vanishingly unlikely.
+    """
+
+    def __init__(self):
+        directory = os.path.join(CACHE_DIR, "validation")
+        os.makedirs(directory, exist_ok=True)
+        handle, self.path = tempfile.mkstemp(prefix="keys-", suffix=".sqlite", dir=directory)
+        os.close(handle)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA journal_mode=OFF")
+        self.connection.execute("PRAGMA synchronous=OFF")
+        self.connection.execute("CREATE TABLE keys (hash INTEGER PRIMARY KEY)")
+        self.connection.execute("CREATE TEMP TABLE batch (hash INTEGER)")
+
+    @staticmethod
+    def canonical(values):
+        """Spell keys the same whatever dtype their chunk was read as.
+
+        A chunk with a missing key is read as floats, so 1 and 1.0 must hash alike.
+        """
+        if pd.api.types.is_float_dtype(values):
+            integral = values.notna() & (values % 1 == 0)
+            keys = values.astype(str)
+            keys[integral] = values[integral].astype('int64').astype(str)
+            return keys
+        return values.astype(str)
+
+    def add(self, values):
+        """Add a batch of values; return a mask of those already seen"""
+        hashes = pd.util.hash_pandas_object(self.canonical(values), index=False).to_numpy().view('int64')
+        seen_in_batch = pd.Series(hashes).duplicated().to_numpy()
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO batch VALUES (?)", ((int(h),) for h in hashes)
+            )
+            seen_before = {
+                row[0] for row in self.connection.execute(
+                    "SELECT DISTINCT batch.hash FROM batch JOIN keys ON keys.hash = batch.hash"
+                )
+            }
+            self.connection.execute("INSERT OR IGNORE INTO keys SELECT hash FROM batch")
+            self.connection.execute("DELETE FROM batch")
+
+        if seen_before:
+            seen_in_batch |= pd.Series(hashes).isin(seen_before).to_numpy()
+        return seen_in_batch
+
+    def close(self):
+        self.connection.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class ValidationReport:
+    """Validation results merged across every chunk of a file"""
+
+    def __init__(self, example_rows=EXAMPLE_ROWS):
+        self.example_rows = example_rows
+        self.rows = 0
+        self.chunks = 0
+        # Messages are kept in first-seen order and reported once
+        self._errors = {}
+        self._values = {}
+        self.violations = {}
+
+    def add_error(self, message):
+        self._errors.setdefault(message, None)
+
+    def add_values(self, key, values, describe):
+        """Count offending values for a column check, keeping the first few as examples.
+
+        ``describe(count, examples)`` builds the message once every chunk is in.
+        """
+        if values.empty:
+            return
+        entry = self._values.setdefault(key, {"describe": describe, "count": 0, "examples": []})
+        entry["count"] += len(values)
+        missing = EXAMPLE_VALUES - len(entry["examples"])
+        if missing > 0:
+            entry["examples"].extend(values.head(missing).tolist())
+
+    def add_violation(self, result, chunk):
+        entry = self.violations.setdefault(result['message'], {
+            'constraint': result['constraint'],
+            'columns': result['columns'],
+            'message': result['message'],
+            'count': 0,
+            'examples': []
+        })
+        entry['count'] += result['count']
+        kept = sum(len(examples) for examples in entry['examples'])
+        if kept < self.example_rows:
+            rows = violation_rows(result, limit=self.example_rows - kept)
+            entry['examples'].append(chunk.iloc[rows][result['columns']])
+
+    @property
+    def errors(self):
+        """Every failure message, column checks first and constraints after"""
+        messages = list(self._errors)
+        for entry in self._values.values():
+            examples = ', '.join(map(str, entry["examples"]))
+            messages.append(entry["describe"](entry["count"], examples))
+        messages.extend(entry['message'] for entry in self.violations.values())
+        return messages
+
+    def violation_details(self):
+        """Constraint violations with their total count and example rows"""
+        return [
+            {**entry, 'examples': pd.concat(entry['examples'])}
+            for entry in self.violations.values()
+        ]
+
+def _check_columns(chunk, columns_metadata, context, report):
+    for col_name, col_info in columns_metadata.items():
+        if col_name not in chunk.columns:
+            report.add_error(f"❌ Column '{col_name}' is missing in the dataset")
+            continue
+
+        sdtype = col_info['sdtype']
+        if sdtype == 'datetime':
+            invalid = context.invalid_datetimes(col_name)
+            datetime_format = context.datetime_format(col_name)
+            report.add_values(
+                ('datetime', col_name),
+                chunk[col_name][invalid],
+                lambda count, examples, col_name=col_name, datetime_format=datetime_format: (
+                    f"❌ Column '{col_name}' contains {count} values not matching format "
+                    f"'{datetime_format}'. Examples: {examples}"
+                )
+            )
+        elif sdtype == 'numerical':
+            if not pd.api.types.is_numeric_dtype(chunk[col_name]):
+                report.add_error(f"❌ Column '{col_name}' should be numerical")
+            representation = col_info.get('computer_representation', '')
+            if representation.startswith('Int') and has_fractional_values(chunk[col_name]):
+                report.add_error(
+                    f"❌ Column '{col_name}' is set to {representation} but contains float values"
+                )
+        elif sdtype == 'boolean':
+            if not pd.api.types.is_bool_dtype(chunk[col_name].dtype):
+                report.add_error(f"❌ Column '{col_name}' should be boolean")
+        elif sdtype == 'id':
+            regex_pattern = col_info.get('regex_format', '[0-9]+')
+            try:
+                values = chunk[col_name].dropna().astype(str)
+                invalid_values = values[~values.str.match(regex_pattern)]
+            except Exception as e:
+                report.add_error(f"❌ Error validating regex pattern for column '{col_name}': {str(e)}")
+                continue
+            report.add_values(
+                ('regex', col_name),
+                invalid_values,
+                lambda count, examples, col_name=col_name, regex_pattern=regex_pattern: (
+                    f"❌ Column '{col_name}' contains {count} values not matching regex pattern "
+                    f"'{regex_pattern}'. Examples: {examples}"
+                )
+            )
+
+def validate_chunks(chunks, metadata_content, example_rows=EXAMPLE_ROWS):
+    """Validate data against saved metadata, one chunk at a time.
+
+    ``chunks`` is any iterable of DataFrames, e.g. ``iter_csv_chunks`` for a
+    file larger than memory or ``[df]`` for a frame that is already loaded.
+    Only the merged counts and example rows are kept between chunks.
+    """
+    table_name = list(metadata_content['tables'].keys())[0]
+    table_info = metadata_content['tables'][table_name]
+    columns_metadata = table_info.get('columns', {})
+    constraints = metadata_content.get('constraints', [])
+    primary_key = table_info.get('primary_key')
+
+    report = ValidationReport(example_rows)
+    key_set = KeySet() if primary_key else None
+    try:
+        for chunk in chunks:
+            # Conversions such as parsed datetime columns are shared by every check on the chunk
+            context = ValidationContext(chunk, columns_metadata)
+            _check_columns(chunk, columns_metadata, context, report)
+
+            if key_set is not None and primary_key in chunk.columns:
+                keys = chunk[primary_key].dropna()
+                duplicated = key_set.add(keys)
+                report.add_values(
+                    ('primary_key', primary_key),
+                    keys[duplicated],
+                    lambda count, examples: (
+                        f"❌ Primary key '{primary_key}' contains {count} duplicate values. Examples: {examples}"
+                    )
+                )
+
+            results, errors = check_constraints(chunk, columns_metadata, constraints, context)
+            for error in errors:
+                report.add_error(error)
+            for result in results:
+                if result['count']:
+                    report.add_violation(result, chunk)
+
+            report.rows += len(chunk)
+            report.chunks += 1
+    finally:
+        if key_set is not None:
+            key_set.close()
+
+    return report